@@ -0,0 +1,154 @@
+from photon import DIRECTIONS
+from mirror import REFLECTION_TABLE, ABSORBED
+from event_engine import EventEngine
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+analytic_solver - Solves a circuit without running a clock. Every state
+(x, y, direction) of a photon has exactly one next state, so the board is a
+functional graph: the outcome of a photon (where it gets absorbed, and after
+how long) only depends on the state it starts from, and is found by a single
+walk through the graph. Walks jump from one receiver or mirror to the next
+(using the row and column index of the EventEngine), so their cost depends
+on the number of reflections rather than the size of the board.
+
+Outcomes are memoised for every state a walk passes through, so emitters
+whose paths merge share the rest of the walk, every shot of a pulse train
+reuses its emitter's outcome, and later runs over the same geometry reuse
+all of them. A walk which comes back to a state it already passed is a loop
+of mirrors, and the photon is trapped.
+
+Once every photon has its outcome, the arrivals are applied in the order
+tick would apply them: by time, then by position in the live photon
+worklist. The solver is run through LaserCircuit.run_analytic.
+'''
+
+# index of the travel time in an outcome, see AnalyticSolver.outcome
+TRAVEL_TIME = 5
+
+
+class AnalyticSolver:
+
+    def __init__(self, circuit):
+        '''
+        Initialises an AnalyticSolver for the current geometry of circuit.
+
+        circuit:  LaserCircuit - the circuit to solve
+        index:    EventEngine  - finds the next receiver or mirror in a row
+                                 or column
+        outcomes: dict         - (x, y, direction code) -> outcome of every
+                                 state walked through
+
+        Parameters
+        ----------
+        circuit - the LaserCircuit to solve
+        '''
+        self.circuit = circuit
+        self.index: EventEngine = EventEngine(circuit)
+        self.outcomes: dict[tuple[int, int, int], tuple] = {}
+
+    def outcome(self, x: int, y: int, direction_code: int) -> tuple:
+        '''
+        Returns the outcome of a photon at (x, y) travelling in the direction
+        direction_code, walking (and memoising) any states not seen yet.
+
+        Returns
+        -------
+        A tuple (ending, component, x, y, direction code, travel time) where
+        ending is 'receiver', 'mirror', 'edge' or 'loop', component is the
+        receiver or mirror which absorbs the photon (else None), x, y and
+        the direction code are the photon's final state and travel time is
+        the nanoseconds until it is absorbed. A loop has no final state and
+        its travel time is None.
+        '''
+        outcomes = self.outcomes
+        start = (x, y, direction_code)
+        if start in outcomes:
+            return outcomes[start]
+        grid = self.circuit.grid
+        width = self.circuit.get_width()
+        next_stop = self.index.next_stop
+        # states walked through and the time each was reached at
+        chain = []
+        walked = set()
+        elapsed = 0
+        state = start
+        while True:
+            if state in outcomes:
+                end = outcomes[state]
+                if end[TRAVEL_TIME] is not None:
+                    end = end[:TRAVEL_TIME] + (elapsed + end[TRAVEL_TIME],)
+                break
+            if state in walked:
+                end = ('loop', None, None, None, None, None)
+                break
+            walked.add(state)
+            chain.append((state, elapsed))
+            x, y, d = state
+            x, y, distance, left_board = next_stop(x, y, DIRECTIONS[d])
+            elapsed += distance
+            if left_board:
+                end = ('edge', None, x, y, d, elapsed)
+                break
+            component = grid[y * width + x]
+            if component.get_component_type() == 'receiver':
+                end = ('receiver', component, x, y, d, elapsed)
+                break
+            new_d = d if component.mirror_code is None else REFLECTION_TABLE[component.mirror_code][d]
+            if new_d == ABSORBED:
+                end = ('mirror', component, x, y, d, elapsed)
+                break
+            state = (x, y, new_d)
+
+        total = end[TRAVEL_TIME]
+        for walked_state, time in chain:
+            if total is None:
+                outcomes[walked_state] = end
+            else:
+                outcomes[walked_state] = end[:TRAVEL_TIME] + (total - time,)
+        return outcomes[start]
+
+    def is_trapped(self, x: int, y: int, direction_code: int | None) -> bool:
+        '''
+        Returns whether a photon at (x, y) travelling in the direction
+        direction_code never gets absorbed: it has no direction, or its path
+        goes round a loop of mirrors.
+        '''
+        return direction_code is None or self.outcome(x, y, direction_code)[0] == 'loop'
+
+    def run(self) -> None:
+        '''
+        Runs every photon in the circuit until the circuit is finished,
+        updating the circuit's clock, its receivers and the Photon objects
+        themselves, without ticking. Every shot still to fire is fired up
+        front at its time, then each photon is moved straight to the end of
+        its path. The board is not updated.
+        '''
+        circuit = self.circuit
+        # (start time, photon), in the order of the live photon worklist
+        starts = [(circuit.clock, photon) for photon in circuit.live_photons
+                  if not photon.is_absorbed() and not photon.is_trapped()]
+        emissions = circuit.emission_queue
+        while len(emissions) > 0:
+            circuit.clock = max(circuit.clock, emissions[0][0])
+            starts.extend((circuit.clock, photon) for photon in circuit.emit_due_photons()
+                          if not photon.is_trapped())
+
+        arrivals = []
+        for order, (start, photon) in enumerate(starts):
+            end = self.outcome(photon.x, photon.y, photon.direction_code)
+            arrivals.append((start + end[TRAVEL_TIME], order, photon, end))
+        arrivals.sort(key=lambda arrival: arrival[:2])
+
+        for time, _, photon, (ending, component, x, y, d, _) in arrivals:
+            photon.x = x
+            photon.y = y
+            photon.set_direction_code(d)
+            if ending == 'receiver':
+                component.absorb_photon(photon, time)
+            else:
+                photon.got_absorbed()
+            circuit.clock = max(circuit.clock, time)
@@ -0,0 +1,463 @@
+import io
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import sorter
+import input_parser
+from emitter import Emitter
+from receiver import Receiver
+from mirror import Mirror, REFLECTION_TABLE, ABSORBED
+from photon import DX, DY, DIRECTION_CODES
+from laser_circuit import LaserCircuit
+from results_export import ResultsExporter
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+benchmark - Measures the hot paths of the simulator on synthetic circuits.
+A seeded generator builds boards of any size, mirror density and number of
+emitters and receivers, so every run of the benchmark measures exactly the
+same work.
+
+Every benchmark is timed as the best of a number of repeats (and of as many
+runs as fit in MIN_TIME), then run once more under tracemalloc to record its peak memory. The results are printed
+(or saved) as JSON and can be compared against a stored baseline, which
+reports every benchmark that got slower than the allowed tolerance.
+
+Usage:
+    python home/benchmark.py [-SEED <n>] [-SIZE <width> <height>]
+        [-MIRROR-DENSITY <fraction>] [-EMITTERS <n>] [-RECEIVERS <n>]
+        [-REPEAT <n>] [-OUTPUT <file>] [-BASELINE <file>] [-TOLERANCE <fraction>]
+'''
+
+BENCHMARK_FORMAT_VERSION = 1
+# every benchmark runs for at least this many seconds in total
+MIN_TIME = 0.2
+DEFAULT_CONFIG = {'seed': 0, 'width': 200, 'height': 100, 'mirror_density': 0.02,
+                  'emitters': 100, 'receivers': 100, 'repeat': 5}
+
+
+def emitter_symbol(i: int) -> str:
+    '''Returns the i-th emitter symbol: 'A' to 'Z', then 'AA', 'AB', ...'''
+    symbol = ''
+    i += 1
+    while i > 0:
+        i, letter = divmod(i - 1, 26)
+        symbol = chr(ord('A') + letter) + symbol
+    return symbol
+
+
+def photon_escapes(circuit: LaserCircuit, x: int, y: int, direction: str) -> bool:
+    '''
+    Returns whether or not a photon leaving (x, y) in direction ends up
+    absorbed, rather than trapped in a loop of mirrors forever.
+    '''
+    width = circuit.get_width()
+    height = circuit.get_height()
+    d = DIRECTION_CODES[direction]
+    seen = set()
+    while (x, y, d) not in seen:
+        seen.add((x, y, d))
+        x += DX[d]
+        y += DY[d]
+        if not circuit.is_within_bounds(x, y):
+            return True
+        component = circuit.grid[y * width + x]
+        if component is None or component.get_component_type() == 'emitter':
+            continue
+        if component.get_component_type() == 'receiver':
+            return True
+        reflected = REFLECTION_TABLE[component.mirror_code][d]
+        if reflected == ABSORBED:
+            return True
+        d = reflected
+    return False
+
+
+def generate_circuit(config: dict, headless: bool = False) -> LaserCircuit:
+    '''
+    Generates a random circuit from config, the same one for the same
+    config. Components are placed on distinct cells and every emitter gets
+    a pulse sequence whose photon is never trapped, so the circuit always
+    finishes running.
+
+    Parameters
+    ----------
+    config   - seed, width, height, mirror_density, emitters and receivers
+    headless - passed on to the LaserCircuit
+
+    Returns
+    -------
+    The generated circuit, with its pulse sequence set.
+    '''
+    rng = random.Random(config['seed'])
+    width = config['width']
+    height = config['height']
+    circuit = LaserCircuit(width, height, None, headless)
+    mirrors = int(width * height * config['mirror_density'])
+    total = min(width * height, mirrors + config['receivers'] + config['emitters'])
+    cells = rng.sample(range(width * height), total)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cell in cells[:mirrors]:
+            circuit.add_mirror(Mirror(rng.choice('/\\><^v'), cell % width, cell // width))
+        for i, cell in enumerate(cells[mirrors:mirrors + config['receivers']]):
+            circuit.add_receiver(Receiver(f'R{i}', cell % width, cell // width))
+        i = 0
+        for cell in cells[mirrors + config['receivers']:]:
+            x = cell % width
+            y = cell // width
+            directions = [direction for direction in 'NESW' if photon_escapes(circuit, x, y, direction)]
+            if len(directions) == 0:
+                continue
+            emitter = Emitter(emitter_symbol(i), x, y)
+            emitter.set_pulse_sequence(rng.randint(400, 789), rng.choice(directions))
+            circuit.add_emitter(emitter)
+            i += 1
+    return circuit
+
+
+def generate_inputs(config: dict) -> dict[str, list[str]]:
+    '''
+    Generates the lines the input_parser benchmarks parse, a mix of valid
+    and invalid lines for every kind of input, the same for the same config.
+    '''
+    rng = random.Random(config['seed'])
+    count = max(1000, config['emitters'] + config['receivers'])
+    width = config['width']
+    height = config['height']
+
+    def position() -> str:
+        return f"{rng.randrange(-1, width)} {rng.randrange(height)}"
+
+    return {
+        'parse_size': [f"{rng.randint(-2, 99)} {rng.randint(1, 99)}" for i in range(count)],
+        'parse_emitter': [f"{emitter_symbol(rng.randrange(60))} {position()}" for i in range(count)],
+        'parse_receiver': [f"R{rng.randrange(100)} {position()}" for i in range(count)],
+        'parse_mirror': [f"{rng.choice('/<>^vX')} {position()}" for i in range(count)],
+        'parse_pulse_sequence': [f"{emitter_symbol(rng.randrange(60))} {rng.randint(-5, 900)} "
+                                 f"{rng.choice('NESWX')}" for i in range(count)],
+    }
+
+
+def best_time(run, setup, repeat: int) -> tuple[float, int]:
+    '''
+    Returns the shortest time (s) taken by run(state), where state = setup()
+    is created before every run and is not timed. run is repeated at least
+    repeat times and until MIN_TIME has been spent running it, so short
+    benchmarks are not dominated by noise.
+
+    Returns
+    -------
+    A tuple (shortest time, number of runs).
+    '''
+    best = None
+    total = 0.0
+    runs = 0
+    while runs < repeat or total < MIN_TIME:
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        runs += 1
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, runs
+
+
+def peak_memory(run, setup) -> int:
+    '''Returns the peak memory (bytes) allocated while running run(setup()).'''
+    state = setup()
+    tracemalloc.start()
+    try:
+        run(state)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(run, setup, repeat: int, work: dict[str, int]) -> dict:
+    '''
+    Times run and measures its peak memory.
+
+    Parameters
+    ----------
+    run    - the function to benchmark, taking the state returned by setup
+    setup  - creates a fresh state for every run
+    repeat - how many times to time run
+    work   - the amount of work done by one run, e.g. {'ticks': 100}; a
+             <name>_per_s rate is reported for each entry
+
+    Returns
+    -------
+    A dict with the seconds taken, the peak memory, the work and its rates.
+    '''
+    seconds, runs = best_time(run, setup, repeat)
+    result = {'seconds': seconds, 'runs': runs, 'peak_memory_bytes': peak_memory(run, setup)}
+    for name, amount in work.items():
+        result[name] = amount
+        result[f'{name}_per_s'] = amount / seconds if seconds > 0 else None
+    return result
+
+
+def run_ticks(circuit: LaserCircuit) -> tuple[int, int]:
+    '''
+    Emits the photons of circuit and ticks until it is finished.
+
+    Returns
+    -------
+    A tuple (ticks, photon moves) where photon moves counts every live
+    photon moved by every tick.
+    '''
+    circuit.emit_photons()
+    ticks = 0
+    moves = 0
+    while not circuit.is_finished():
+        moves += circuit.live_photon_count
+        circuit.tick()
+        ticks += 1
+    return ticks, moves
+
+
+def run_circuit_quietly(circuit: LaserCircuit) -> None:
+    '''
+    Runs circuit.run_circuit with its output discarded. The output files are
+    written into a temporary directory, so home/output is left untouched.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        circuit.set_exporter(ResultsExporter(directory))
+        with contextlib.redirect_stdout(io.StringIO()):
+            circuit.run_circuit()
+
+
+def add_all(circuit: LaserCircuit, components: list) -> None:
+    '''Adds every generated component into a fresh circuit.'''
+    with contextlib.redirect_stdout(io.StringIO()):
+        for component in components:
+            if isinstance(component, Mirror):
+                circuit.add_mirror(component)
+            elif isinstance(component, Receiver):
+                circuit.add_receiver(component)
+            else:
+                circuit.add_emitter(component)
+
+
+def run_benchmarks(config: dict) -> dict[str, dict]:
+    '''
+    Runs every benchmark on circuits generated from config.
+
+    Returns
+    -------
+    The result of every benchmark by name, see measure.
+    '''
+    repeat = config['repeat']
+    results = {}
+    template = generate_circuit(config, headless=True)
+    components = template.get_mirrors() + template.get_receivers() + template.get_emitters()
+    width = config['width']
+    height = config['height']
+
+    def fresh_components() -> list:
+        copies = []
+        for component in components:
+            copy = type(component)(component.symbol, component.get_x(), component.get_y())
+            if isinstance(component, Emitter):
+                copy.set_pulse_sequence(component.get_frequency(), component.get_direction())
+            copies.append(copy)
+        return copies
+
+    results['add_components'] = measure(
+        lambda state: add_all(LaserCircuit(width, height, None, True), state),
+        fresh_components, repeat, {'components': len(components)})
+
+    def built_circuit(headless: bool):
+        def setup() -> LaserCircuit:
+            circuit = LaserCircuit(width, height, None, headless)
+            add_all(circuit, fresh_components())
+            return circuit
+        return setup
+
+    ticks, moves = run_ticks(built_circuit(False)())
+    results['tick'] = measure(run_ticks, built_circuit(False), repeat,
+                              {'ticks': ticks, 'photon_moves': moves})
+    results['tick_headless'] = measure(run_ticks, built_circuit(True), repeat,
+                                       {'ticks': ticks, 'photon_moves': moves})
+    results['run_circuit'] = measure(run_circuit_quietly, built_circuit(False), repeat,
+                                     {'ticks': ticks, 'photons': len(template.get_emitters())})
+
+    # the boards printed are the frames of a run: the cells changed by each
+    # tick are recorded once, then set again before printing every frame, so
+    # each frame builds the rows changed since the last one like run_circuit
+    recorded = built_circuit(False)()
+    recorded.emit_photons()
+    recorded.board_displayer.start_change_log()
+    frames = []
+    while not recorded.is_finished():
+        recorded.tick()
+        frames.append(recorded.board_displayer.take_change_log())
+
+    def print_boards(circuit: LaserCircuit) -> None:
+        board_displayer = circuit.board_displayer
+        with contextlib.redirect_stdout(io.StringIO()):
+            for changes in frames:
+                for x, y, cell in changes:
+                    board_displayer.set_cell(x, y, cell)
+                circuit.print_board()
+    results['print_board'] = measure(print_boards, built_circuit(False), repeat,
+                                     {'boards': len(frames), 'cell_changes': sum(map(len, frames))})
+
+    rng = random.Random(config['seed'])
+    receivers = [Receiver(f'R{i}', 0, 0) for i in range(max(1000, config['receivers']))]
+    rng.shuffle(receivers)
+    for receiver in receivers:
+        receiver.frequency_sum = rng.choice([300, 400, 500, rng.randint(1, 1000)])
+        receiver.activation_time = rng.randrange(50)
+    for name in ('sort_receivers_by_symbol', 'sort_receivers_by_activation_time',
+                 'sort_receivers_by_total_energy'):
+        results[name] = measure(getattr(sorter, name), lambda: receivers, repeat,
+                                {'items': len(receivers)})
+
+    def parse_all(parse):
+        def run(lines: list[str]) -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for line in lines:
+                    parse(line)
+        return run
+    for name, lines in generate_inputs(config).items():
+        results[name] = measure(parse_all(getattr(input_parser, name)), lambda: lines, repeat,
+                                {'lines': len(lines)})
+    return results
+
+
+def compare_with_baseline(results: dict[str, dict], baseline: dict[str, dict],
+                          tolerance: float) -> list[str]:
+    '''
+    Compares the time of every benchmark with a baseline.
+
+    Parameters
+    ----------
+    results   - the results of run_benchmarks
+    baseline  - the results of a previous run_benchmarks
+    tolerance - how much slower a benchmark may get, e.g. 0.2 for 20%
+
+    Returns
+    -------
+    A message for every benchmark which got slower than the tolerance.
+    '''
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]['seconds']
+        after = result['seconds']
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(f"Regression: {name} took {after:.6f}s, "
+                               f"{(after / before - 1) * 100:.0f}% slower than {before:.6f}s")
+    return regressions
+
+
+def parse_args(args: list[str]) -> tuple[dict, str, str, float] | None:
+    '''
+    Reads the options of the command line.
+
+    Returns
+    -------
+    A tuple (config, output file, baseline file, tolerance), or None (after
+    printing an error) if an option is invalid.
+    '''
+    config = dict(DEFAULT_CONFIG)
+    output = None
+    baseline = None
+    tolerance = 0.2
+    options = {'-SEED': ('seed', int), '-MIRROR-DENSITY': ('mirror_density', float),
+               '-EMITTERS': ('emitters', int), '-RECEIVERS': ('receivers', int),
+               '-REPEAT': ('repeat', int)}
+    i = 1
+    try:
+        while i < len(args):
+            option = args[i]
+            if option in options:
+                key, convert = options[option]
+                config[key] = convert(args[i + 1])
+                i += 2
+            elif option == '-SIZE':
+                config['width'] = int(args[i + 1])
+                config['height'] = int(args[i + 2])
+                i += 3
+            elif option == '-OUTPUT':
+                output = args[i + 1]
+                i += 2
+            elif option == '-BASELINE':
+                baseline = args[i + 1]
+                i += 2
+            elif option == '-TOLERANCE':
+                tolerance = float(args[i + 1])
+                i += 2
+            else:
+                print(f"Error: unknown option '{option}'")
+                return None
+    except (IndexError, ValueError):
+        print(f"Error: invalid value for option '{args[i]}'")
+        return None
+    if config['width'] <= 0 or config['height'] <= 0 or config['repeat'] <= 0 \
+            or not 0 <= config['mirror_density'] <= 1:
+        print("Error: size and repeat must be positive and mirror density between 0 and 1")
+        return None
+    return config, output, baseline, tolerance
+
+
+def main(args: list[str]) -> None:
+    '''
+    Runs the benchmarks from the command line, prints or saves the results
+    as JSON and reports any regression against a baseline. Exits with
+    status 1 if there is a regression.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    parsed = parse_args(args)
+    if parsed is None:
+        return
+    config, output, baseline_file, tolerance = parsed
+
+    report = {'format_version': BENCHMARK_FORMAT_VERSION,
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'config': config,
+              'results': run_benchmarks(config)}
+    text = json.dumps(report, indent=2)
+    if output is None:
+        print(text)
+    else:
+        with open(output, 'w') as file:
+            file.write(text + '\n')
+        print(f"Results saved to {output}.")
+
+    if baseline_file is not None:
+        try:
+            with open(baseline_file, 'r') as file:
+                baseline = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            print(f"Error: baseline {baseline_file} could not be read")
+            return
+        if baseline.get('config') != config:
+            print("Warning: baseline was run with another config")
+        regressions = compare_with_baseline(report['results'], baseline['results'], tolerance)
+        for regression in regressions:
+            print(regression)
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
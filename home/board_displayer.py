@@ -1,7 +1,9 @@
+import math
+from bisect import bisect_left
 from emitter import Emitter
 from receiver import Receiver
 from photon import Photon
-from mirror import Mirror
+from mirror import Mirror, MIRROR_SYMBOLS
 
 '''
 Name:   Javier Herrera Saavedra
@@ -16,10 +18,111 @@ You are free to add more attributes and methods, as long as you aren't
 modifying the existing scaffold.
 '''
 
+# clears the terminal and moves the cursor to the top left corner
+CLEAR_SCREEN = "\033[2J\033[H"
+# save and restore the position of the cursor
+SAVE_CURSOR = "\0337"
+RESTORE_CURSOR = "\0338"
+# makes the whole terminal scroll again, keeping the cursor where it is
+RESET_SCROLL_REGION = SAVE_CURSOR + "\033[r" + RESTORE_CURSOR
+
+# colour of photons in RGB mode, from the highest frequencies to the lowest;
+# a photon takes the first colour whose low frequency it is above
+COLOUR_CODES = (('violet', "\033[35m"), ('blue', "\033[34m"), ('cyan', "\033[36m"),
+                ('green', "\033[32m"), ('yellow', "\033[33m"), ('orange', "\033[38;5;166m"),
+                ('red', "\033[31m"))
+DEFAULT_COLOUR = "\033[39m"  # photons below every colour are not coloured
+DIM = "\033[38;5;245m"
+UNDERLINE = "\033[4m"
+END_CODE = "\033[0m"
+
+# kinds of cell counted in each block of the overview, see cell_kind
+TRAIL = 0
+EMITTER = 1
+RECEIVER = 2
+MIRROR = 3
+# the glyph of an overview block: the kind of component it holds the most of
+# (receivers first on ties, then emitters, then mirrors), else a trail, else
+# nothing
+OVERVIEW_GLYPHS = {RECEIVER: 'R', EMITTER: 'E', MIRROR: 'M', TRAIL: '.'}
+# cell -> its kind, cached since only a few different cells are ever shown
+cell_kinds: dict[str, int | None] = {' ': None}
+
+# (style, character) -> the styled character, so every styled cell is built once
+styled_glyphs: dict[tuple[str, str], str] = {}
+
+
+def styled_glyph(style: str, character: str) -> str:
+    '''Returns character wrapped in the escape codes of style, built once.'''
+    glyph = styled_glyphs.get((style, character))
+    if glyph is None:
+        glyph = styled_glyphs[(style, character)] = style + character + END_CODE
+    return glyph
+
+
+def cell_kind(cell: str) -> int | None:
+    '''
+    Returns the kind of what a cell of the board shows (TRAIL, EMITTER,
+    RECEIVER or MIRROR), or None if it is empty. Styled cells are classified
+    by the character they wrap.
+    '''
+    kind = cell_kinds.get(cell)
+    if kind is None and cell not in cell_kinds:
+        character = cell[-len(END_CODE) - 1] if cell.endswith(END_CODE) else cell[-1]
+        if character == Photon.symbol:
+            kind = TRAIL
+        elif character in MIRROR_SYMBOLS:
+            kind = MIRROR
+        elif character.isdigit():
+            kind = RECEIVER
+        else:
+            kind = EMITTER
+        cell_kinds[cell] = kind
+    return kind
+
+
+def compile_colour_classifier(colour_frequency_ranges: dict) -> tuple[list[int], list[str]] | None:
+    '''
+    Compiles the colour of each frequency range into a table which
+    classifies a frequency with a single binary search.
+
+    A colour is only ever picked for frequencies above its low frequency and
+    not above the low frequency of any colour before it in COLOUR_CODES, so
+    the colours picked make up a list of low frequencies in ascending order.
+
+    Parameters
+    ----------
+    colour_frequency_ranges - colour -> (high frequency, low frequency)
+
+    Returns
+    -------
+    A tuple (bounds, glyphs) where the photon glyph of a frequency is
+    glyphs[bisect_left(bounds, frequency)], or None if the ranges are not a
+    dict holding a numeric low frequency for every colour.
+    '''
+    if not isinstance(colour_frequency_ranges, dict):
+        return None
+    bounds = []
+    glyphs = []
+    for colour, code in COLOUR_CODES:
+        frequency_range = colour_frequency_ranges.get(colour)
+        if not isinstance(frequency_range, (tuple, list)) or len(frequency_range) != 2 \
+                or not isinstance(frequency_range[1], (int, float)):
+            return None
+        low = frequency_range[1]
+        # a colour whose range starts above an earlier colour's is never picked
+        if len(bounds) == 0 or low < bounds[-1]:
+            bounds.append(low)
+            glyphs.append(styled_glyph(code, Photon.symbol))
+    bounds.reverse()
+    glyphs.reverse()
+    return bounds, [styled_glyph(DEFAULT_COLOUR, Photon.symbol)] + glyphs
+
 
 class BoardDisplayer:
 
-    def __init__(self, width: int, height: int, colour_frequency_ranges: dict = None):
+    def __init__(self, width: int, height: int, colour_frequency_ranges: dict = None,
+                 terminal_mode: bool = False):
         '''
         Initialises a BoardDisplayer instance given a width and height 
         which is the size of the circuit board. board should be 
@@ -31,16 +134,48 @@ class BoardDisplayer:
                                   circuit board, having the symbol of each 
                                   component and photon in the circuit at its 
                                   assigned position
+        change_log: list        - (x, y, cell) of every changed cell since
+                                  the log was started, None if not logging
+        rows:        list[str]  - the rendered row of each line of the board
+        dirty_cells: set        - (x, y) of every cell changed since the
+                                  last frame was rendered
+        terminal_mode: bool     - whether print_board redraws only the
+                                  changed cells in place with cursor
+                                  escape codes
+        frame_drawn:   bool     - whether a full frame has been drawn in
+                                  terminal mode yet
+        viewport:     tuple     - (x, y, width, height) of the window of the
+                                  board printed, None to print all of it
+        overview:     tuple     - (block width, block height) of the blocks
+                                  each printed as a single cell, None unless
+                                  printing a downsampled overview
+        block_counts: list[list[int]] - cells of each kind in every block of
+                                        the overview (by kind, then block),
+                                        None unless printing an overview
+        colour_bounds: list[int] - ascending low frequencies of the colours
+                                   of photons, None unless colouring
+        photon_glyphs: list[str] - the styled photon of each slot between
+                                   colour_bounds, None unless colouring
 
         Parameters
         ----------
         width  - the width to set this board to
         height - the height to set this board to
+        terminal_mode - whether to render frames in terminal mode
         '''
         self.width: int = width
         self.height: int = height
+        self.viewport: tuple[int, int, int, int] = None
+        self.overview: tuple[int, int] = None
+        self.block_counts: list[list[int]] = None
         self.board: list[list[str]] = self.create_board()
         self.colour_frequency_ranges = colour_frequency_ranges
+        # invalid ranges leave photons uncoloured, as checked once here
+        classifier = compile_colour_classifier(colour_frequency_ranges)
+        self.colour_bounds: list[int] = None if classifier is None else classifier[0]
+        self.photon_glyphs: list[str] = None if classifier is None else classifier[1]
+        self.change_log: list[tuple[int, int, str]] = None
+        self.terminal_mode: bool = terminal_mode
 
     def create_board(self) -> list[list[str]]:
         '''
@@ -71,31 +206,164 @@ class BoardDisplayer:
             row = self.width * [' ']
             self.board.append(row)
             i += 1
+        # every row has to be rendered again for the next frame
+        self.rows: list[str] = [None] * self.height
+        self.dirty_cells: set[tuple[int, int]] = set()
+        self.frame_drawn: bool = False
+        if self.overview is not None:
+            self.count_blocks()
         return self.board
 
+    def set_cell(self, x: int, y: int, cell: str) -> None:
+        '''
+        Stores cell in position (x, y) of the board, recording the change in
+        change_log if a change log has been started.
+
+        Parameters
+        ----------
+        x, y - the position of the cell to set
+        cell - the string to display in that cell
+        '''
+        if self.board[y][x] == cell:
+            return
+        if self.block_counts is not None:
+            block = (y // self.overview[1]) * self.overview_columns() + x // self.overview[0]
+            old_kind = cell_kind(self.board[y][x])
+            new_kind = cell_kind(cell)
+            if old_kind is not None:
+                self.block_counts[old_kind][block] -= 1
+            if new_kind is not None:
+                self.block_counts[new_kind][block] += 1
+        self.board[y][x] = cell
+        self.dirty_cells.add((x, y))
+        if self.change_log is not None:
+            self.change_log.append((x, y, cell))
+
+    def set_viewport(self, x: int, y: int, width: int, height: int) -> bool:
+        '''
+        Makes print_board print only the window of the board starting at
+        (x, y), width cells wide and height cells high (cut to the board).
+
+        Returns
+        -------
+        True if the viewport is set, else False (after printing an error)
+        if the window doesn't start on the board or is empty.
+        '''
+        if not (0 <= x < self.width and 0 <= y < self.height) or width <= 0 or height <= 0:
+            print(f"Error: viewport must start on the {self.width}x{self.height} board "
+                  f"and have a positive size")
+            return False
+        self.viewport = (x, y, min(width, self.width - x), min(height, self.height - y))
+        self.overview = None
+        self.block_counts = None
+        self.frame_drawn = False
+        return True
+
+    def set_overview(self, columns: int, rows: int) -> bool:
+        '''
+        Makes print_board print a downsampled overview of the whole board at
+        most columns cells wide and rows cells high, where each cell stands
+        for a block of the board (see OVERVIEW_GLYPHS).
+
+        Returns
+        -------
+        True if the overview is set, else False (after printing an error)
+        if its size is not positive.
+        '''
+        if columns <= 0 or rows <= 0:
+            print("Error: overview must have a positive size")
+            return False
+        self.overview = (math.ceil(self.width / columns), math.ceil(self.height / rows))
+        self.viewport = None
+        self.count_blocks()
+        self.frame_drawn = False
+        return True
+
+    def set_terminal_mode(self, enabled: bool) -> None:
+        '''
+        Turns terminal mode on or off. The next frame printed in terminal
+        mode clears the screen and draws the whole view first.
+        '''
+        self.release_terminal()
+        self.terminal_mode = enabled
+        self.frame_drawn = False
+
+    def release_terminal(self) -> None:
+        '''
+        Lets the whole terminal scroll again after frames were drawn in
+        terminal mode (see render_board_changes).
+        '''
+        if self.terminal_mode and self.frame_drawn:
+            print(RESET_SCROLL_REGION, end='', flush=True)
+
+    def clear_view(self) -> None:
+        '''Makes print_board print the whole board again.'''
+        self.viewport = None
+        self.overview = None
+        self.block_counts = None
+        self.frame_drawn = False
+        # changes shown in a viewport or overview weren't tracked per row
+        self.rows = [None] * self.height
+
+    def overview_columns(self) -> int:
+        '''Returns the number of blocks across each row of the overview.'''
+        return math.ceil(self.width / self.overview[0])
+
+    def overview_rows(self) -> int:
+        '''Returns the number of blocks down each column of the overview.'''
+        return math.ceil(self.height / self.overview[1])
+
+    def count_blocks(self) -> None:
+        '''
+        Counts the cells of each kind in every block of the overview. This
+        goes over the whole board once; set_cell keeps the counts up to date
+        afterwards, so overviews are rendered without going over the board.
+        '''
+        block_width, block_height = self.overview
+        columns = self.overview_columns()
+        self.block_counts = [[0] * (columns * self.overview_rows()) for kind in OVERVIEW_GLYPHS]
+        for y, row in enumerate(self.board):
+            if row.count(' ') == self.width:
+                continue
+            for x, cell in enumerate(row):
+                kind = cell_kind(cell)
+                if kind is not None:
+                    self.block_counts[kind][(y // block_height) * columns + x // block_width] += 1
+
+    def block_glyph(self, block: int) -> str:
+        '''Returns the cell shown for a block of the overview.'''
+        counts = self.block_counts
+        best = None
+        for kind in (RECEIVER, EMITTER, MIRROR):
+            if counts[kind][block] > 0 and (best is None or counts[kind][block] > counts[best][block]):
+                best = kind
+        if best is None and counts[TRAIL][block] > 0:
+            best = TRAIL
+        return ' ' if best is None else OVERVIEW_GLYPHS[best]
+
+    def start_change_log(self) -> None:
+        '''Starts recording every changed cell of the board.'''
+        self.change_log = []
+
+    def take_change_log(self) -> list[tuple[int, int, str]]:
+        '''Returns the cells changed since the last call and clears the log.'''
+        changes = self.change_log
+        self.change_log = []
+        return changes
+
+    def stop_change_log(self) -> None:
+        '''Stops recording changed cells.'''
+        self.change_log = None
+
     def change_emitter_format(self, emitter: Emitter, has_emitted: bool) -> None:
-        dim = "\033[38;5;245m"
-        underline = "\033[4m"
-        end_code = "\033[0m"
-        emitter_symbol = emitter.get_symbol()
-        if not has_emitted:
-            emitter_symbol = underline + emitter_symbol + end_code
-            self.board[emitter.get_y()][emitter.get_x()] = emitter_symbol
-        elif has_emitted:
-            emitter_symbol = dim + emitter_symbol + end_code
-            self.board[emitter.get_y()][emitter.get_x()] = emitter_symbol
+        '''Shows emitter dimmed once it has emitted, else underlined.'''
+        style = DIM if has_emitted else UNDERLINE
+        self.set_cell(emitter.get_x(), emitter.get_y(), styled_glyph(style, emitter.get_symbol()[-1]))
 
     def change_receiver_format(self, receiver: Receiver, has_activated: bool) -> None:
-        dim = "\033[38;5;245m"
-        underline = "\033[4m"
-        end_code = "\033[0m"
-        receiver_symbol = receiver.get_symbol()
-        if has_activated:
-            receiver_symbol = underline + receiver_symbol + end_code
-            self.board[receiver.get_y()][receiver.get_x()] = receiver_symbol
-        elif not has_activated:
-            receiver_symbol = dim + receiver_symbol + end_code
-            self.board[receiver.get_y()][receiver.get_x()] = receiver_symbol
+        '''Shows receiver underlined once it is activated, else dimmed.'''
+        style = UNDERLINE if has_activated else DIM
+        self.set_cell(receiver.get_x(), receiver.get_y(), styled_glyph(style, receiver.get_symbol()[-1]))
 
     def add_component_to_board(self, component: Emitter | Receiver | Mirror) -> None:
         '''
@@ -128,7 +396,9 @@ class BoardDisplayer:
          [' ', ' ', ' ']
         ]      
         '''
-        self.board[component.get_y()][component.get_x()] = component.get_symbol()
+        # each cell is one character wide, so only the last character of
+        # multi-character symbols (e.g. emitter 'AB' or receiver 'R12') is shown
+        self.set_cell(component.get_x(), component.get_y(), component.get_symbol()[-1])
 
     def add_photon_to_board(self, photon: Photon, show_color: bool = False) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -141,37 +411,15 @@ class BoardDisplayer:
         ----------
         photon: the photon to add its symbol on the board
         '''
-        # Colour the photon:
-        if show_color:
-            try:
-                photon_frequency = photon.get_frequency()
-                color_code = ""
-                end_code = "\033[0m"
-                if photon_frequency > self.colour_frequency_ranges['violet'][1]:
-                    color_code = "\033[35m"
-                elif photon_frequency > self.colour_frequency_ranges['blue'][1]:
-                    color_code = "\033[34m"
-                elif photon_frequency > self.colour_frequency_ranges['cyan'][1]:
-                    color_code = "\033[36m"
-                elif photon_frequency > self.colour_frequency_ranges['green'][1]:
-                    color_code = "\033[32m"
-                elif photon_frequency > self.colour_frequency_ranges['yellow'][1]:
-                    color_code = "\033[33m"
-                elif photon_frequency > self.colour_frequency_ranges['orange'][1]:
-                    color_code = "\033[38;5;166m"
-                elif photon_frequency > self.colour_frequency_ranges['red'][1]:
-                    color_code = "\033[31m"
-                else:
-                    color_code = "\033[39m"  # NO Change
-                # add color
-                if self.board[photon.get_y()][photon.get_x()] == ' ':
-                    self.board[photon.get_y()][photon.get_x()] = color_code + photon.get_symbol() + end_code
-            except:
-                if self.board[photon.get_y()][photon.get_x()] == ' ':
-                    self.board[photon.get_y()][photon.get_x()] = photon.get_symbol()
+        x = photon.x
+        y = photon.y
+        if self.board[y][x] != ' ':
+            return
+        if show_color and self.photon_glyphs is not None:
+            # Colour the photon
+            self.set_cell(x, y, self.photon_glyphs[bisect_left(self.colour_bounds, photon.frequency)])
         else:  # NO color
-            if self.board[photon.get_y()][photon.get_x()] == ' ':
-                self.board[photon.get_y()][photon.get_x()] = photon.get_symbol()
+            self.set_cell(x, y, photon.symbol)
 
     def print_board(self) -> None:
         '''
@@ -222,17 +470,113 @@ class BoardDisplayer:
         |B......1|
         +--------+
         '''
+        if self.terminal_mode:
+            self.print_board_changes()
+            return
+        print(self.render_view())
+
+    def render_view(self) -> str:
+        '''
+        Returns the formatted overview, viewport or whole board (whichever
+        is set) with the border included.
+        '''
+        if self.overview is not None:
+            return self.render_overview()
+        if self.viewport is not None:
+            return self.render_viewport()
+        return self.render_board()
+
+    def render_viewport(self) -> str:
+        '''
+        Returns the window of the board in viewport with the border
+        included, going over the cells of the window only.
+        '''
+        self.dirty_cells.clear()
+        x, y, width, height = self.viewport
+        top = f"+{width*'-'}+"
+        rows = ['|' + ''.join(self.board[row][x:x + width]) + '|' for row in range(y, y + height)]
+        return top + '\n' + '\n'.join(rows) + '\n' + top
+
+    def render_overview(self) -> str:
+        '''
+        Returns the overview of the board with the border included, going
+        over the blocks only.
+        '''
+        self.dirty_cells.clear()
+        columns = self.overview_columns()
+        top = f"+{columns*'-'}+"
+        rows = ['|' + ''.join(self.block_glyph(row * columns + column) for column in range(columns)) + '|'
+                for row in range(self.overview_rows())]
+        return top + '\n' + '\n'.join(rows) + '\n' + top
+
+    def render_board(self) -> str:
+        '''
+        Returns the formatted board with the border included, as printed by
+        print_board. Only the rows containing a cell changed since the last
+        frame are joined again, the rest are reused from the previous frame,
+        so cells have to be changed through set_cell (or the add_* and
+        change_* methods which use it).
+        '''
+        for y in {y for x, y in self.dirty_cells}:
+            self.rows[y] = None
+        self.dirty_cells.clear()
+        rows = self.rows
+        for y in range(self.height):
+            if rows[y] is None:
+                rows[y] = '|' + ''.join(self.board[y]) + '|'
         top = f"+{self.width*'-'}+"
-        board_output = ""
-        board_output += top+"\n"
-        i = 0
-        while i < self.height:
-            j = 0
-            board_output += "|"
-            while j < self.width:
-                board_output += self.board[i][j]
-                j += 1
-            board_output += "|\n"
-            i += 1
-        board_output += top
-        print(board_output)
+        return top + '\n' + '\n'.join(rows) + '\n' + top
+
+    def render_board_changes(self) -> str:
+        '''
+        Returns the escape sequence which updates a board already drawn on a
+        terminal, writing only the cells changed since the last frame (only
+        the cells inside the viewport, if one is set; an overview is drawn
+        again whole).
+
+        The first frame clears the screen, draws the whole view at the top
+        and makes only the lines below it scroll, so whatever is printed
+        between frames scrolls under the board instead of moving it. Later
+        frames save the cursor, move it to each changed cell of the board
+        and then put it back, so the output printed so far is kept.
+
+        Returns
+        -------
+        The terminal output for the frame, or an empty string if no cell
+        changed since the last frame.
+        '''
+        if not self.frame_drawn:
+            self.frame_drawn = True
+            # the view takes its rows plus 2 lines of border
+            below = self.view_height() + 3
+            return CLEAR_SCREEN + self.render_view() + f"\n\033[{below}r\033[{below};1H"
+        if len(self.dirty_cells) == 0:
+            return ''
+        if self.overview is not None:
+            # the overview is as small as the terminal, so it is drawn again
+            return SAVE_CURSOR + "\033[H" + self.render_overview() + RESTORE_CURSOR
+        left, top, width, height = self.viewport or (0, 0, self.width, self.height)
+        # the board starts on line 2, column 2 of the terminal, inside the border
+        output = [f"\033[{y - top + 2};{x - left + 2}H{self.board[y][x]}" for x, y in self.dirty_cells
+                  if left <= x < left + width and top <= y < top + height]
+        for y in {y for x, y in self.dirty_cells}:
+            self.rows[y] = None
+        self.dirty_cells.clear()
+        return SAVE_CURSOR + ''.join(output) + RESTORE_CURSOR
+
+    def view_height(self) -> int:
+        '''Returns the number of rows of the view printed, without its border.'''
+        if self.overview is not None:
+            return self.overview_rows()
+        if self.viewport is not None:
+            return self.viewport[3]
+        return self.height
+
+    def print_board_changes(self) -> None:
+        '''
+        Writes the frame from render_board_changes to the terminal. Frames in
+        which nothing changed are skipped.
+        '''
+        frame = self.render_board_changes()
+        if frame:
+            print(frame, end='', flush=True)
@@ -0,0 +1,240 @@
+import sys
+import json
+import input_parser
+import snapshot
+from laser_circuit import LaserCircuit
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+circuit_file - Loads a whole circuit from a definition file instead of
+reading one component per prompt. The file is read in one buffered pass and
+every entry is validated with the same input_parser rules as the prompts.
+
+Two formats are supported. The line format has one entry per line, blank
+lines and lines starting with '#' are ignored:
+
+    SIZE 18 6
+    EMITTER A 2 2
+    EMITTER B 9 5
+    RECEIVER R0 15 2
+    MIRROR / 5 2
+    PULSE A 100 E
+    PULSE B 400 N EVERY 5 10
+
+The JSON format (detected by a leading '{') holds the same entries as lists:
+
+    {"size": [18, 6], "emitters": [["A", 2, 2]], "receivers": [["R0", 15, 2]],
+     "mirrors": [["/", 5, 2]], "pulses": [["A", 100, "E"]]}
+
+A PULSE entry may end with a schedule (EVERY <period> <shots> or AT <time>
+...) to make the emitter fire a pulse train. SIZE has to come before any
+component.
+
+Run as a program, it converts a circuit definition file into a binary
+snapshot (see snapshot), which loads without any parsing.
+
+Usage:
+    python home/circuit_file.py <circuit file> <snapshot file>
+'''
+
+SECTIONS = ['SIZE', 'EMITTER', 'RECEIVER', 'MIRROR', 'PULSE']
+JSON_SECTIONS = {'size': 'SIZE', 'emitters': 'EMITTER', 'receivers': 'RECEIVER',
+                 'mirrors': 'MIRROR', 'pulses': 'PULSE'}
+
+
+def is_json_entry(value: object) -> bool:
+    '''
+    Returns whether value can be a JSON entry, which is a list of strings
+    and numbers such as ["A", 2, 2].
+    '''
+    if not isinstance(value, list):
+        return False
+    for token in value:
+        if isinstance(token, bool) or not isinstance(token, (str, int, float)):
+            return False
+    return True
+
+
+def read_entries(text: str) -> list[tuple[int, str, str]] | None:
+    '''
+    Splits the contents of a circuit definition file into entries.
+
+    Parameters
+    ----------
+    text - the contents of the file, in the line or JSON format
+
+    Returns
+    -------
+    A list of (line number, section, arguments) tuples where arguments is
+    the rest of the entry as a string, e.g. (3, 'EMITTER', 'A 2 2'). JSON
+    entries are numbered in the order they appear. Returns None and prints
+    an error message if the file is malformed.
+    '''
+    entries = []
+    if text.lstrip().startswith('{'):
+        try:
+            document = json.loads(text)
+        except json.JSONDecodeError as error:
+            print(f"Error: invalid JSON circuit file ({error})")
+            return None
+        if not isinstance(document, dict):
+            print("Error: JSON circuit file must hold an object")
+            return None
+        number = 0
+        for key, section in JSON_SECTIONS.items():
+            values = document.get(key, [])
+            if not isinstance(values, list):
+                print(f"Error: JSON circuit file - '{key}' must be a list")
+                return None
+            if section == 'SIZE':
+                values = [values] if values else []
+            for value in values:
+                number += 1
+                if not is_json_entry(value):
+                    print(f"Error: JSON circuit file - entry {number} of '{key}' "
+                          "must be a list of strings and numbers")
+                    return None
+                entries.append((number, section, ' '.join(str(token) for token in value)))
+        return entries
+
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        tokens = line.split(maxsplit=1)
+        section = tokens[0].upper()
+        if section not in SECTIONS:
+            print(f"Error: line {number} - unknown entry '{tokens[0]}'")
+            return None
+        entries.append((number, section, tokens[1] if len(tokens) > 1 else ''))
+    return entries
+
+
+def build_circuit(entries: list[tuple[int, str, str]], colour_frequency_ranges: dict = None,
+                  headless: bool = False) -> tuple[LaserCircuit, int] | None:
+    '''
+    Creates a circuit from the entries of a circuit definition file. Invalid
+    entries are reported with their line number and skipped, just like an
+    invalid input at a prompt.
+
+    Parameters
+    ----------
+    entries                 - the entries returned by read_entries
+    colour_frequency_ranges - passed on to the LaserCircuit
+    headless                - passed on to the LaserCircuit
+
+    Returns
+    -------
+    A tuple containing the circuit and the number of pulse sequences set,
+    or None if the file has no valid SIZE entry before its components.
+    '''
+    circuit = None
+    pulses_set = 0
+    for number, section, arguments in entries:
+        if section == 'SIZE':
+            if circuit is not None:
+                print(f"Error: line {number} - size is already set")
+                continue
+            size = input_parser.parse_size(arguments)
+            if size is None:
+                print(f"Error: line {number} - invalid size")
+                return None
+            circuit = LaserCircuit(size[0], size[1], colour_frequency_ranges, headless)
+            continue
+        if circuit is None:
+            print(f"Error: line {number} - size must be set before any component")
+            return None
+
+        if section == 'EMITTER':
+            emitter = input_parser.parse_emitter(arguments)
+            if emitter is not None and circuit.add_emitter(emitter):
+                continue
+        elif section == 'RECEIVER':
+            receiver = input_parser.parse_receiver(arguments)
+            if receiver is not None and circuit.add_receiver(receiver):
+                continue
+        elif section == 'MIRROR':
+            mirror = input_parser.parse_mirror(arguments)
+            if mirror is not None and circuit.add_mirror(mirror):
+                continue
+        else:
+            pulse = input_parser.check_pulse_train(arguments)
+            if isinstance(pulse, str):
+                print(pulse)
+            else:
+                emitter = circuit.get_emitter(pulse[0])
+                if emitter is None:
+                    print(f"Error: emitter '{pulse[0]}' does not exist")
+                elif emitter.is_pulse_sequence_set():
+                    print(f"Error: emitter '{pulse[0]}' already its pulse sequence set")
+                else:
+                    emitter.set_pulse_sequence(pulse[1], pulse[2], pulse[3])
+                    pulses_set += 1
+                    continue
+        print(f"-- line {number} skipped: {section} {arguments}")
+    if circuit is None:
+        print("Error: circuit file does not set a size")
+        return None
+    return circuit, pulses_set
+
+
+def load_circuit_file(file_name: str, colour_frequency_ranges: dict = None,
+                      headless: bool = False) -> tuple[LaserCircuit, int] | None:
+    '''
+    Reads a circuit definition file and builds the circuit it describes.
+    The file may also be a binary snapshot saved by the snapshot module.
+
+    Parameters
+    ----------
+    file_name               - the path of the circuit definition file
+    colour_frequency_ranges - passed on to the LaserCircuit
+    headless                - passed on to the LaserCircuit
+
+    Returns
+    -------
+    A tuple containing the circuit and the number of pulse sequences set,
+    or None (after printing an error) if the file can't be loaded.
+    '''
+    if snapshot.is_snapshot(file_name):
+        # binary snapshots are loaded without parsing
+        circuit = snapshot.load_snapshot(file_name, colour_frequency_ranges, headless)
+        if circuit is None:
+            return None
+        pulses_set = len([emitter for emitter in circuit.get_emitters()
+                          if emitter.is_pulse_sequence_set()])
+        return circuit, pulses_set
+    try:
+        with open(file_name, 'r') as file:
+            text = file.read()
+    except OSError:
+        print(f"Error: circuit file {file_name} could not be read")
+        return None
+    entries = read_entries(text)
+    if entries is None:
+        return None
+    return build_circuit(entries, colour_frequency_ranges, headless)
+
+
+def main(args: list[str]) -> None:
+    '''
+    Converts a circuit definition file into a snapshot from the command line.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    if len(args) != 3:
+        print("Usage: python home/circuit_file.py <circuit file> <snapshot file>")
+        return
+    loaded = load_circuit_file(args[1], None, True)
+    if loaded is None:
+        return
+    if snapshot.save_snapshot(loaded[0], args[2]):
+        print(f"Snapshot saved to {args[2]}.")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
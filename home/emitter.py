@@ -7,7 +7,8 @@ Unikey: jher0112
 
 Emitter - A laser that emits a photon with a frequency and direction.
 The frequency and direction of the photon it emits is determined by the
-pulse  sequence.
+pulse  sequence. By default an emitter fires once at 0ns, but a pulse train
+can make it fire at any number of emission times.
 
 You are free to add more attributes and methods, as long as you aren't 
 modifying the existing scaffold.
@@ -16,6 +17,11 @@ modifying the existing scaffold.
 
 class Emitter:
 
+    # fixed attribute layout keeps each emitter small and attribute access fast
+    __slots__ = ('symbol', 'x', 'y', 'frequency', 'direction', 'pulse_sequence_set',
+                 'emission_times')
+    component_type: str = 'emitter'
+
     def __init__(self, symbol: str, x: int, y: int):
         '''
         Initialises an Emitter instance given a symbol, x and y value. 
@@ -23,7 +29,8 @@ class Emitter:
         default.
 
         component_type:     str  - represents the type of component ('emitter')
-        symbol:             str  - the symbol of this emitter ('A' to 'J')
+        symbol:             str  - the symbol of this emitter (one or more
+                                   letters, e.g. 'A' or 'AB')
         x:                  int  - x position of this emitter
         y:                  int  - y position of this emitter
         frequency:          int  - the frequency (THz) of the photon this emitter 
@@ -32,6 +39,8 @@ class Emitter:
                                    emits will travel ('N', 'E', 'S' or 'W')
         pulse_sequence_set: bool - whether or not this emitter has been set by
                                    the pulse sequence
+        emission_times:     range | tuple[int, ...] - the times (ns) this
+                                   emitter fires at, in ascending order
 
         Parameters
         ----------
@@ -39,13 +48,13 @@ class Emitter:
         x      - the x position to set this emitter to
         y      - the y position to set this emitter to
         '''
-        self.component_type: str = 'emitter'
         self.symbol: str = symbol
         self.x: int = x
         self.y: int = y
         self.frequency: int = 0
         self.direction: str = None
         self.pulse_sequence_set: bool = False
+        self.emission_times: range | tuple[int, ...] = range(1)
 
     def emit_photon(self) -> Photon:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -61,7 +70,8 @@ class Emitter:
                             self.get_frequency(), self.get_direction())
         return new_photon
 
-    def set_pulse_sequence(self, frequency: int, direction: str) -> None:
+    def set_pulse_sequence(self, frequency: int, direction: str,
+                           emission_times: range | tuple[int, ...] = None) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Sets the pulse sequence for this emitter, setting the frequency and
@@ -74,14 +84,29 @@ class Emitter:
 
         Parameters
         ----------
-        frequency - the new frequency to set for this emitter 
-        direction - the new direction to set for this emitter      
+        frequency      - the new frequency to set for this emitter 
+        direction      - the new direction to set for this emitter      
+        emission_times - the times (ns) to fire at in ascending order, as
+                         returned by input_parser.check_pulse_schedule;
+                         by default the emitter fires once at 0ns
         '''
         if frequency > 0:
             if direction == 'N' or direction == 'E' or direction == 'S' or direction == 'W':
                 self.direction = direction
                 self.frequency = frequency
                 self.pulse_sequence_set = True
+                if emission_times is not None and len(emission_times) > 0:
+                    self.emission_times = emission_times
+
+    def clear_pulse_sequence(self) -> None:
+        '''
+        Clears the pulse sequence of this emitter, so another one can be set
+        for the next run of the same circuit.
+        '''
+        self.frequency = 0
+        self.direction = None
+        self.pulse_sequence_set = False
+        self.emission_times = range(1)
 
     def is_pulse_sequence_set(self) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -98,6 +123,10 @@ class Emitter:
         '''Returns direction.'''
         return self.direction
 
+    def get_emission_times(self) -> range | tuple[int, ...]:
+        '''Returns the times (ns) this emitter fires at.'''
+        return self.emission_times
+
     def get_component_type(self) -> str:
         '''Returns component type.'''
         return self.component_type
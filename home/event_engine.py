@@ -0,0 +1,149 @@
+import heapq
+from bisect import bisect_left, bisect_right
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+event_engine - An event-driven ("ray jump") engine. Rather than moving each
+photon one cell per nanosecond, every photon jumps straight to the next
+receiver or mirror in its row or column (or to the edge of the board), and
+the clock is advanced by the distance travelled. Interactions are processed
+from a priority queue ordered by time, so the run time depends on the number
+of interactions instead of the size of the board.
+
+Emitters are skipped over, since a photon passing an emitter is unaffected.
+The engine is run through LaserCircuit.run_event_driven.
+'''
+
+
+class EventEngine:
+
+    def __init__(self, circuit):
+        '''
+        Initialises an EventEngine for the given circuit by building a sorted
+        index of the interacting components (receivers and mirrors) of every
+        row and every column.
+
+        circuit: LaserCircuit         - the circuit to simulate
+        rows:    dict[int, list[int]] - sorted x positions of the components
+                                        in each row y
+        columns: dict[int, list[int]] - sorted y positions of the components
+                                        in each column x
+
+        Parameters
+        ----------
+        circuit - the LaserCircuit to simulate
+        '''
+        self.circuit = circuit
+        self.rows: dict[int, list[int]] = {}
+        self.columns: dict[int, list[int]] = {}
+        for component in circuit.get_receivers() + circuit.get_mirrors():
+            x = component.get_x()
+            y = component.get_y()
+            # only index the component that wins the collision check
+            if circuit.get_grid_component(x, y) is component:
+                self.rows.setdefault(y, []).append(x)
+                self.columns.setdefault(x, []).append(y)
+        for positions in self.rows.values():
+            positions.sort()
+        for positions in self.columns.values():
+            positions.sort()
+
+    def next_stop(self, x: int, y: int, direction: str) -> tuple[int, int, int, bool]:
+        '''
+        Finds where a photon at (x, y) travelling in direction stops next.
+
+        Parameters
+        ----------
+        x, y      - the current position of the photon
+        direction - the direction the photon is travelling in
+
+        Returns
+        -------
+        A tuple (x, y, distance, left_board) with the position of the next
+        component, or of the edge cell the photon leaves the board from, the
+        number of nanoseconds it takes to get there and whether it leaves the
+        board.
+        '''
+        if direction == 'E':
+            row = self.rows.get(y, [])
+            i = bisect_right(row, x)
+            if i < len(row):
+                return row[i], y, row[i] - x, False
+            return self.circuit.get_width() - 1, y, self.circuit.get_width() - x, True
+        if direction == 'W':
+            row = self.rows.get(y, [])
+            i = bisect_left(row, x)
+            if i > 0:
+                return row[i - 1], y, x - row[i - 1], False
+            return 0, y, x + 1, True
+        if direction == 'S':
+            column = self.columns.get(x, [])
+            i = bisect_right(column, y)
+            if i < len(column):
+                return x, column[i], column[i] - y, False
+            return x, self.circuit.get_height() - 1, self.circuit.get_height() - y, True
+        column = self.columns.get(x, [])
+        i = bisect_left(column, y)
+        if i > 0:
+            return x, column[i - 1], y - column[i - 1], False
+        return x, 0, y + 1, True
+
+    def run(self) -> None:
+        '''
+        Advances every photon in the circuit that has not been absorbed until
+        all of them are absorbed or trapped, updating the circuit's clock,
+        its receivers and the Photon objects themselves.
+
+        Events happening at the same time are processed in the order of the
+        circuit's live photon worklist, which is the order tick visits them
+        in. Shots of pulse trains are fired from the circuit's emission
+        queue when they are due.
+        '''
+        circuit = self.circuit
+        photons = [photon for photon in circuit.live_photons
+                   if not photon.is_absorbed() and not photon.is_trapped()]
+        queue = []
+        for i, photon in enumerate(photons):
+            self.schedule(queue, i, photon, circuit.clock)
+
+        emissions = circuit.emission_queue
+        while len(queue) > 0 or len(emissions) > 0:
+            # tick fires shots after moving photons, so events at the same
+            # time come first
+            if len(emissions) > 0 and (len(queue) == 0 or emissions[0][0] < queue[0][0]):
+                circuit.clock = max(circuit.clock, emissions[0][0])
+                for photon in circuit.emit_due_photons():
+                    if photon.is_trapped():
+                        continue
+                    photons.append(photon)
+                    self.schedule(queue, len(photons) - 1, photon, circuit.clock)
+                continue
+            time, i, x, y, left_board = heapq.heappop(queue)
+            photon = photons[i]
+            photon.x = x
+            photon.y = y
+            circuit.clock = max(circuit.clock, time)
+            if left_board:
+                photon.got_absorbed()
+                continue
+            component = circuit.get_collided_component(photon)
+            photon.interact_with_component(component, time)
+            if not photon.is_absorbed():
+                self.schedule(queue, i, photon, time)
+
+    def schedule(self, queue: list, i: int, photon, time: int) -> None:
+        '''
+        Pushes the next interaction of the photon at index i onto queue.
+
+        Parameters
+        ----------
+        queue  - the priority queue of (time, index, x, y, left_board) events
+        i      - the index of the photon among the live photons
+        photon - the photon to schedule
+        time   - the time the photon is at its current position
+        '''
+        x, y, distance, left_board = self.next_stop(photon.get_x(), photon.get_y(), photon.get_direction())
+        heapq.heappush(queue, (time + distance, i, x, y, left_board))
@@ -16,10 +16,29 @@ should be using functions from this module to validate it.
 You are free to add more functions, as long as you aren't modifying the
 existing scaffold.
 '''
-emitter_constraint = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
 direction_constraint = ['N', 'E', 'S', 'W']
-receiver_constraint = ['R0', 'R1', 'R2',
-                       'R3', 'R4', 'R5', 'R6', 'R7', 'R8', 'R9']
+EMITTER_SYMBOL_ERROR = "Error: symbol must be one or more letters between 'A' - 'Z'"
+RECEIVER_SYMBOL_ERROR = "Error: symbol must be 'R' followed by a number e.g. 'R0'"
+
+
+def is_emitter_symbol(symbol: str) -> bool:
+    '''
+    Returns whether or not symbol is a valid emitter symbol, being one or
+    more uppercase letters ('A' to 'Z', then 'AA', 'AB', ... for larger
+    circuits).
+    '''
+    return symbol.isascii() and symbol.isalpha() and symbol.isupper()
+
+
+def is_receiver_symbol(symbol: str) -> bool:
+    '''
+    Returns whether or not symbol is a valid receiver symbol, being 'R'
+    followed by a number without leading zeros ('R0' to 'R9', then 'R10',
+    'R11', ... for larger circuits).
+    '''
+    number = symbol[1:]
+    return symbol[:1] == 'R' and number.isascii() and number.isdigit() \
+        and (number == '0' or number[0] != '0')
 
 
 def parse_size(user_input: str) -> tuple[int, int] | None:
@@ -93,7 +112,8 @@ def parse_emitter(user_input: str) -> Emitter | None:
       1)  user_input contains exactly 3 tokens. If there are 3 tokens, we 
           interpret the first token  as symbol, the second token as x and the 
           third token as y for the remaining checks.
-      2)  symbol is a character between 'A' to 'J'. 
+      2)  symbol is one or more letters between 'A' to 'Z' (see
+          is_emitter_symbol). 
       3)  x is an integer.
       4)  y is an integer.
       5)  x is greater than 0.
@@ -118,15 +138,9 @@ def parse_emitter(user_input: str) -> Emitter | None:
     emitter_symbol = emitter_list[0]
     emitter_x = emitter_list[1]
     emitter_y = emitter_list[2]
-    # Check 2: symbol is character between "A" and "J"
-    i = 0
-    in_list = False
-    while i < len(emitter_constraint):
-        if emitter_symbol == emitter_constraint[i]:
-            in_list = True
-        i += 1
-    if not in_list:
-        print("Error: symbol is not between 'A' - 'J'")
+    # Check 2: symbol is made of letters between "A" and "Z"
+    if not is_emitter_symbol(emitter_symbol):
+        print(EMITTER_SYMBOL_ERROR)
         return None
     # Check 3: X is an integer
     try:
@@ -156,7 +170,8 @@ def parse_receiver(user_input: str) -> Receiver | None:
     # only requires implementation once you reach GET-MY-INPUTS
     '''
     Identical to parse_emitter, with the only differences being
-    that the symbol must be between 'R0' to 'R9', and that a new Receiver
+    that the symbol must be 'R' followed by a number (see
+    is_receiver_symbol), and that a new Receiver
     instance is returned if all checks pass.
 
     Parameters
@@ -178,15 +193,9 @@ def parse_receiver(user_input: str) -> Receiver | None:
     receiver_symbol = receiver_list[0]
     receiver_x = receiver_list[1]
     receiver_y = receiver_list[2]
-    # Check 2: symbol is character between "R0" and "R1"
-    i = 0
-    in_list = False
-    while i < len(receiver_constraint):
-        if receiver_symbol == receiver_constraint[i]:
-            in_list = True
-        i += 1
-    if not in_list:
-        print("Error: symbol is not between 'R0' - 'R9'")
+    # Check 2: symbol is "R" followed by a number
+    if not is_receiver_symbol(receiver_symbol):
+        print(RECEIVER_SYMBOL_ERROR)
         return None
     # Check 3: X is an integer
     try:
@@ -221,7 +230,7 @@ def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
           If there are 3 tokens, we interpret the first token as symbol, the
           second token as frequency and the third token as direction for the
           remaining checks.
-      2)  symbol is a character between 'A' to 'J'.
+      2)  symbol is one or more letters between 'A' to 'Z'.
       3)  frequency is an integer.
       4)  frequency is greater than zero.
       5)  direction is either 'N', 'E', 'S' or 'W'.
@@ -238,50 +247,123 @@ def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
     Else, if at any point a check fails, prints an error message stating the cause
     of the error and returns None, skipping any further checks.    
     '''
+    result = check_pulse_sequence(line)
+    if isinstance(result, str):
+        print(result)
+        return None
+    return result
+
+
+def check_pulse_sequence(line: str) -> tuple[str, int, str] | str:
+    '''
+    Performs the same checks as parse_pulse_sequence without printing
+    anything, so callers can collect the errors of many lines.
+
+    Parameters
+    ----------
+    line -- a line from the pulse_sequence.in file
+
+    Returns
+    -------
+    If all checks pass, returns a tuple containing the specified symbol,
+    frequency and direction. Else, returns the error message of the first
+    check that failed.
+    '''
     tokens = line.split()
-    # Checks
     # check 1: 3 tokens
     if len(tokens) != 3:
-        print("Error: <symbol> <frequency> <direction>")
-        return
+        return "Error: <symbol> <frequency> <direction>"
     symbol = tokens[0]
     frequency = tokens[1]
     direction = tokens[2]
     # check 2: symbol character
-    sym_character = False
-    i = 0
-    while i < len(emitter_constraint):
-        if symbol == emitter_constraint[i]:
-            sym_character = True
-            break
-        i += 1
-    if not sym_character:
-        print("Error: symbol is not between 'A'-'J'")
-        return
+    if not is_emitter_symbol(symbol):
+        return EMITTER_SYMBOL_ERROR
     # check 3: frequency integer
     try:
         frequency = int(frequency)
     except ValueError:
-        print("Error: frequency is not an integer")
-        return
+        return "Error: frequency is not an integer"
     # check 4: frequency > 0
     if frequency <= 0:
-        print("Error: frequency must be greater than zero")
-        return
+        return "Error: frequency must be greater than zero"
     # check 5: direction in N E S W
-    dir_character = False
-    i = 0
-    while i < len(direction_constraint):
-        if direction == direction_constraint[i]:
-            dir_character = True
-            break
-        i += 1
-    if not dir_character:
-        print("Error: direction must be 'N', 'E', 'S' or 'W'")
-        return
+    if direction not in direction_constraint:
+        return "Error: direction must be 'N', 'E', 'S' or 'W'"
     return symbol, frequency, direction
 
 
+def check_pulse_schedule(tokens: list[str]) -> range | tuple[int, ...] | str:
+    '''
+    Checks the optional schedule at the end of a pulse sequence line, which
+    makes an emitter fire more than once. The schedule is either
+      EVERY <period> <shots> - fire <shots> times, every <period> ns from 0
+      AT <time> <time> ...   - fire at each of the given times (ns)
+
+    Parameters
+    ----------
+    tokens - the tokens of the line after the direction
+
+    Returns
+    -------
+    If the schedule is valid, returns the emission times in ascending order,
+    as a range for EVERY so long trains are never expanded. No tokens means
+    a single shot at 0ns. Else, returns the error message of the first check
+    that failed.
+    '''
+    if len(tokens) == 0:
+        return range(1)
+    keyword = tokens[0].upper()
+    if keyword == 'EVERY':
+        if len(tokens) != 3:
+            return "Error: EVERY <period> <shots>"
+        try:
+            period = int(tokens[1])
+            shots = int(tokens[2])
+        except ValueError:
+            return "Error: period and shots must be integers"
+        if period <= 0 or shots <= 0:
+            return "Error: period and shots must be greater than zero"
+        return range(0, period * shots, period)
+    if keyword == 'AT':
+        if len(tokens) == 1:
+            return "Error: AT <time> <time> ..."
+        try:
+            times = tuple(int(token) for token in tokens[1:])
+        except ValueError:
+            return "Error: emission times must be integers"
+        if times[0] < 0 or any(times[i] >= times[i + 1] for i in range(len(times) - 1)):
+            return "Error: emission times must be in ascending order, from 0ns"
+        return times
+    return "Error: schedule must be EVERY <period> <shots> or AT <time> <time> ..."
+
+
+def check_pulse_train(line: str) -> tuple[str, int, str, range | tuple[int, ...]] | str:
+    '''
+    Checks a pulse sequence line which may end with a schedule (see
+    check_pulse_schedule), e.g. 'A 100 E EVERY 5 10' or 'B 400 N AT 0 3 8'.
+    A line without a schedule is checked exactly like check_pulse_sequence.
+
+    Parameters
+    ----------
+    line -- a line from the pulse_sequence.in file
+
+    Returns
+    -------
+    If all checks pass, returns a tuple containing the specified symbol,
+    frequency, direction and emission times. Else, returns the error
+    message of the first check that failed.
+    '''
+    tokens = line.split()
+    result = check_pulse_sequence(' '.join(tokens[:3]))
+    if isinstance(result, str):
+        return result
+    emission_times = check_pulse_schedule(tokens[3:])
+    if isinstance(emission_times, str):
+        return emission_times
+    return result + (emission_times,)
+
+
 def parse_mirror(user_input: str) -> Mirror | None:
     # only requires implementation once you reach ADD-MY-MIRRORS
     '''
@@ -1,9 +1,21 @@
+import time
+import heapq
+import contextlib
 import sorter
+from bisect import insort
 from emitter import Emitter
 from receiver import Receiver
 from photon import Photon
 from mirror import Mirror
 from board_displayer import BoardDisplayer
+from tick_record import TickRecord
+from vector_engine import VectorEngine
+from event_engine import EventEngine
+from path_cache import PathCache
+from analytic_solver import AnalyticSolver
+from profiler import PhaseProfiler
+from results_export import ResultsExporter
+from trajectory import TrajectoryRecorder
 
 '''
 Name:   Javier Herrera Saavedra
@@ -20,16 +32,26 @@ You are free to add more attributes and methods, as long as you aren't
 modifying the existing scaffold.
 '''
 
+# lower value wins when two components share a cell
+COLLISION_PRIORITY = {'receiver': 0, 'emitter': 1, 'mirror': 2}
+# stands in for a phase timer when profiling is disabled
+NO_PHASE = contextlib.nullcontext()
+
 
 class LaserCircuit:
 
-    def __init__(self, width: int, height: int, colour_frequency_ranges: dict = None):
+    def __init__(self, width: int, height: int, colour_frequency_ranges: dict = None,
+                 headless: bool = False, profile: bool = False, terminal_mode: bool = False):
         '''         
         Initialise a LaserCircuit instance given a width and height. All 
         lists of components and photons are empty by default.
         board_displayer is initialised to a BoardDisplayer instance. clock is
         0 by default.
 
+        In headless mode there is no board_displayer (it is None): no board
+        is stored or printed and run_circuit only prints its reports, which
+        lets batch runs skip all the per-tick display work.
+
         emitters:        list[Emitter]  - all emitters in this circuit
         receivers:       list[Receiver] - all receivers in this circuit
         photons:         list[Photon]   - all photons in this circuit
@@ -40,11 +62,65 @@ class LaserCircuit:
                                           displaying the circuit board
         clock:           int            - a clock keeping track of how many 
                                           nanoseconds this circuit has run for
+        grid:            list           - flat occupancy grid of size
+                                          width * height, where the cell
+                                          (x, y) is stored at y * width + x
+                                          and holds the component in that
+                                          cell (or None)
+        emitter_symbols:  dict[str, Emitter]  - each emitter by its symbol
+        receiver_symbols: dict[str, Receiver] - each receiver by the symbol
+                                                returned by get_symbol
+        live_photons:    list[Photon]   - worklist of the photons which may
+                                          not be absorbed yet, compacted
+                                          every tick
+        live_photon_count:        int   - number of photons not absorbed
+        activated_receiver_count: int   - number of activated receivers
+        solver:          AnalyticSolver - memoised outcomes of photon
+                                          states over this circuit's
+                                          geometry, None until needed and
+                                          whenever the geometry changes
+        path_cache:      PathCache      - memoised photon paths over this
+                                          circuit's geometry
+        tick_absorbed:   list[Photon]   - photons absorbed during the current
+                                          tick, None unless streaming ticks
+        tick_activated:  list[Receiver] - receivers activated during the
+                                          current tick, None unless streaming
+        activation_order: list[Receiver] - activated receivers sorted by
+                                           activation time, then symbol
+                                           (see get_report_order)
+        energy_order:     list[Receiver] - activated receivers sorted by
+                                           total energy (descending), then
+                                           symbol, as of the last call to
+                                           get_energy_order
+                                           (see get_report_order)
+        energy_changed:   set[Receiver]  - receivers whose total energy
+                                           changed since energy_order was
+                                           last brought up to date
+        emission_queue:   list[tuple]    - heap holding the next shot of
+                                           every emitter with shots left, as
+                                           (time, emitter index, shot index)
+        profiler:         PhaseProfiler  - records the time spent in each
+                                           phase of a run, None unless
+                                           profiling
+        exporter:         ResultsExporter - writes the reports and results
+                                            into the output directory
+        trapped_photons:  list[tuple]    - (photon id, x, y, direction,
+                                           time) of every photon found
+                                           trapped in a loop of mirrors,
+                                           where and when it was found
+        trajectory:       TrajectoryRecorder - records every step of every
+                                               photon, None unless recording
 
         Parameters
         ----------
-        width  - the width to set this circuit board to
-        height - the width to set this circuit board to
+        width    - the width to set this circuit board to
+        height   - the width to set this circuit board to
+        colour_frequency_ranges - the colour of each frequency range, used
+                                  to colour photons in RGB mode
+        headless - whether to run without a board
+        profile  - whether to record the time spent in each phase of a run
+        terminal_mode - whether the board redraws only its changed cells in
+                        place (see BoardDisplayer), ignored when headless
         '''
         self.emitters: list[Emitter] = []
         self.receivers: list[Receiver] = []
@@ -53,64 +129,244 @@ class LaserCircuit:
         self.width: int = width
         self.height: int = height
         self.colour_frequency_ranges: dict = colour_frequency_ranges
-        self.board_displayer = BoardDisplayer(self.width, self.height, self.colour_frequency_ranges)
+        self.headless: bool = headless
+        self.board_displayer: BoardDisplayer = None
+        if not headless:
+            self.board_displayer = BoardDisplayer(self.width, self.height, self.colour_frequency_ranges,
+                                                  terminal_mode)
         self.clock: int = 0
-        self.colour_mode: bool = isinstance(colour_frequency_ranges, dict)
+        self.colour_mode: bool = isinstance(colour_frequency_ranges, dict) and not headless
+        self.grid: list[Emitter | Receiver | Mirror | None] = [None] * (width * height)
+        self.emitter_symbols: dict[str, Emitter] = {}
+        self.receiver_symbols: dict[str, Receiver] = {}
+        self.live_photons: list[Photon] = []
+        self.live_photon_count: int = 0
+        self.activated_receiver_count: int = 0
+        self.solver: AnalyticSolver = None
+        self.path_cache: PathCache = PathCache(self)
+        self.tick_absorbed: list[Photon] = None
+        self.tick_activated: list[Receiver] = None
+        self.activation_order: list[Receiver] = []
+        self.energy_order: list[Receiver] = []
+        self.energy_changed: set[Receiver] = set()
+        self.emission_queue: list[tuple[int, int, int]] = []
+        self.profiler: PhaseProfiler = PhaseProfiler() if profile else None
+        self.exporter: ResultsExporter = ResultsExporter()
+        self.trapped_photons: list[tuple[int, int, int, str, int]] = []
+        self.trajectory: TrajectoryRecorder = None
+
+    def is_within_bounds(self, x: int, y: int) -> bool:
+        '''Returns whether or not the position (x, y) is on the circuit board.'''
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_grid_component(self, x: int, y: int) -> Emitter | Receiver | Mirror | None:
+        '''
+        Returns the component stored in the occupancy grid at (x, y), or None
+        if the cell is empty or out-of-bounds.
+        '''
+        if not self.is_within_bounds(x, y):
+            return None
+        return self.grid[y * self.width + x]
+
+    def add_component_to_grid(self, component: Emitter | Receiver | Mirror) -> None:
+        '''
+        Stores component in the occupancy grid at its position. If the cell is
+        already taken, the component which wins a collision check is kept,
+        which is a receiver first, then an emitter, then a mirror (the same
+        order used by get_collided_component).
+
+        Parameters
+        ----------
+        component - the component to store in the occupancy grid
+        '''
+        index = component.get_y() * self.width + component.get_x()
+        current = self.grid[index]
+        if current is None or COLLISION_PRIORITY[component.get_component_type()] \
+                < COLLISION_PRIORITY[current.get_component_type()]:
+            self.grid[index] = component
+            self.path_cache.invalidate_cell(component.get_x(), component.get_y())
+            self.solver = None
+
+    def find_collided(self, entity: Emitter | Receiver | Photon | Mirror,
+                      component_type: str, components: list) -> Emitter | Receiver | Mirror | None:
+        '''
+        Looks up the component of the given component_type sharing entity's
+        position. The occupancy grid answers in O(1); only when the cell is
+        held by a component of another type (an emitter added on top of a
+        mirror or receiver) the list of components is scanned instead.
+
+        Parameters
+        ----------
+        entity         - an emitter, receiver, photon or mirror
+        component_type - 'emitter', 'receiver' or 'mirror'
+        components     - the circuit's list of components of that type
+
+        Returns
+        -------
+        The component of component_type at entity's position, else None.
+        '''
+        x = entity.get_x()
+        y = entity.get_y()
+        component = self.get_grid_component(x, y)
+        if component is None:
+            return None
+        if component.get_component_type() == component_type:
+            return component
+        for other in components:
+            if other.get_x() == x and other.get_y() == y:
+                return other
+        return None
 
     def emit_photons(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Gets each emitter in this circuit's list of emitters to emit a photon.
         The photons emitted should be added to this circuit's photons list.
+
+        The first shot of every emitter is scheduled in the emission queue
+        and the shots due now (at 0ns by default) are fired. Later shots of
+        a pulse train are fired by tick (or an engine) once they are due.
+        '''
+        self.emission_queue = [(emitter.get_emission_times()[0], i, 0)
+                               for i, emitter in enumerate(self.emitters)]
+        heapq.heapify(self.emission_queue)
+        self.emit_due_photons()
+
+    def emit_due_photons(self) -> list[Photon]:
+        '''
+        Fires every scheduled shot whose time is not after the clock, in
+        order of time and then of emitter, and schedules the next shot of
+        each emitter fired. Photons are only created here, once they are due.
+
+        Returns
+        -------
+        The photons emitted, which are also added to this circuit's photons.
         '''
-        i = 0
-        while i < len(self.get_emitters()):
+        queue = self.emission_queue
+        emitted = []
+        while len(queue) > 0 and queue[0][0] <= self.clock:
+            time, i, shot = queue[0]
+            emitter = self.emitters[i]
             if self.colour_mode:
-                self.board_displayer.change_emitter_format(self.get_emitters()[i], True)
-            new_photon = self.get_emitters()[i].emit_photon()
+                self.board_displayer.change_emitter_format(emitter, True)
+            new_photon = emitter.emit_photon()
             self.photons.append(new_photon)
-            i += 1
+            self.track_photon(new_photon)
+            emitted.append(new_photon)
+            emission_times = emitter.get_emission_times()
+            if shot + 1 < len(emission_times):
+                heapq.heapreplace(queue, (emission_times[shot + 1], i, shot + 1))
+            else:
+                heapq.heappop(queue)
+        return emitted
+
+    def track_photon(self, photon: Photon) -> None:
+        '''
+        Registers this circuit as the photon's observer and, if the photon is
+        not absorbed yet, adds it to the live photon worklist. A photon whose
+        path (looked up by the solver) goes round a loop of mirrors forever,
+        or which has no direction, is marked as trapped.
+
+        Parameters
+        ----------
+        photon - a photon which has just been added to this circuit
+        '''
+        photon.observer = self
+        # photons are added to photons before they are tracked
+        photon_id = len(self.photons) - 1
+        if self.trajectory is not None:
+            self.trajectory.add_photon(photon, photon_id, self.clock)
+        if not photon.is_absorbed():
+            self.live_photons.append(photon)
+            self.live_photon_count += 1
+            if self.get_solver().is_trapped(photon.x, photon.y, photon.direction_code):
+                photon.trapped = True
+                self.trapped_photons.append((photon_id, photon.x, photon.y,
+                                             photon.get_direction(), self.clock))
+
+    def photon_absorbed(self, photon: Photon) -> None:
+        '''Called by a tracked photon when it gets absorbed.'''
+        self.live_photon_count -= 1
+        if self.tick_absorbed is not None:
+            self.tick_absorbed.append(photon)
+
+    def receiver_activated(self, receiver: Receiver) -> None:
+        '''Called by a receiver of this circuit when it gets activated.'''
+        self.activated_receiver_count += 1
+        # receivers activate in time order, so this inserts near the end
+        insort(self.activation_order, receiver, key=sorter.activation_time_key)
+        if self.tick_activated is not None:
+            self.tick_activated.append(receiver)
+
+    def receiver_absorbed(self, receiver: Receiver) -> None:
+        '''Called by a receiver of this circuit whenever it absorbs a photon.'''
+        self.energy_changed.add(receiver)
+
+    def get_energy_order(self) -> list[Receiver]:
+        '''
+        Returns the activated receivers sorted by total energy in descending
+        order, then by symbol in ascending order. Only the receivers whose
+        energy changed since the last call are sorted again, and then merged
+        with the receivers which are still in order.
+        '''
+        if len(self.energy_changed) > 0:
+            unchanged = [receiver for receiver in self.energy_order
+                         if receiver not in self.energy_changed]
+            changed = sorted(self.energy_changed, key=sorter.total_energy_key)
+            self.energy_order = list(heapq.merge(unchanged, changed, key=sorter.total_energy_key))
+            self.energy_changed.clear()
+        return self.energy_order
+
+    def get_report_order(self, ordered: list[Receiver], value, sort) -> list[Receiver]:
+        '''
+        Returns the activated receivers in the order a report lists them.
+        Reports list tied receivers in the order sort gives them when sorting
+        every receiver, which is not by symbol (see sorter.exchange_order).
+        Without ties that is the order of ordered, which is returned as is,
+        else every receiver is sorted again.
+
+        Parameters
+        ----------
+        ordered - activation_order or the energy order
+        value   - the getter of the value ordered is sorted by
+        sort    - the sorter function which sorts receivers by that value
+        '''
+        for first, second in zip(ordered, ordered[1:]):
+            if value(first) == value(second):
+                return [receiver for receiver in sort(self.receivers) if receiver.is_activated()]
+        return ordered
+
+    def compact_live_photons(self) -> None:
+        '''Drops every absorbed photon from the live photon worklist.'''
+        if len(self.live_photons) != self.live_photon_count:
+            self.live_photons = [photon for photon in self.live_photons if not photon.is_absorbed()]
 
     def is_finished(self) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Returns whether or not this circuit has finished running. The
         circuit is finished running if every photon in the circuit has been
-        absorbed.
+        absorbed, apart from trapped photons which never will be, and no
+        shots of pulse trains are left to fire.
 
         Returns
         -------
         True if the circuit has finished running or not, else False.
         '''
-        photones_absorbed = 0
-        i = 0
-        while i < len(self.get_photons()):
-            if self.get_photons()[i].is_absorbed():
-                photones_absorbed += 1
-            i += 1
-        if len(self.get_photons()) == photones_absorbed:
-            return True
-        return False
+        return self.live_photon_count == len(self.trapped_photons) and len(self.emission_queue) == 0
 
     def print_emit_photons(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Prints the output for each emitter emitting a photon.
 
-        It will also need to write the output into a
-        /home/output/emit_photons.out output file. 
-
-        You can assume the /home/output/ path exists.
+        It will also write the output into emit_photons.out in the output
+        directory of exporter.
         '''
         out_head_emitting = f"{self.clock}ns: Emitting photons."
-        i = 0
-        with open('home/output/emit_photons.out', 'w') as file:
-            print(out_head_emitting)
-            while i < len(self.get_emitters()):
-                out_emitter = self.get_emitters()[i]
-                print(out_emitter)
-                file.write(str(out_emitter)+'\n')
-                i += 1
+        lines = [str(out_emitter) for out_emitter in self.get_emitters()]
+        print('\n'.join([out_head_emitting] + lines))
+        self.exporter.write_lines('emit_photons.out', lines)
 
     def print_activation_times(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -119,25 +375,17 @@ class LaserCircuit:
         by activation time in ascending order. Any receivers that have not
         been activated should not be included.
 
-        It will also need to write the output into a
-        /home/output/activation_times.out output file.
-
-        You can assume the /home/output/ path exists.
+        It will also write the output into activation_times.out in the
+        output directory of exporter.
         '''
         activation_head = "Activation times:"
-        # Sort by activation times
-        self.receivers = sorter.sort_receivers_by_activation_time(self.receivers)
-        with open('home/output/activation_times.out', 'w') as file:
-            print(activation_head)
-            i = 0
-            while i < len(self.get_receivers()):
-                out_receiver = self.get_receivers()[i]
-                receiver_time = f"R{out_receiver.get_symbol()}: {out_receiver.get_activation_time()}ns"
-                # Print when is activated
-                if out_receiver.is_activated():
-                    print(receiver_time)
-                    file.write(str(receiver_time)+'\n')
-                i += 1
+        # activation_order only holds activated receivers, already sorted
+        report_order = self.get_report_order(self.activation_order, Receiver.get_activation_time,
+                                             sorter.sort_receivers_by_activation_time)
+        lines = [f"R{out_receiver.get_symbol()}: {out_receiver.get_activation_time()}ns"
+                 for out_receiver in report_order]
+        print('\n'.join([activation_head] + lines))
+        self.exporter.write_lines('activation_times.out', lines)
 
     def print_total_energy(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -146,26 +394,34 @@ class LaserCircuit:
         sorted by total energy absorbed in descending order. Any receivers
         that have not been activated should not be included.
 
-        It will also need to write the output into a
-        /home/output/total_energy_absorbed.out output file.
-
-        You can assume the /home/output/ path exists.
+        It will also write the output into total_energy.out in the output
+        directory of exporter.
         '''
         out_head_received = f"Total energy absorbed:"
-        self.receivers = sorter.sort_receivers_by_total_energy(self.receivers)
-        with open('home/output/total_energy.out', 'w') as file:
-            print(out_head_received)
-            i = 0
-            while i < len(self.get_receivers()):
-                out_receiver = self.get_receivers()[i]
-                if out_receiver.is_activated():
-                    print(out_receiver)
-                    file.write(str(out_receiver)+'\n')
-                i += 1
+        report_order = self.get_report_order(self.get_energy_order(), Receiver.get_total_energy,
+                                             sorter.sort_receivers_by_total_energy)
+        lines = [str(out_receiver) for out_receiver in report_order]
+        print('\n'.join([out_head_received] + lines))
+        self.exporter.write_lines('total_energy.out', lines)
+
+    def print_trapped_photons(self) -> None:
+        '''
+        Prints the photons trapped in loops of mirrors, with where and when
+        each was found trapped, in the order they were emitted.
+
+        It will also write the output into trapped_photons.out in the output
+        directory of exporter.
+        '''
+        trapped_head = "Trapped photons:"
+        lines = [f"Photon {photon_id}: ({x}, {y}) {direction} at {time}ns"
+                 for photon_id, x, y, direction, time in self.trapped_photons]
+        print('\n'.join([trapped_head] + lines))
+        self.exporter.write_lines('trapped_photons.out', lines)
 
     def print_board(self) -> None:
-        '''Calls the print_board method in board_displayer.'''
-        self.board_displayer.print_board()
+        '''Calls the print_board method in board_displayer, unless headless.'''
+        if self.board_displayer is not None:
+            self.board_displayer.print_board()
 
     def get_collided_emitter(self, entity: Emitter | Receiver | Photon | Mirror) -> Emitter | None:
         '''
@@ -185,13 +441,7 @@ class LaserCircuit:
         -------
         An emitter if it has the same position as entity, else None.
         '''
-        if len(self.emitters) > 0:
-            i = 0
-            while i < len(self.emitters):
-                if self.emitters[i].get_x() == entity.get_x() and self.emitters[i].get_y() == entity.get_y():
-                    return self.emitters[i]
-                i += 1
-        return None
+        return self.find_collided(entity, 'emitter', self.emitters)
 
     def get_collided_receiver(self, entity: Emitter | Receiver | Photon | Mirror) -> Receiver | None:
         '''
@@ -211,13 +461,7 @@ class LaserCircuit:
         -------
         A receiver if it has the same position as entity, else None.
         '''
-        if len(self.receivers) > 0:
-            i = 0
-            while i < len(self.receivers):
-                if self.receivers[i].get_x() == entity.get_x() and self.receivers[i].get_y() == entity.get_y():
-                    return self.receivers[i]
-                i += 1
-        return None
+        return self.find_collided(entity, 'receiver', self.receivers)
 
     def get_collided_mirror(self, entity: Emitter | Receiver | Photon | Mirror) -> Mirror | None:
         # only requires implementation once you reach ADD-MY-MIRRORS
@@ -238,14 +482,7 @@ class LaserCircuit:
         -------
         A mirror if it has the same position as entity, else None.
         '''
-        # remove the line below once you start implementing this function
-        if len(self.mirrors) > 0:
-            i = 0
-            while i < len(self.mirrors):
-                if self.mirrors[i].get_x() == entity.get_x() and self.mirrors[i].get_y() == entity.get_y():
-                    return self.mirrors[i]
-                i += 1
-        return None
+        return self.find_collided(entity, 'mirror', self.mirrors)
 
     def get_collided_component(self, photon: Photon) -> Emitter | Receiver | Mirror | None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -268,13 +505,8 @@ class LaserCircuit:
         ----
         Use the three collision methods above to handle this.
         '''
-        if isinstance(self.get_collided_receiver(photon), Receiver):
-            return self.get_collided_receiver(photon)
-        if isinstance(self.get_collided_emitter(photon), Emitter):
-            return self.get_collided_emitter(photon)
-        if isinstance(self.get_collided_mirror(photon), Mirror):
-            return self.get_collided_mirror(photon)
-        return None
+        # the grid always keeps the component that wins the collision check
+        return self.get_grid_component(photon.get_x(), photon.get_y())
 
     def tick(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -286,28 +518,81 @@ class LaserCircuit:
         responsible for moving it, updating the board to show its new position
         and checking if it collided with a component (and handling it if did
         occur). At the end, we then increment clock.
+
+        When this circuit has a profiler, the time spent moving photons,
+        looking up collisions, interacting with components, updating the
+        board and emitting is added to it.
         '''
         # Check if is finished
         if self.is_finished():
             return
+        # each phase is timed into the profiler, when profiling
+        profiler = self.profiler
+        profiling = profiler is not None
+        clock = time.perf_counter
+        move_time = board_time = collision_time = interact_time = 0.0
+        interactions = 0
         self.clock += 1
-        # Run Through photons
-        i = 0
-        while i < len(self.photons):
-            # if not absorbed
-            if not self.photons[i].is_absorbed():
-                self.photons[i].move(self.get_width(), self.get_height())
-                self.board_displayer.add_photon_to_board(self.photons[i], self.colour_mode)
-                # check collision with component
-                component = self.get_collided_component(self.photons[i])
-                if component:
-                    self.photons[i].interact_with_component(component, self.clock)
-                    # add color
-                    if self.colour_mode and isinstance(component, Receiver) and component.is_activated():
-                        self.board_displayer.change_receiver_format(
-                            component, component.is_activated())
-            i += 1
-        #self.clock += 1
+        self.compact_live_photons()
+        board_displayer = self.board_displayer
+        # Run through the photons which are still live
+        for photon in self.live_photons:
+            if profiling:
+                start = clock()
+            photon.move(self.get_width(), self.get_height())
+            if profiling:
+                end = clock()
+                move_time += end - start
+                start = end
+            if board_displayer is not None:
+                board_displayer.add_photon_to_board(photon, self.colour_mode)
+                if profiling:
+                    end = clock()
+                    board_time += end - start
+                    start = end
+            # check collision with component
+            component = self.get_collided_component(photon)
+            if profiling:
+                end = clock()
+                collision_time += end - start
+                start = end
+            if component:
+                photon.interact_with_component(component, self.clock)
+                # add color
+                if self.colour_mode and isinstance(component, Receiver) and component.is_activated():
+                    self.board_displayer.change_receiver_format(
+                        component, component.is_activated())
+                if profiling:
+                    interact_time += clock() - start
+                    interactions += 1
+        if profiling:
+            moved = len(self.live_photons)
+            profiler.add('move', move_time, moved)
+            profiler.add('collision', collision_time, moved)
+            profiler.add('interact', interact_time, interactions)
+            if board_displayer is not None:
+                profiler.add('board', board_time, moved)
+        if self.trajectory is not None:
+            self.trajectory.record_tick(self.clock, self.live_photons)
+        # shots of pulse trains due now start moving on the next tick
+        if len(self.emission_queue) > 0:
+            with self.phase('emit'):
+                self.emit_due_photons()
+        if profiling:
+            profiler.record_tick(moved, self.live_photon_count)
+
+    def phase(self, name: str):
+        '''
+        Returns a context manager timing its with block as the phase name of
+        the profiler, or one doing nothing when this circuit isn't profiling.
+        '''
+        if self.profiler is None:
+            return NO_PHASE
+        return self.profiler.phase(name)
+
+    def set_profiler(self, profiler: PhaseProfiler) -> None:
+        '''Sets the profiler of this circuit, None to stop profiling.'''
+        self.profiler = profiler
 
 
     def run_circuit(self) -> None:
@@ -324,6 +609,8 @@ class LaserCircuit:
         footer_print = """========================
    CIRCUIT FINISHED!
 ========================"""
+        if self.profiler is not None:
+            self.profiler.reset()
         # Firstly
         print(head_print)
         print()
@@ -340,39 +627,260 @@ class LaserCircuit:
                 i += 1
 
         # Secondly
-        self.emit_photons()
-        self.print_emit_photons()
-        print()
+        with self.phase('emit'):
+            self.emit_photons()
+        with self.phase('report'):
+            self.print_emit_photons()
+            print()
 
         # Thirdly
         total_receivers = len(self.get_receivers())
-        activated_receivers = 0
-        while not self.is_finished():
-            self.tick()
-            if self.clock % 5 == 0:
-                i = 0
-                activated_receivers = 0
-                while i < total_receivers:
-                    if self.get_receivers()[i].is_activated():
-                        activated_receivers += 1
-                    i += 1
-                print(f"{self.clock}ns: {activated_receivers}/{total_receivers} receiver(s) activated.")
+        if self.headless and self.trajectory is None:
+            # nothing is shown per tick, so jump straight to the results
+            with self.phase('engine'):
+                self.run_analytic()
+        for record in self.iter_ticks():
+            if record.clock % 5 == 0 and not self.headless:
+                with self.phase('print'):
+                    print(f"{record.clock}ns: {record.activated_receiver_count}/{total_receivers} receiver(s) activated.")
+                    self.print_throughput()
+                    self.print_board()
+                    print()
+        # Print when finish
+        if self.clock % 5 != 0 and self.clock > 0 and not self.headless:
+            with self.phase('print'):
+                print(f"{self.clock}ns: {self.activated_receiver_count}/{total_receivers} receiver(s) activated.")
+                self.print_throughput()
                 self.print_board()
                 print()
-        # Print when finish
-        if self.clock % 5 != 0 and self.clock > 0:
-            print(f"{self.clock}ns: {activated_receivers}/{total_receivers} receiver(s) activated.")
-            self.print_board()
-            print()
 
-        # Forthly
-        self.print_activation_times()
-        print()
-        # Fifthly
-        self.print_total_energy()
-        print()
+        with self.phase('report'):
+            # Forthly
+            self.print_activation_times()
+            print()
+            # Fifthly
+            self.print_total_energy()
+            print()
+            if len(self.trapped_photons) > 0:
+                self.print_trapped_photons()
+                print()
+            self.exporter.export_results(self.get_emitters(), self.get_receivers())
         # Lastly
         print(footer_print)
+        if self.board_displayer is not None:
+            self.board_displayer.release_terminal()
+        if self.profiler is not None:
+            print()
+            self.profiler.print_summary()
+
+    def set_trajectory_recorder(self, trajectory: TrajectoryRecorder) -> None:
+        '''
+        Sets the recorder of the steps taken by the photons of this circuit,
+        None to stop recording. Photons already added are not recorded, but
+        the photons added later are still recorded under their position in
+        photons.
+        '''
+        self.trajectory = trajectory
+
+    def get_photon_path(self, photon_id: int) -> list[tuple[int, int, int, str]] | None:
+        '''
+        Returns the path of a photon recorded by the trajectory recorder.
+
+        Parameters
+        ----------
+        photon_id - the position of the photon in this circuit's photons
+
+        Returns
+        -------
+        The steps of the photon in order, as (tick, x, y, direction) tuples,
+        starting where and when it was emitted. Returns None (after printing
+        an error) if trajectories are not recorded, or the photon isn't.
+        '''
+        if self.trajectory is None:
+            print("Error: photon trajectories are not being recorded")
+            return None
+        path = self.trajectory.get_path(photon_id)
+        if path is None:
+            print(f"Error: no recorded photon with id {photon_id}")
+        return path
+
+    def set_arrival_logging(self, enabled: bool) -> None:
+        '''
+        Starts (with empty logs) or stops logging the time and frequency of
+        every photon absorbed by each receiver of this circuit.
+        '''
+        for receiver in self.receivers:
+            receiver.log_arrivals(enabled)
+
+    def set_exporter(self, exporter: ResultsExporter) -> None:
+        '''Sets the exporter writing the reports and results of this circuit.'''
+        self.exporter = exporter
+
+    def print_throughput(self) -> None:
+        '''
+        Prints the ticks per second since the last status and the number of
+        live photons, only when this circuit is profiling.
+        '''
+        if self.profiler is not None:
+            print(f"[profile] {self.profiler.take_throughput():.0f} ticks/s, "
+                  f"{self.live_photon_count} live photon(s)")
+
+    def iter_ticks(self, board_delta: bool = False):
+        '''
+        Runs tick until this circuit is finished, yielding a TickRecord after
+        every tick. Photons must already have been emitted. Nothing is
+        printed, so callers can stop early, sample or aggregate the stream.
+
+        Parameters
+        ----------
+        board_delta - whether each record should include the board cells
+                      changed during its tick (ignored when headless)
+
+        Yields
+        ------
+        A TickRecord for each tick.
+        '''
+        board_delta = board_delta and self.board_displayer is not None
+        if board_delta:
+            self.board_displayer.start_change_log()
+        try:
+            while not self.is_finished():
+                self.tick_absorbed = []
+                self.tick_activated = []
+                self.tick()
+                delta = self.board_displayer.take_change_log() if board_delta else None
+                yield TickRecord(self.clock, self.tick_absorbed, self.tick_activated,
+                                 self.live_photon_count, self.activated_receiver_count, delta)
+        finally:
+            self.tick_absorbed = None
+            self.tick_activated = None
+            if board_delta:
+                self.board_displayer.stop_change_log()
+
+    def run_engine(self, run) -> None:
+        '''
+        Runs every photon in this circuit until the circuit is finished with
+        one of the engines below instead of calling tick one photon at a
+        time. If no photons have been emitted yet, each emitter emits its
+        photon first.
+
+        Every engine gives the same clock, activation times, total energies
+        and final photon states as running tick until the circuit is
+        finished. Trapped photons would never stop, so the engines leave
+        them where they were found trapped, while tick keeps moving them
+        round their loop. The board is not updated and nothing is printed.
+
+        Parameters
+        ----------
+        run - runs the engine over this circuit
+        '''
+        if len(self.photons) == 0:
+            self.emit_photons()
+        run()
+        self.compact_live_photons()
+
+    def run_vectorised(self) -> None:
+        '''Runs this circuit with the NumPy VectorEngine, see run_engine.'''
+        self.run_engine(VectorEngine(self).run)
+
+    def run_event_driven(self) -> None:
+        '''
+        Runs this circuit with the EventEngine, which jumps each photon
+        straight to the next component in its path instead of moving it one
+        cell per tick, see run_engine.
+        '''
+        self.run_engine(EventEngine(self).run)
+
+    def get_solver(self) -> AnalyticSolver:
+        '''Returns the solver of this circuit's geometry, creating it if needed.'''
+        if self.solver is None:
+            self.solver = AnalyticSolver(self)
+        return self.solver
+
+    def run_analytic(self) -> None:
+        '''
+        Runs this circuit with the AnalyticSolver, which works out where
+        each photon's path ends instead of moving it, sharing the work
+        between paths which merge, see run_engine.
+        '''
+        self.run_engine(self.get_solver().run)
+
+    def run_with_path_cache(self) -> None:
+        '''
+        Runs this circuit by looking up the outcome of each photon's path in
+        the path cache instead of moving it, see run_engine.
+        '''
+        self.run_engine(self.apply_path_outcomes)
+
+    def apply_path_outcomes(self) -> None:
+        '''
+        Moves every photon to the end of its path as looked up in the path
+        cache. Outcomes are applied in the order tick would produce them.
+
+        Shots of pulse trains are fired from the emission queue when they
+        are due. Every shot of an emitter starts from the same state, so its
+        path is traced once and each later shot reuses the cached outcome,
+        shifted to the time it was fired.
+        '''
+        # events are (time, order, photon, outcome), where order is the
+        # position of the photon in the live photon worklist
+        events = []
+        order = 0
+        for photon in self.live_photons:
+            if not photon.is_absorbed() and not photon.is_trapped():
+                outcome = self.path_cache.lookup(photon.get_x(), photon.get_y(), photon.get_direction())
+                events.append((self.clock + outcome.travel_time, order, photon, outcome))
+                order += 1
+        heapq.heapify(events)
+        emissions = self.emission_queue
+        while len(events) > 0 or len(emissions) > 0:
+            # tick fires shots after moving photons, so arrivals at the same
+            # time come first
+            if len(emissions) > 0 and (len(events) == 0 or emissions[0][0] < events[0][0]):
+                self.clock = max(self.clock, emissions[0][0])
+                for photon in self.emit_due_photons():
+                    if photon.is_trapped():
+                        continue
+                    outcome = self.path_cache.lookup(photon.get_x(), photon.get_y(), photon.get_direction())
+                    heapq.heappush(events, (self.clock + outcome.travel_time, order, photon, outcome))
+                    order += 1
+                continue
+            time, _, photon, outcome = heapq.heappop(events)
+            photon.x = outcome.x
+            photon.y = outcome.y
+            photon.set_direction(outcome.direction)
+            if outcome.ending == 'receiver':
+                outcome.component.absorb_photon(photon, time)
+            else:
+                photon.got_absorbed()
+            self.clock = max(self.clock, time)
+
+    def reset_run(self) -> None:
+        '''
+        Resets everything a run changes so the same geometry can be run
+        again, e.g. with another pulse sequence: the clock, the photons, the
+        receivers, the photon trails on the board and any recorded
+        trajectories. Components, pulse sequences and the path cache are
+        kept.
+        '''
+        self.clock = 0
+        self.photons = []
+        self.live_photons = []
+        self.live_photon_count = 0
+        self.activated_receiver_count = 0
+        self.activation_order = []
+        self.energy_order = []
+        self.energy_changed = set()
+        self.emission_queue = []
+        self.trapped_photons = []
+        if self.trajectory is not None:
+            self.trajectory.reset()
+        for receiver in self.receivers:
+            receiver.reset()
+        if self.board_displayer is not None:
+            self.board_displayer.create_board()
+            for component in self.mirrors + self.emitters + self.receivers:
+                self.board_displayer.add_component_to_board(component)
 
     def add_emitter(self, emitter: Emitter) -> bool:
         '''
@@ -416,7 +924,7 @@ class LaserCircuit:
         if not isinstance(emitter, Emitter):
             return False
         # Check 1: emitter is within the bounds of the circuit
-        if not (0 <= emitter.get_x() < self.get_width()) and not (0 <= emitter.get_y() < self.get_height()):
+        if not self.is_within_bounds(emitter.get_x(), emitter.get_y()):
             print("Error: position ({}, {}) is out-of-bounds of {}x{} circuit board".format(emitter.get_x(), emitter.get_y(), self.get_width(), self.get_height()))
             return False
         # Check 2: emitter position is not already taken by other emitter
@@ -424,19 +932,17 @@ class LaserCircuit:
             print("Error: position ({}, {}) is already taken by emitter '{}'".format(emitter.get_x(), emitter.get_y(), self.get_collided_emitter(emitter).get_symbol()))
             return False
         # Check 3: emitter symbol is not already taken by another emitter
-        i = 0
-        while i < len(self.emitters):
-            if emitter.get_symbol() == self.emitters[i].get_symbol():
-                print("Error: symbol '{}' is already taken".format(emitter.get_symbol()))
-                return False
-            i += 1
+        if emitter.get_symbol() in self.emitter_symbols:
+            print("Error: symbol '{}' is already taken".format(emitter.get_symbol()))
+            return False
         # If all test pass
-        # Add emitter alphabetically
-        self.emitters.append(emitter)
-        # Sort
-        self.emitters = sorter.sort_emitters_by_symbol(self.emitters)
+        # Add emitter in order of symbol, keeping the list sorted
+        insort(self.emitters, emitter, key=sorter.symbol_key)
+        self.emitter_symbols[emitter.get_symbol()] = emitter
+        self.add_component_to_grid(emitter)
         # Add to board BoardDisplayer
-        self.board_displayer.add_component_to_board(emitter)
+        if self.board_displayer is not None:
+            self.board_displayer.add_component_to_board(emitter)
         # Return True
         return True
 
@@ -444,6 +950,10 @@ class LaserCircuit:
         '''Returns emitters.'''
         return self.emitters
 
+    def get_emitter(self, symbol: str) -> Emitter | None:
+        '''Returns the emitter with the given symbol, or None if there is none.'''
+        return self.emitter_symbols.get(symbol)
+
     def add_receiver(self, receiver: Receiver) -> bool:
         '''
         If receiver is not a Receiver instance, return False. Else, you need to
@@ -487,7 +997,7 @@ class LaserCircuit:
         if not isinstance(receiver, Receiver):
             return False
         # Check 1: receiver is within the bounds of the circuit
-        if not (0 <= receiver.get_x() < self.get_width()) and not(0 <= receiver.get_y() < self.get_height()):
+        if not self.is_within_bounds(receiver.get_x(), receiver.get_y()):
             print("Error: position ({}, {}) is out-of-bounds of {}x{} circuit board".format(receiver.get_x(), receiver.get_y(), self.get_width(), self.get_height()))
             return False
         # Check 2: receiver position is not already taken by other emitter
@@ -499,18 +1009,21 @@ class LaserCircuit:
             print("Error: position ({}, {}) is already taken by receiver '{}'".format(receiver.get_x(), receiver.get_y(), self.get_collided_receiver(receiver).get_symbol()))
             return False
         # Check 4: receiver symbol is not already taken by another receiver
-        i = 0
-        while i < len(self.receivers):
-            if receiver.get_symbol() == self.receivers[i].get_symbol():
-                print("Error: symbol '{}' is already taken".format(receiver.get_symbol()))
-                return False
-            i += 1
+        if receiver.get_symbol() in self.receiver_symbols:
+            print("Error: symbol '{}' is already taken".format(receiver.get_symbol()))
+            return False
         # If all test pass
-        # Add receiver alphabetically
-        self.receivers.append(receiver)
-        # Sort
-        self.receivers = sorter.sort_receivers_by_symbol(self.receivers)
-        self.board_displayer.add_component_to_board(receiver)
+        # Add receiver in order of symbol, keeping the list sorted
+        insort(self.receivers, receiver, key=sorter.symbol_key)
+        self.receiver_symbols[receiver.get_symbol()] = receiver
+        receiver.observer = self
+        if receiver.is_activated():
+            self.activated_receiver_count += 1
+            insort(self.activation_order, receiver, key=sorter.activation_time_key)
+            self.energy_changed.add(receiver)
+        self.add_component_to_grid(receiver)
+        if self.board_displayer is not None:
+            self.board_displayer.add_component_to_board(receiver)
         # Return True
         return True
 
@@ -518,6 +1031,13 @@ class LaserCircuit:
         '''Returns receivers.'''
         return self.receivers
 
+    def get_receiver(self, symbol: str) -> Receiver | None:
+        '''
+        Returns the receiver with the given symbol (e.g. 'R0'), or None if
+        there is none.
+        '''
+        return self.receiver_symbols.get(symbol[1:])
+
     def add_photon(self, photon: Photon) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
@@ -537,6 +1057,7 @@ class LaserCircuit:
             return False
         else:
             self.photons.append(photon)
+            self.track_photon(photon)
             return True
 
     def get_photons(self) -> list[Photon]:
@@ -574,7 +1095,7 @@ class LaserCircuit:
         '''
         if type(mirror) != Mirror:
             return False
-        if not ((mirror.get_x() >= 0 and mirror.get_x() < self.get_width()) and (mirror.get_y() >= 0 and mirror.get_y() < self.get_height())):
+        if not self.is_within_bounds(mirror.get_x(), mirror.get_y()):
             print("Error: position ({}, {}) is out-of-bounds of {}x{} circuit board".format(mirror.get_x(), mirror.get_y(), self.get_width(), self.get_height()))
             return False
         if not self.get_collided_emitter(mirror) == None:
@@ -588,7 +1109,9 @@ class LaserCircuit:
             return False
 
         self.mirrors.append(mirror)
-        self.board_displayer.add_component_to_board(mirror)
+        self.add_component_to_grid(mirror)
+        if self.board_displayer is not None:
+            self.board_displayer.add_component_to_board(mirror)
         return True
 
     def get_mirrors(self) -> list[Mirror]:
@@ -1,4 +1,4 @@
-from photon import Photon
+from photon import Photon, DIRECTION_CODES
 
 '''
 Name:   Javier Herrera Saavedra
@@ -13,9 +13,49 @@ You are free to add more attributes and methods, as long as you aren't
 modifying the existing scaffold.
 '''
 
+# mirrors are stored as small integer codes indexing these tables
+MIRROR_SYMBOLS = ('/', '\\', '>', '<', '^', 'v')
+MIRROR_CODES = {'/': 0, '\\': 1, '>': 2, '<': 3, '^': 4, 'v': 5}
+# marks a reflection in which the photon gets absorbed
+ABSORBED = -1
+
+
+def build_reflection_table() -> tuple[tuple[int, ...], ...]:
+    '''
+    Builds the reflection table of every mirror, indexed by
+    [mirror code][direction code], holding the direction code the photon
+    travels in after the reflection or ABSORBED.
+    '''
+    # new direction for a photon travelling 'N', 'E', 'S' and 'W'
+    reflections = {
+        '/':  ('E', 'N', 'W', 'S'),
+        '\\': ('W', 'S', 'E', 'N'),
+        '>':  ('E', 'E', 'E', None),
+        '<':  ('W', None, 'W', None),
+        '^':  (None, 'N', None, 'N'),
+        'v':  (None, 'S', None, 'S'),
+    }
+    table = []
+    for symbol in MIRROR_SYMBOLS:
+        row = []
+        for direction in reflections[symbol]:
+            if direction is None:
+                row.append(ABSORBED)
+            else:
+                row.append(DIRECTION_CODES[direction])
+        table.append(tuple(row))
+    return tuple(table)
+
+
+REFLECTION_TABLE = build_reflection_table()
+
 
 class Mirror:
 
+    # fixed attribute layout keeps each mirror small and attribute access fast
+    __slots__ = ('symbol', 'x', 'y', 'mirror_code')
+    component_type: str = 'mirror'
+
     def __init__(self, symbol: str, x: int, y: int):
         # only requires implementation once you reach ADD-MY-MIRRORS
         '''
@@ -26,6 +66,8 @@ class Mirror:
                               ('/', '\', '>', '<', '^' or 'v')
         x:              int - x position of this mirror
         y:              int - y position of this mirror
+        mirror_code:    int - the type of this mirror, as an index of
+                              MIRROR_SYMBOLS (None if symbol is invalid)
 
         Parameters
         ----------
@@ -33,10 +75,10 @@ class Mirror:
         x:      int - the x position to set this mirror to
         y:      int - the y position to set this mirror to
         '''
-        self.component_type: str = 'mirror'
         self.symbol: str = symbol
         self.x: int = x
         self.y: int = y
+        self.mirror_code: int = MIRROR_CODES.get(symbol)
 
     def reflect_photon(self, photon: Photon) -> None:
         # only requires implementation once you reach ADD-MY-MIRRORS
@@ -49,108 +91,21 @@ class Mirror:
         photon to be absorbed, the direction is not changed but the photon
         should be updated to get absorbed.
 
+        The new direction is looked up in REFLECTION_TABLE.
+
         Parameter
         ---------
         photon - the photon to reflect off this mirror
         '''
         # if photon absorbed return early
-        if photon.is_absorbed():
+        direction_code = photon.get_direction_code()
+        if photon.is_absorbed() or self.mirror_code is None or direction_code is None:
             return
-        # '/', '\', '>', '<', '^' or 'v'
-        if self.get_symbol() == '/':
-            if photon.get_direction() == 'N':
-                new_direction = 'E'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'E':
-                new_direction = 'N'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'S':
-                new_direction = 'W'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'W':
-                new_direction = 'S'
-                photon.set_direction(new_direction)
-                return
-        if self.get_symbol() == '\\':
-            if photon.get_direction() == 'N':
-                new_direction = 'W'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'E':
-                new_direction = 'S'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'S':
-                new_direction = 'E'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'W':
-                new_direction = 'N'
-                photon.set_direction(new_direction)
-                return
-        if self.get_symbol() == '>':
-            if photon.get_direction() == 'N':
-                new_direction = 'E'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'E':
-                photon.is_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'S':
-                new_direction = 'E'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'W':
-                photon.got_absorbed()  # Get absorbed
-                return
-        if self.get_symbol() == '<':
-            if photon.get_direction() == 'N':
-                new_direction = 'W'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'E':
-                photon.got_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'S':
-                new_direction = 'W'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'W':
-                photon.got_absorbed()  # Get absorbed
-                return
-        if self.get_symbol() == '^':
-            if photon.get_direction() == 'N':
-                photon.got_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'E':
-                new_direction = 'N'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'S':
-                photon.got_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'W':
-                new_direction = 'N'
-                photon.set_direction(new_direction)
-                return
-        if self.get_symbol() == 'v':
-            if photon.get_direction() == 'N':
-                photon.got_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'E':
-                new_direction = 'S'
-                photon.set_direction(new_direction)
-                return
-            if photon.get_direction() == 'S':
-                photon.got_absorbed()  # Get absorbed
-                return
-            if photon.get_direction() == 'W':
-                new_direction = 'S'
-                photon.set_direction(new_direction)
-                return
+        new_code = REFLECTION_TABLE[self.mirror_code][direction_code]
+        if new_code == ABSORBED:
+            photon.got_absorbed()
+        else:
+            photon.set_direction_code(new_code)
 
     def get_component_type(self) -> str:
         '''Returns component type.'''
@@ -0,0 +1,199 @@
+from photon import DIRECTIONS, DIRECTION_CODES, DX, DY
+from mirror import REFLECTION_TABLE, ABSORBED
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+path_cache - Memoises where photons end up. Photon motion is deterministic:
+once a photon is at a given cell travelling in a given direction, the rest of
+its path is fixed by the components on the board. A PathCache stores the
+outcome of every (x, y, direction) state it has been asked about, so it can be
+reused by every emitter and every run over the same geometry.
+
+Paths are cached as segments, each running from a state up to the next mirror
+that reflects the photon (or to where the photon gets absorbed). Paths that
+merge share the segments after the merge point. When a component is added to
+the board, only the segments and outcomes passing through its cell are
+dropped.
+'''
+
+
+class PathOutcome:
+
+    def __init__(self, component, x: int, y: int, direction: str,
+                 travel_time: int, cells: tuple[int, ...], ending: str):
+        '''
+        Initialises a PathOutcome, the end result of a photon's path.
+
+        component:   Receiver | Mirror | None - the component which absorbed
+                                                the photon, None if it left
+                                                the board
+        x, y:        int   - the final position of the photon
+        direction:   str   - the final direction of the photon
+        travel_time: int   - nanoseconds from the start state until the
+                             photon gets absorbed
+        cells:       tuple - grid indices (y * width + x) of every cell the
+                             photon moves into, in order
+        ending:      str   - 'receiver', 'mirror' or 'edge', or 'loop' if
+                             the photon is trapped in a loop of mirrors and
+                             never gets absorbed; the position and direction
+                             of a loop are those of the start state, and its
+                             travel_time is how long until the path repeats
+        '''
+        self.component = component
+        self.x: int = x
+        self.y: int = y
+        self.direction: str = direction
+        self.travel_time: int = travel_time
+        self.cells: tuple[int, ...] = cells
+        self.ending: str = ending
+
+
+class PathCache:
+
+    def __init__(self, circuit):
+        '''
+        Initialises an empty PathCache for the given circuit.
+
+        circuit:       LaserCircuit - the circuit whose geometry is cached
+        segments:      dict - state -> (cells, next state or None, outcome
+                              of the segment if it ends the path), where a
+                              state is (x, y, direction code)
+        outcomes:      dict - state -> PathOutcome for each looked up state
+        segment_cells: dict - cell -> states of the segments through it
+        outcome_cells: dict - cell -> states of the outcomes through it
+
+        Parameters
+        ----------
+        circuit - the LaserCircuit to cache paths for
+        '''
+        self.circuit = circuit
+        self.segments: dict = {}
+        self.outcomes: dict[tuple[int, int, int], PathOutcome] = {}
+        self.segment_cells: dict[int, set] = {}
+        self.outcome_cells: dict[int, set] = {}
+
+    def trace_segment(self, state: tuple[int, int, int]) -> tuple:
+        '''
+        Moves a photon from state one cell at a time until it is reflected
+        by a mirror or absorbed, and caches the segment it travelled.
+
+        Parameters
+        ----------
+        state - the (x, y, direction code) the segment starts from
+
+        Returns
+        -------
+        A tuple (cells, next_state, end) where next_state is the state after
+        a reflection (None if the path ends in this segment) and end is a
+        (component, x, y, direction, extra_time, ending) tuple when the path
+        ends, else None.
+        '''
+        circuit = self.circuit
+        width = circuit.get_width()
+        height = circuit.get_height()
+        grid = circuit.grid
+        x, y, d = state
+        cells = []
+        next_state = None
+        end = None
+        while True:
+            nx = x + DX[d]
+            ny = y + DY[d]
+            if not (0 <= nx < width and 0 <= ny < height):
+                # leaving the board takes one more tick
+                end = (None, x, y, DIRECTIONS[d], 1, 'edge')
+                break
+            x = nx
+            y = ny
+            cell = y * width + x
+            cells.append(cell)
+            component = grid[cell]
+            if component is None or component.get_component_type() == 'emitter':
+                continue
+            if component.get_component_type() == 'receiver':
+                end = (component, x, y, DIRECTIONS[d], 0, 'receiver')
+                break
+            if component.mirror_code is None:
+                continue
+            new_d = REFLECTION_TABLE[component.mirror_code][d]
+            if new_d == ABSORBED:
+                end = (component, x, y, DIRECTIONS[d], 0, 'mirror')
+                break
+            if new_d != d:
+                next_state = (x, y, new_d)
+                break
+
+        segment = (tuple(cells), next_state, end)
+        self.segments[state] = segment
+        for cell in cells:
+            self.segment_cells.setdefault(cell, set()).add(state)
+        return segment
+
+    def lookup(self, x: int, y: int, direction: str) -> PathOutcome:
+        '''
+        Returns the outcome of a photon at (x, y) travelling in direction,
+        tracing (and caching) any segments of its path not cached yet.
+
+        Parameters
+        ----------
+        x, y      - the position of the photon
+        direction - the direction the photon is travelling in
+
+        Returns
+        -------
+        The PathOutcome of the photon's path.
+        '''
+        start = (x, y, DIRECTION_CODES[direction])
+        if start in self.outcomes:
+            return self.outcomes[start]
+        cells = []
+        state = start
+        # segments start where the photon is reflected, so a photon reaching
+        # the start of a segment it already travelled goes round forever
+        visited = {start}
+        while True:
+            segment = self.segments.get(state)
+            if segment is None:
+                segment = self.trace_segment(state)
+            segment_cells, next_state, end = segment
+            cells.extend(segment_cells)
+            if next_state is None:
+                break
+            if next_state in visited:
+                end = (None, x, y, direction, 0, 'loop')
+                break
+            visited.add(next_state)
+            state = next_state
+
+        component, end_x, end_y, end_direction, extra_time, ending = end
+        outcome = PathOutcome(component, end_x, end_y, end_direction,
+                              len(cells) + extra_time, tuple(cells), ending)
+        self.outcomes[start] = outcome
+        for cell in outcome.cells:
+            self.outcome_cells.setdefault(cell, set()).add(start)
+        return outcome
+
+    def invalidate_cell(self, x: int, y: int) -> None:
+        '''
+        Drops every cached segment and outcome whose path passes through
+        (x, y). Called whenever the component in that cell changes.
+
+        Parameters
+        ----------
+        x, y - the position of the cell which changed
+        '''
+        cell = y * self.circuit.get_width() + x
+        for state in self.segment_cells.pop(cell, ()):
+            self.segments.pop(state, None)
+        for state in self.outcome_cells.pop(cell, ()):
+            self.outcomes.pop(state, None)
+
+    def clear(self) -> None:
+        '''Drops every cached segment and outcome.'''
+        self.segments.clear()
+        self.outcomes.clear()
+        self.segment_cells.clear()
+        self.outcome_cells.clear()
@@ -17,9 +17,20 @@ it can finish initialising itself. If you need to query the type of a component,
 use the component_type attribute that each component has defined instead.
 '''
 
+# directions are stored as small integer codes indexing these tables
+DIRECTIONS = ('N', 'E', 'S', 'W')
+DIRECTION_CODES = {'N': 0, 'E': 1, 'S': 2, 'W': 3}
+# movement (dx, dy) of one unit in each direction, indexed by direction code
+DX = (0, 1, 0, -1)
+DY = (-1, 0, 1, 0)
+
 
 class Photon:
 
+    # fixed attribute layout keeps each photon small and attribute access fast
+    __slots__ = ('x', 'y', 'frequency', 'direction_code', 'absorbed', 'trapped', 'observer')
+    symbol: str = '.'
+
     def __init__(self, x: int, y: int, frequency: int, direction: str):
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
@@ -27,13 +38,19 @@ class Photon:
         frequency and direction. symbol is '.' and absorbed is False by
         default.
 
-        symbol:    str  - the symbol of this photon ('.')
-        x:         int  - x position of this photon
-        y:         int  - x position of this photon
-        frequency: int  - the frequency (THz) of this photon
-        direction: str  - the direction in which this photon will travel 
-                          ('N', 'E', 'S' or 'W')
-        absorbed:  bool - whether or not this photon has been absorbed
+        symbol:         str    - the symbol of this photon ('.')
+        x:              int    - x position of this photon
+        y:              int    - x position of this photon
+        frequency:      int    - the frequency (THz) of this photon
+        direction_code: int    - the direction in which this photon will
+                                 travel, as an index of DIRECTIONS
+                                 (0 to 3 for 'N', 'E', 'S' or 'W')
+        absorbed:       bool   - whether or not this photon has been absorbed
+        trapped:        bool   - whether this photon is caught in a loop of
+                                 mirrors (or has no direction), so it will
+                                 never be absorbed
+        observer:       object - the circuit tracking this photon, notified
+                                 through photon_absorbed when it gets absorbed
 
         Parameters
         ----------
@@ -42,12 +59,13 @@ class Photon:
         frequency - the frequency to set this photon to
         direction - the direction to set this photon to
         '''
-        self.symbol: str = '.'
         self.x: int = x
         self.y: int = y
         self.frequency: int = frequency
-        self.direction: str = direction
+        self.direction_code: int = DIRECTION_CODES.get(direction)
         self.absorbed: bool = False
+        self.trapped: bool = False
+        self.observer: object = None
 
     def move(self, board_width: int, board_height: int) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -64,25 +82,17 @@ class Photon:
         board_width  - width of circuit board 
         board_height - height of circuit board
         '''
-        if not self.is_absorbed():
-            if self.get_direction() == 'N':
-                self.y -= 1
-            if self.get_direction() == 'E':
-                self.x += 1
-            if self.get_direction() == 'S':
-                self.y += 1
-            if self.get_direction() == 'W':
-                self.x -= 1
-        if not ((0 <= self.get_x() < board_width) and (0 <= self.get_y() < board_height)):
+        code = self.direction_code
+        if code is None:
+            # a photon without a direction never moves
+            return
+        if not self.absorbed:
+            self.x += DX[code]
+            self.y += DY[code]
+        if not (0 <= self.x < board_width and 0 <= self.y < board_height):
             self.got_absorbed()
-            if self.get_direction() == 'N':
-                self.y += 1
-            if self.get_direction() == 'E':
-                self.x -= 1
-            if self.get_direction() == 'S':
-                self.y -= 1
-            if self.get_direction() == 'W':
-                self.x += 1
+            self.x -= DX[code]
+            self.y -= DY[code]
 
     def interact_with_component(self, component: object, timestamp: int) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -118,26 +128,33 @@ class Photon:
             return
         if component is None:
             return
-        if component.get_component_type() == 'emitter':
-            return
-        if component.get_component_type() == 'receiver':
-            component.absorb_photon(self, timestamp)
-            return
-        if component.get_component_type() == 'mirror':
+        component_type = component.get_component_type()
+        if component_type == 'mirror':
             component.reflect_photon(self)
-            return
-        return
+        elif component_type == 'receiver':
+            component.absorb_photon(self, timestamp)
 
     def got_absorbed(self) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
-        '''Updates the absorbed attribute to represent an absorption.'''
+        '''
+        Updates the absorbed attribute to represent an absorption. The
+        observer (if any) is notified the first time this photon is absorbed.
+        '''
+        if self.absorbed:
+            return
         self.absorbed = True
+        if self.observer is not None:
+            self.observer.photon_absorbed(self)
 
     def is_absorbed(self) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''Returns absorbed.'''
         return self.absorbed
 
+    def is_trapped(self) -> bool:
+        '''Returns trapped.'''
+        return self.trapped
+
     def set_direction(self, direction: str) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
@@ -148,13 +165,24 @@ class Photon:
         ----------
         direction - the new direction to set for this photon
         '''
-        if direction == 'N' or direction == 'E' or direction == 'S' or direction == 'W':
-            self.direction = direction
+        code = DIRECTION_CODES.get(direction)
+        if code is not None:
+            self.direction_code = code
 
     def get_direction(self) -> str:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''Returns direction.'''
-        return self.direction
+        if self.direction_code is None:
+            return None
+        return DIRECTIONS[self.direction_code]
+
+    def set_direction_code(self, code: int) -> None:
+        '''Sets the direction of this photon from its code in DIRECTIONS.'''
+        self.direction_code = code
+
+    def get_direction_code(self) -> int:
+        '''Returns the direction of this photon as its code in DIRECTIONS.'''
+        return self.direction_code
 
     def get_frequency(self) -> int:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -0,0 +1,173 @@
+import json
+import time
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+PhaseProfiler - Records where the time of a run goes. The run is split into
+phases (moving photons, collision lookups, interactions, board updates,
+printing, ...) and the profiler keeps the cumulative time and number of
+calls of each phase, along with the number of ticks and live photons.
+
+A LaserCircuit only profiles when it has a profiler (profile=True, or the
+-PROFILE flag of run.py). tick times its phases in the same loop it always
+runs, guarded by a local flag, so profiling costs close to nothing when it
+is disabled.
+'''
+
+# phases in the order they are reported
+PHASES = ('emit', 'move', 'collision', 'interact', 'board', 'engine', 'print', 'report')
+
+
+class PhaseTimer:
+
+    __slots__ = ('profiler', 'phase', 'start')
+
+    def __init__(self, profiler, phase: str):
+        '''
+        Initialises a PhaseTimer, a context manager adding the time spent in
+        its with block to a phase of profiler.
+
+        profiler: PhaseProfiler - the profiler to add the time to
+        phase:    str           - the phase the time is spent in
+        start:    float         - when the with block was entered
+        '''
+        self.profiler = profiler
+        self.phase: str = phase
+        self.start: float = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.add(self.phase, time.perf_counter() - self.start)
+
+
+class PhaseProfiler:
+
+    def __init__(self):
+        '''
+        Initialises an empty PhaseProfiler.
+
+        totals:             dict[str, float] - seconds spent in each phase
+        calls:              dict[str, int]   - number of calls of each phase
+        ticks:              int   - number of ticks profiled
+        live_photons:       int   - live photons after the last tick
+        peak_live_photons:  int   - most live photons after any tick
+        photon_moves:       int   - photons moved over all ticks
+        started:            float - when the run started (perf_counter)
+        window_start:       float - when the current throughput window started
+        window_ticks:       int   - ticks since the window started
+        '''
+        self.totals: dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.calls: dict[str, int] = {phase: 0 for phase in PHASES}
+        self.ticks: int = 0
+        self.live_photons: int = 0
+        self.peak_live_photons: int = 0
+        self.photon_moves: int = 0
+        self.started: float = time.perf_counter()
+        self.window_start: float = self.started
+        self.window_ticks: int = 0
+
+    def reset(self) -> None:
+        '''Drops everything recorded so far and starts a new run.'''
+        self.__init__()
+
+    def add(self, phase: str, seconds: float, calls: int = 1) -> None:
+        '''
+        Adds time spent in a phase.
+
+        Parameters
+        ----------
+        phase   - the name of the phase
+        seconds - the time spent in it
+        calls   - how many calls the time covers
+        '''
+        self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+
+    def phase(self, phase: str) -> PhaseTimer:
+        '''Returns a context manager timing its with block as phase.'''
+        return PhaseTimer(self, phase)
+
+    def record_tick(self, moved: int, live_photons: int) -> None:
+        '''
+        Records a finished tick.
+
+        Parameters
+        ----------
+        moved        - the number of photons moved during the tick
+        live_photons - the number of photons not absorbed after the tick
+        '''
+        self.ticks += 1
+        self.window_ticks += 1
+        self.photon_moves += moved
+        self.live_photons = live_photons
+        if live_photons > self.peak_live_photons:
+            self.peak_live_photons = live_photons
+
+    def take_throughput(self) -> float:
+        '''
+        Returns the ticks per second since the last call (or since the run
+        started), then starts a new window.
+        '''
+        now = time.perf_counter()
+        elapsed = now - self.window_start
+        rate = self.window_ticks / elapsed if elapsed > 0 else 0.0
+        self.window_start = now
+        self.window_ticks = 0
+        return rate
+
+    def to_dict(self) -> dict:
+        '''Returns everything recorded as a dict which can be saved as JSON.'''
+        elapsed = time.perf_counter() - self.started
+        return {
+            'elapsed_seconds': elapsed,
+            'ticks': self.ticks,
+            'ticks_per_s': self.ticks / elapsed if elapsed > 0 else None,
+            'photon_moves': self.photon_moves,
+            'peak_live_photons': self.peak_live_photons,
+            'phases': {phase: {'seconds': self.totals[phase], 'calls': self.calls[phase]}
+                       for phase in self.totals if self.calls[phase] > 0},
+        }
+
+    def summary_lines(self) -> list[str]:
+        '''Returns the summary of the run as lines of text.'''
+        report = self.to_dict()
+        lines = ["Profile:",
+                 f"{'phase':<10}{'calls':>10}{'total (s)':>12}{'per call (us)':>15}{'share':>8}"]
+        total = sum(phase['seconds'] for phase in report['phases'].values())
+        for name, phase in report['phases'].items():
+            per_call = phase['seconds'] / phase['calls'] * 1e6
+            share = phase['seconds'] / total * 100 if total > 0 else 0.0
+            lines.append(f"{name:<10}{phase['calls']:>10}{phase['seconds']:>12.6f}"
+                         f"{per_call:>15.3f}{share:>7.1f}%")
+        rate = report['ticks_per_s'] or 0.0
+        lines.append(f"{report['ticks']} tick(s) in {report['elapsed_seconds']:.6f}s "
+                     f"({rate:.0f} ticks/s), {report['photon_moves']} photon move(s), "
+                     f"peak of {report['peak_live_photons']} live photon(s)")
+        return lines
+
+    def print_summary(self) -> None:
+        '''Prints the summary of the run.'''
+        for line in self.summary_lines():
+            print(line)
+
+    def export(self, file_name: str) -> bool:
+        '''
+        Saves everything recorded into file_name as JSON.
+
+        Returns
+        -------
+        True if the file was written, else False (after printing an error).
+        '''
+        try:
+            with open(file_name, 'w') as file:
+                json.dump(self.to_dict(), file, indent=2)
+        except OSError:
+            print(f"Error: profile {file_name} could not be written")
+            return False
+        return True
@@ -1,5 +1,12 @@
+import math
+from array import array
 from photon import Photon
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, convert_frequencies_to_energies works without it
+    np = None
+
 '''
 Name:   Javier Herrera Saavedra
 SID:    540159552
@@ -10,13 +17,47 @@ When a photon reaches a receiver, the receiver will absorb the photon and
 absorb its energy. Once a receiver absorbs a photon, the receiver becomes
 activated. An activated receiver can keep absorbing photons.
 
+Receivers add up the frequencies (THz) of the photons they absorb as an
+exact integer and only convert the sum to energy (eV) when it is asked for,
+so total energies don't depend on the order photons arrived in.
+
 You are free to add more attributes and methods, as long as you aren't
 modifying the existing scaffold.
 '''
 
+# constants converting a frequency (THz) to energy (eV)
+PLANCKS_CONSTANT = 6.62607015 * 10**-34
+THZ_TO_HZ = 10**12
+JOULES_TO_EV = 1.60217662*10**-19
+
+
+def convert_frequencies_to_energies(frequencies):
+    '''
+    Converts many frequencies (THz) to energies (eV) at once, with the same
+    formula as Receiver.convert_frequency_to_energy.
+
+    Parameters
+    ----------
+    frequencies - a NumPy array, or any sequence of frequencies
+
+    Returns
+    -------
+    A NumPy array of energies if NumPy is installed, else an array('d').
+    '''
+    if np is not None:
+        return PLANCKS_CONSTANT * np.asarray(frequencies, dtype=np.float64) * THZ_TO_HZ / JOULES_TO_EV
+    return array('d', [PLANCKS_CONSTANT * frequency * THZ_TO_HZ / JOULES_TO_EV
+                       for frequency in frequencies])
+
 
 class Receiver:
 
+    # fixed attribute layout keeps each receiver small and attribute access fast
+    __slots__ = ('symbol', 'x', 'y', 'frequency_sum', 'photons_absorbed',
+                 'activated', 'activation_time', 'observer', 'arrival_times',
+                 'arrival_frequencies')
+    component_type: str = 'receiver'
+
     def __init__(self, symbol: str, x: int, y: int):
         '''
         Initialises a Receiver instance with a given symbol, x and y value. 
@@ -24,15 +65,27 @@ class Receiver:
         activated is False and activation_time is 0 by default.
 
         component_type:   str   - represents the type of component ('receiver')
-        symbol:           str   - the symbol of this receiver ('R0' to 'R9')
+        symbol:           str   - the symbol of this receiver ('R' followed
+                                  by a number, e.g. 'R0' or 'R12')
         x:                int   - x position of this receiver 
         y:                int   - y position of this receiver
         total_energy:     float - the total energy (eV) this receiver has absorbed 
-                                  from photons
+                                  from photons, converted from frequency_sum
+                                  whenever it is read
+        frequency_sum:    int   - the sum of the frequencies (THz) of the
+                                  photons this receiver has absorbed
         photons_absorbed: int   - the number of photons this receiver has absorbed
         activated:        bool  - whether this receiver is activated or not       
         activation_time:  int   - the time (ns) in which this receiver was 
                                   activated
+        observer:         object - the circuit this receiver belongs to,
+                                   notified through receiver_activated when
+                                   this receiver gets activated and through
+                                   receiver_absorbed on every absorption
+        arrival_times:       array - the time (ns) of every absorption, None
+                                     unless arrivals are logged
+        arrival_frequencies: array - the frequency (THz) of every photon
+                                     absorbed, None unless arrivals are logged
 
         Parameters
         ----------
@@ -40,14 +93,21 @@ class Receiver:
         x      - the x position to set this receiver to
         y      - the y position to set this receiver to       
         '''
-        self.component_type: str = 'receiver'
         self.symbol: str = symbol
         self.x: int = x
         self.y: int = y
-        self.total_energy: float = 0.0
+        self.frequency_sum: int = 0
         self.photons_absorbed: int = 0
         self.activated: bool = False
         self.activation_time: int = 0
+        self.observer: object = None
+        self.arrival_times: array = None
+        self.arrival_frequencies: array = None
+
+    @property
+    def total_energy(self) -> float:
+        '''The total energy (eV) absorbed, converted from frequency_sum.'''
+        return self.convert_frequency_to_energy(self.frequency_sum)
 
     def convert_frequency_to_energy(self, frequency: int) -> float:  # self ADDED
         # this method has already been implemented for you
@@ -62,11 +122,7 @@ class Receiver:
         -------
         The energy calculated from the frequency.
         '''
-        # define our constants for the formulae
-        PLANCKS_CONSTANT = 6.62607015 * 10**-34
-        THZ_TO_HZ = 10**12
-        JOULES_TO_EV = 1.60217662*10**-19
-
+        # the constants for the formulae are defined once, in this module
         # calculate the joules then convert to electronvolts
         joules = PLANCKS_CONSTANT * frequency * THZ_TO_HZ
         electronvolts = joules / JOULES_TO_EV
@@ -92,13 +148,92 @@ class Receiver:
                     receiver
         '''
         if not photon.is_absorbed():
-            self.total_energy += self.convert_frequency_to_energy(photon.get_frequency())
+            self.frequency_sum += photon.frequency
+            if self.arrival_times is not None:
+                self.arrival_times.append(timestamp)
+                self.arrival_frequencies.append(photon.frequency)
             if self.photons_absorbed == 0:
                 self.activated = True
                 self.activation_time = timestamp
+                if self.observer is not None:
+                    self.observer.receiver_activated(self)
             self.photons_absorbed += 1
+            if self.observer is not None:
+                self.observer.receiver_absorbed(self)
             photon.got_absorbed()
 
+    def absorb_frequencies(self, frequencies: list[int], timestamp: int) -> None:
+        '''
+        Absorbs photons of the given frequencies (THz), which all collided
+        with this receiver at timestamp, as if absorb_photon was called on
+        each of them in order. The photons themselves are not updated, so
+        the caller has to mark them absorbed.
+
+        Parameters
+        ----------
+        frequencies - the frequency of each photon absorbed
+        timestamp   - the time in nanoseconds when the photons collided with
+                      this receiver
+        '''
+        if len(frequencies) == 0:
+            return
+        self.frequency_sum += sum(frequencies)
+        if self.arrival_times is not None:
+            self.arrival_times.extend([timestamp] * len(frequencies))
+            self.arrival_frequencies.extend(frequencies)
+        if self.photons_absorbed == 0:
+            self.activated = True
+            self.activation_time = timestamp
+            if self.observer is not None:
+                self.observer.receiver_activated(self)
+        self.photons_absorbed += len(frequencies)
+        if self.observer is not None:
+            self.observer.receiver_absorbed(self)
+
+    def reset(self) -> None:
+        '''
+        Resets this receiver to how it was before absorbing any photon. An
+        arrival log is emptied but kept on.
+        '''
+        self.frequency_sum = 0
+        self.photons_absorbed = 0
+        self.activated = False
+        self.activation_time = 0
+        if self.arrival_times is not None:
+            self.log_arrivals(True)
+
+    def log_arrivals(self, enabled: bool) -> None:
+        '''
+        Starts (with an empty log) or stops logging the time and frequency of
+        every photon this receiver absorbs.
+        '''
+        if enabled:
+            self.arrival_times = array('q')
+            self.arrival_frequencies = array('q')
+        else:
+            self.arrival_times = None
+            self.arrival_frequencies = None
+
+    def get_arrival_percentile(self, percent: float) -> int | None:
+        '''
+        Returns the time (ns) by which percent of the logged photons had been
+        absorbed (the nearest rank), or None if none are logged.
+        '''
+        if self.arrival_times is None or len(self.arrival_times) == 0:
+            return None
+        # arrivals are logged in time order
+        rank = min(max(1, math.ceil(len(self.arrival_times) * percent / 100)), len(self.arrival_times))
+        return self.arrival_times[rank - 1]
+
+    def get_arrival_throughput(self) -> float | None:
+        '''
+        Returns the photons absorbed per nanosecond between the first and the
+        last logged arrival (inclusive), or None if none are logged.
+        '''
+        if self.arrival_times is None or len(self.arrival_times) == 0:
+            return None
+        return len(self.arrival_times) / (self.arrival_times[-1] - self.arrival_times[0] + 1)
+
     def is_activated(self) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''Returns whether or not this receiver is activated. '''
@@ -126,8 +261,10 @@ class Receiver:
         'R0'
         >>> self.get_symbol()
         '0'
+        >>> Receiver('R12', 0, 0).get_symbol()
+        '12'
         '''
-        symbol_num = self.symbol[-1]
+        symbol_num = self.symbol[1:]
         return symbol_num
 
     def get_x(self) -> int:
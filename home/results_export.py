@@ -0,0 +1,152 @@
+import os
+import csv
+import json
+import struct
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+results_export - Writes the results of running a circuit into an output
+directory. Every file is written through one buffered writer instead of
+line by line, and the output directory can be anywhere (by default it is the
+output directory next to this module, whatever the working directory is).
+
+Besides the .out reports printed by run_circuit, the per-emitter and
+per-receiver results can be exported as:
+  csv   - emitters.csv and receivers.csv, with a header row
+  jsonl - emitters.jsonl and receivers.jsonl, one JSON object per line
+  npy   - emitters.npy and receivers.npy, NumPy structured arrays which can
+          be loaded with numpy.load (NumPy is not needed to write them)
+'''
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
+EXPORT_FORMATS = ('out', 'csv', 'jsonl', 'npy')
+BUFFER_SIZE = 1 << 16
+
+EMITTER_COLUMNS = ('symbol', 'x', 'y', 'frequency', 'direction', 'shots')
+RECEIVER_COLUMNS = ('symbol', 'x', 'y', 'activated', 'activation_time',
+                    'total_energy', 'photons_absorbed')
+
+# NumPy type and struct format of every non-symbol column in .npy files
+NPY_TYPES = {
+    'x': ('<i8', 'q'), 'y': ('<i8', 'q'), 'frequency': ('<i8', 'q'),
+    'direction': ('|S1', '1s'), 'shots': ('<i8', 'q'), 'activated': ('|b1', '?'),
+    'activation_time': ('<i8', 'q'), 'total_energy': ('<f8', 'd'),
+    'photons_absorbed': ('<i8', 'q'),
+}
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def emitter_rows(emitters: list) -> list[tuple]:
+    '''Returns one EMITTER_COLUMNS row for every emitter.'''
+    return [(emitter.get_symbol(), emitter.get_x(), emitter.get_y(), emitter.get_frequency(),
+             emitter.get_direction() or '', len(emitter.get_emission_times()))
+            for emitter in emitters]
+
+
+def receiver_rows(receivers: list) -> list[tuple]:
+    '''
+    Returns one RECEIVER_COLUMNS row for every receiver, with its full
+    symbol (e.g. 'R0').
+    '''
+    return [(receiver.symbol, receiver.get_x(), receiver.get_y(), receiver.is_activated(),
+             receiver.get_activation_time(), receiver.get_total_energy(), receiver.photons_absorbed)
+            for receiver in receivers]
+
+
+class ResultsExporter:
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR, formats: tuple[str, ...] = ('out',)):
+        '''
+        Initialises a ResultsExporter writing into output_dir.
+
+        output_dir: str        - the directory every file is written into
+        formats:    tuple[str] - the formats written, out of EXPORT_FORMATS;
+                                 'out' are the reports of run_circuit
+
+        Parameters
+        ----------
+        output_dir - the directory to write into, created when needed
+        formats    - the formats to write
+        '''
+        self.output_dir: str = output_dir
+        self.formats: tuple[str, ...] = tuple(formats)
+
+    def path(self, file_name: str) -> str:
+        '''
+        Returns the path of file_name in the output directory, creating the
+        directory if it doesn't exist yet.
+        '''
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, file_name)
+
+    def write_lines(self, file_name: str, lines: list[str]) -> None:
+        '''
+        Writes a .out report, one line per entry of lines, in a single
+        buffered write. Nothing is written unless the 'out' format is on.
+        '''
+        if 'out' not in self.formats:
+            return
+        with open(self.path(file_name), 'w', buffering=BUFFER_SIZE) as file:
+            file.write(''.join(line + '\n' for line in lines))
+
+    def export_results(self, emitters: list, receivers: list) -> None:
+        '''
+        Writes the per-emitter and per-receiver results in every format
+        turned on besides 'out'.
+
+        Parameters
+        ----------
+        emitters  - the emitters of the circuit
+        receivers - the receivers of the circuit
+        '''
+        tables = (('emitters', EMITTER_COLUMNS, emitter_rows(emitters)),
+                  ('receivers', RECEIVER_COLUMNS, receiver_rows(receivers)))
+        for name, columns, rows in tables:
+            if 'csv' in self.formats:
+                self.write_csv(f'{name}.csv', columns, rows)
+            if 'jsonl' in self.formats:
+                self.write_jsonl(f'{name}.jsonl', columns, rows)
+            if 'npy' in self.formats:
+                self.write_npy(f'{name}.npy', columns, rows)
+
+    def write_csv(self, file_name: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+        '''Writes rows as CSV, after a header row naming the columns.'''
+        with open(self.path(file_name), 'w', newline='', buffering=BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+    def write_jsonl(self, file_name: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+        '''Writes rows as JSON Lines, one object keyed by column per row.'''
+        with open(self.path(file_name), 'w', buffering=BUFFER_SIZE) as file:
+            file.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+    def write_npy(self, file_name: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+        '''
+        Writes rows as a version 1.0 .npy file holding a structured array of
+        len(rows) records, with one field per column. The first column (the
+        symbol) is stored as bytes, as wide as the longest symbol.
+        '''
+        symbol_width = max((len(row[0]) for row in rows), default=1) or 1
+        descr = [(columns[0], f'|S{symbol_width}')] + [(column, NPY_TYPES[column][0])
+                                                        for column in columns[1:]]
+        record = struct.Struct('<' + f'{symbol_width}s' + ''.join(NPY_TYPES[column][1]
+                                                                  for column in columns[1:]))
+        header = repr({'descr': descr, 'fortran_order': False, 'shape': (len(rows),)})
+        # the header is padded with spaces so the data starts on a 64 byte boundary
+        padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+        header = (header + ' ' * padding + '\n').encode('latin1')
+
+        data = bytearray(record.size * len(rows))
+        for i, row in enumerate(rows):
+            values = [row[0].encode('ascii')] + [value.encode('ascii') if isinstance(value, str)
+                                                 else value for value in row[1:]]
+            record.pack_into(data, i * record.size, *values)
+        with open(self.path(file_name), 'wb', buffering=BUFFER_SIZE) as file:
+            file.write(NPY_MAGIC)
+            file.write(struct.pack('<H', len(header)))
+            file.write(header)
+            file.write(data)
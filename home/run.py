@@ -1,9 +1,13 @@
+import os
 import sys
 import input_parser
+import circuit_file
 from emitter import Emitter
 from receiver import Receiver
 from mirror import Mirror
 from laser_circuit import LaserCircuit
+from profiler import PhaseProfiler
+from results_export import ResultsExporter, DEFAULT_OUTPUT_DIR, EXPORT_FORMATS
 
 '''
 Name:   Javier Herrera Saavedra
@@ -19,6 +23,10 @@ You are free to add more functions, as long as you aren't modifying the
 existing scaffold.
 '''
 
+# the input files are read from the input folder next to this module, so the
+# program can be run from any working directory
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'input')
+
 
 def is_run_my_circuit_enabled(args: list[str]) -> bool:
     # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -54,7 +62,189 @@ def is_add_my_mirrors_enabled(args: list[str]) -> bool:
     return False
 
 
-def initialise_circuit(colour_frequency_ranges: dict = None) -> LaserCircuit:
+def is_headless_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-HEADLESS' is in args. In headless mode no board
+    is kept or printed, only the results of running the circuit are.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args):
+        if "-HEADLESS" == args[i]:
+            return True
+        i += 1
+    return False
+
+
+def get_circuit_file_name(args: list[str]) -> str | None:
+    '''
+    Returns the file name following '-CIRCUIT-FILE' in args, or None if the
+    flag is not given (or has no file name after it).
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args) - 1:
+        if "-CIRCUIT-FILE" == args[i]:
+            return args[i + 1]
+        i += 1
+    return None
+
+
+def is_profile_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-PROFILE' is in args. When profiling, the time
+    spent in each phase of running the circuit is printed at the end.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args):
+        if "-PROFILE" == args[i]:
+            return True
+        i += 1
+    return False
+
+
+def get_profile_file_name(args: list[str]) -> str | None:
+    '''
+    Returns the file name following '-PROFILE-JSON' in args, which the
+    profile is also saved into as JSON, or None if the flag is not given.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args) - 1:
+        if "-PROFILE-JSON" == args[i]:
+            return args[i + 1]
+        i += 1
+    return None
+
+
+def get_output_dir(args: list[str]) -> str:
+    '''
+    Returns the directory following '-OUTPUT-DIR' in args, which the output
+    files are written into, or the default output directory if the flag is
+    not given.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args) - 1:
+        if "-OUTPUT-DIR" == args[i]:
+            return args[i + 1]
+        i += 1
+    return DEFAULT_OUTPUT_DIR
+
+
+def get_export_formats(args: list[str]) -> tuple[str, ...] | None:
+    '''
+    Returns the formats written into the output directory. The .out reports
+    are always written; '-EXPORT' followed by a comma separated list (e.g.
+    csv,jsonl,npy) adds more.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+
+    Returns
+    -------
+    The formats, or None (after printing an error) if a format is unknown.
+    '''
+    formats = ['out']
+    i = 0
+    while i < len(args) - 1:
+        if "-EXPORT" == args[i]:
+            for export_format in args[i + 1].lower().split(','):
+                if export_format not in EXPORT_FORMATS:
+                    print(f"Error: unknown export format '{export_format}'")
+                    return None
+                if export_format not in formats:
+                    formats.append(export_format)
+        i += 1
+    return tuple(formats)
+
+
+def is_terminal_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-TERMINAL' is in args. In terminal mode each
+    board printed after the first only redraws the cells which changed, in
+    place, using cursor escape codes.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i = 0
+    while i < len(args):
+        if "-TERMINAL" == args[i]:
+            return True
+        i += 1
+    return False
+
+
+def get_flag_numbers(args: list[str], flag: str, count: int) -> tuple[int, ...] | None:
+    '''
+    Returns the count comma separated non-negative integers following flag
+    in args (e.g. '-VIEWPORT 0,0,80,20'), or None if the flag is not given.
+    If they are malformed, an error is printed and None is returned.
+
+    Parameters
+    ----------
+    args  - the command line arguments of the program
+    flag  - the flag the numbers follow
+    count - how many numbers the flag takes
+    '''
+    i = 0
+    while i < len(args) - 1:
+        if flag == args[i]:
+            numbers = args[i + 1].split(',')
+            if len(numbers) != count or not all(number.isdigit() for number in numbers):
+                print(f"Error: {flag} must be followed by {count} comma separated integers")
+                return None
+            return tuple(int(number) for number in numbers)
+        i += 1
+    return None
+
+
+def set_board_view(circuit: LaserCircuit, args: list[str]) -> None:
+    '''
+    Sets the part of the board printed from the command line: '-VIEWPORT
+    <x>,<y>,<width>,<height>' prints only that window of the board, and
+    '-OVERVIEW <columns>,<rows>' prints the whole board downsampled to at
+    most that size. The board is printed whole if neither is given, and
+    main rejects both being given. '-TERMINAL' redraws the board in place
+    (see is_terminal_enabled).
+
+    Parameters
+    ----------
+    circuit - the circuit whose board is printed
+    args    - the command line arguments of the program
+    '''
+    if circuit.board_displayer is None:
+        return
+    overview = get_flag_numbers(args, "-OVERVIEW", 2)
+    viewport = get_flag_numbers(args, "-VIEWPORT", 4)
+    if overview is not None:
+        circuit.board_displayer.set_overview(*overview)
+    elif viewport is not None:
+        circuit.board_displayer.set_viewport(*viewport)
+    if is_terminal_enabled(args):
+        circuit.board_displayer.set_terminal_mode(True)
+
+
+def initialise_circuit(colour_frequency_ranges: dict = None, headless: bool = False) -> LaserCircuit:
     # only requires implementation once you reach GET-MY-INPUTS
     '''
     Gets the inputs for the board size, emitters and receivers and processes
@@ -77,17 +267,13 @@ def initialise_circuit(colour_frequency_ranges: dict = None) -> LaserCircuit:
         if isinstance(board_call, tuple):
             break
     new_circuit = LaserCircuit(
-        board_call[0], board_call[1], colour_frequency_ranges)
+        board_call[0], board_call[1], colour_frequency_ranges, headless)
     print(f"{board_call[0]}x{board_call[1]} board created.\n")
 
-    # 2 Get emitters MAX 10 or END EMITTERS
+    # 2 Get emitters until END EMITTERS
     print("Adding emitter(s)...")
 
-    max_times = 10
     while True:
-        # Check MAX 10
-        if len(new_circuit.get_emitters()) == max_times:
-            break
         emitter_user = input("> ")
         # Check END EMITTERS
         if emitter_user == "END EMITTERS":
@@ -99,14 +285,10 @@ def initialise_circuit(colour_frequency_ranges: dict = None) -> LaserCircuit:
 
     print(f"{len(new_circuit.get_emitters())} emitter(s) added.\n")
 
-    # 3 Get receivers MAX 10 or END RECEIVERS
+    # 3 Get receivers until END RECEIVERS
     print("Adding receiver(s)...")
 
-    max_times = 10
     while True:
-        # Check MAX 10
-        if len(new_circuit.get_receivers()) == max_times:
-            break
         receiver_user = input("> ")
         # Check END RECEIVERS
         if receiver_user == "END RECEIVERS":
@@ -129,66 +311,64 @@ def set_pulse_sequence(circuit: LaserCircuit, file_obj) -> None:
     You should be using the functions you have implemented in the input_parser module 
     to handle validating lines from the file.
 
+    The file is loaded by load_pulse_sequence, then every error found is
+    reported once, followed by the emitters left without a pulse sequence.
+
     Parameter
     ---------
     circuit - The circuit to set the pulse sequence for.
     file_obj - A file like object returned by the open()
     '''
     print("Setting pulse sequence...")
+    diagnostics = load_pulse_sequence(circuit, file_obj)
+    for diagnostic in diagnostics:
+        print(diagnostic)
 
-    # Emitters not set
-    def emitters_not_set():
-        print_tuple = "-- ("
-        i = 0
-        while i < len(circuit.emitters):
-            if not circuit.emitters[i].is_pulse_sequence_set():
-                print_tuple += circuit.emitters[i].get_symbol()
-                if circuit.emitters[i] != circuit.emitters[-1]:
-                    print_tuple += ', '
-            i += 1
-        print_tuple += ')'
-        return print_tuple
-
-    lines = file_obj.readlines()
-    i = 0
-    while i < len(lines):
-        # list emitters not sequence set
-        print(emitters_not_set())
-        print(f"Line {i + 1}: {lines[i]}", end='')
-        tuple_sequence = input_parser.parse_pulse_sequence(lines[i])  # tuple|None
-        if isinstance(tuple_sequence, tuple):
-            # NEED to check if the emitter exists in circuit
-            exist_in_circuit = False
-            k = 0
-            while k < len(circuit.emitters):
-                if tuple_sequence[0] == circuit.emitters[k].get_symbol():
-                    exist_in_circuit = True
-                    break
-                k += 1
-            if not exist_in_circuit:
-                print(f"Error: emitter '{tuple_sequence[0]}' does not exist")
-                i += 1
-                continue
-
-            # NEED to check if already set
-            set_already = False
-            j = 0
-            while j < len(circuit.emitters):
-                if tuple_sequence[0] == circuit.emitters[j].get_symbol():
-                    if circuit.emitters[j].is_pulse_sequence_set():
-                        print(f"Error: emitter '{tuple_sequence[0]}' already its pulse sequence set")
-                        set_already = True
-                        break
-                    else:  # SET pulse
-                        circuit.emitters[j].set_pulse_sequence(tuple_sequence[1], tuple_sequence[2])
-                j += 1
-            if set_already:
-                i += 1
-                continue
-        i += 1  # this is when the input is correct
+    not_set = get_emitters_not_set(circuit)
+    if len(not_set) > 0:
+        print(f"-- ({', '.join(not_set)})")
     print("\nPulse sequence set.\n")
 
 
+def get_emitters_not_set(circuit: LaserCircuit) -> list[str]:
+    '''Returns the symbols of the emitters of circuit without a pulse sequence.'''
+    return [emitter.get_symbol() for emitter in circuit.get_emitters()
+            if not emitter.is_pulse_sequence_set()]
+
+
+def load_pulse_sequence(circuit: LaserCircuit, file_obj) -> list[str]:
+    '''
+    Sets the pulse sequence of the circuit's emitters from file_obj, reading
+    it one line at a time. Emitters are looked up by symbol in the circuit,
+    so loading takes linear time in the number of lines.
+
+    Parameters
+    ----------
+    circuit  - the circuit to set the pulse sequence for
+    file_obj - an iterable of lines, such as a file object returned by open()
+
+    Returns
+    -------
+    A list of diagnostics, one for each line that could not be used, in the
+    format 'Line <number>: <error message>'.
+    '''
+    diagnostics = []
+    for number, line in enumerate(file_obj, 1):
+        result = input_parser.check_pulse_train(line)
+        if isinstance(result, str):
+            diagnostics.append(f"Line {number}: {result}")
+            continue
+        symbol, frequency, direction, emission_times = result
+        emitter = circuit.get_emitter(symbol)
+        if emitter is None:
+            diagnostics.append(f"Line {number}: Error: emitter '{symbol}' does not exist")
+        elif emitter.is_pulse_sequence_set():
+            diagnostics.append(f"Line {number}: Error: emitter '{symbol}' already its pulse sequence set")
+        else:
+            emitter.set_pulse_sequence(frequency, direction, emission_times)
+    return diagnostics
+
+
 def add_mirrors(circuit: LaserCircuit) -> None:
     # only requires implementation once you reach ADD-MY-MIRRORS
     '''
@@ -223,7 +403,7 @@ def is_rgb_my_circuit_enabled(args: list[str]) -> bool:
 def load_colour_frequency_ranges() -> dict[str, tuple[int, int]] | None:
     file_name = 'home/input/visible_light_spectrum.in'
     try:
-        with open(file_name, 'r') as file:
+        with open(os.path.join(INPUT_DIR, 'visible_light_spectrum.in'), 'r') as file:
             colour_order = ['violet', 'blue', 'cyan', 'green', 'yellow', 'orange', 'red']
             dict_colours = {}
             # Check 1 #Check line by line
@@ -298,25 +478,59 @@ def main(args: list[str]) -> None:
             # Program ends
             exit(0)
 
-    circuit = initialise_circuit(dict_colors)
-
-    if is_add_my_mirrors_enabled(args):
-        print("<ADD-MY-MIRRORS FLAG DETECTED!>\n")
-        add_mirrors(circuit)
+    headless = is_headless_enabled(args)
+    export_formats = get_export_formats(args)
+    if export_formats is None:
+        return
+    if "-VIEWPORT" in args and "-OVERVIEW" in args:
+        print("Error: -VIEWPORT and -OVERVIEW can't be used together")
+        return
+    circuit_file_name = get_circuit_file_name(args)
+    pulses_set = 0
+    if circuit_file_name is not None:
+        print("<CIRCUIT-FILE FLAG DETECTED!>\n")
+        loaded = circuit_file.load_circuit_file(circuit_file_name, dict_colors, headless)
+        if loaded is None:
+            return
+        circuit, pulses_set = loaded
+        print(f"{circuit.get_width()}x{circuit.get_height()} board created.")
+        print(f"{len(circuit.get_emitters())} emitter(s), {len(circuit.get_receivers())} receiver(s) "
+              f"and {len(circuit.get_mirrors())} mirror(s) added.\n")
+    else:
+        circuit = initialise_circuit(dict_colors, headless)
+        if is_add_my_mirrors_enabled(args):
+            print("<ADD-MY-MIRRORS FLAG DETECTED!>\n")
+            add_mirrors(circuit)
+            print()
+    set_board_view(circuit, args)
+    if not headless:
+        circuit.print_board()
         print()
-    circuit.print_board()
-    print()
+
+    profile_file_name = get_profile_file_name(args)
+    if is_profile_enabled(args) or profile_file_name is not None:
+        circuit.set_profiler(PhaseProfiler())
+    circuit.set_exporter(ResultsExporter(get_output_dir(args), export_formats))
 
     if is_run_my_circuit_enabled(args):  # -RUN-MY-CIRCUIT
         print("<RUN-MY-CIRCUIT FLAG DETECTED!>\n")
 
-        try:
-            with open('home/input/pulse_sequence.in', 'r') as file_obj:
-                set_pulse_sequence(circuit, file_obj)
-                circuit.run_circuit()
-        except FileNotFoundError:
-            print("Error: -RUN-MY-CIRCUIT flag detected but /home/input/pulse_sequence.in does not exist")
+        not_set = get_emitters_not_set(circuit)
+        if pulses_set == 0:
+            try:
+                with open(os.path.join(INPUT_DIR, 'pulse_sequence.in'), 'r') as file_obj:
+                    set_pulse_sequence(circuit, file_obj)
+            except FileNotFoundError:
+                print("Error: -RUN-MY-CIRCUIT flag detected but /home/input/pulse_sequence.in does not exist")
+                return
+        elif len(not_set) > 0:
+            # a circuit file setting pulse sequences has to set every one
+            print(f"Error: circuit file sets no pulse sequence for ({', '.join(not_set)})")
             return
+        # else the circuit file already set the pulse sequence
+        circuit.run_circuit()
+        if profile_file_name is not None:
+            circuit.profiler.export(profile_file_name)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,408 @@
+import gc
+import sys
+import mmap
+import struct
+from array import array
+from emitter import Emitter
+from receiver import Receiver
+from photon import Photon, DIRECTIONS, DIRECTION_CODES
+from mirror import Mirror, MIRROR_SYMBOLS
+from laser_circuit import LaserCircuit
+import sorter
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+snapshot - Saves a LaserCircuit into a compact binary snapshot and loads it
+back. Loading memory-maps the file and reads every array in place through
+typed memoryviews, so nothing is copied out of the file or parsed or
+validated per component: the components are created directly from the
+arrays, the way add_* would have stored them, and the map is closed once
+they are built. The circuit still holds one object per component, since
+the engines and the grid work on objects; what loading saves is the
+parsing and the checks.
+
+A snapshot starts with a fixed-size header (see HEADER) followed by fixed
+width arrays, one per section in SECTIONS order (then RUN_STATE_SECTIONS if
+the snapshot holds the state of a run), each starting on an 8 byte boundary.
+Arrays are stored in the byte order of the machine which saved them, which
+is recorded in the flags. Symbols are stored as NUL padded ASCII, as wide as
+the longest symbol of their kind.
+
+Circuit definition files are converted into snapshots by running
+circuit_file as a program.
+'''
+
+SNAPSHOT_MAGIC = b'LASRSNAP'
+SNAPSHOT_VERSION = 2
+
+# magic, version, flags, width, height, clock, then the number of emitters,
+# receivers, mirrors, emission times, photons and queued shots, then the
+# width of emitter symbols and of receiver symbols
+HEADER = struct.Struct('<8sHHIIqQQQQQQHH')
+HEADER_FIELDS = ('magic', 'version', 'flags', 'width', 'height', 'clock',
+                 'emitters', 'receivers', 'mirrors', 'times', 'photons', 'queue',
+                 'emitter_symbol_width', 'receiver_symbol_width')
+
+# flags
+FLAG_RUN_STATE = 1   # the snapshot holds receiver, photon and queue state
+FLAG_BIG_ENDIAN = 2  # arrays are big-endian
+
+# (name, array typecode, header field counting the items, values per item)
+# where values per item may be a header field too
+SECTIONS = (
+    ('emitter_x', 'I', 'emitters', 1),
+    ('emitter_y', 'I', 'emitters', 1),
+    ('emitter_symbols', 'B', 'emitters', 'emitter_symbol_width'),
+    ('emitter_frequency', 'q', 'emitters', 1),
+    ('emitter_direction', 'b', 'emitters', 1),          # -1 if not set
+    ('emitter_pulse_set', 'B', 'emitters', 1),
+    ('emitter_schedule', 'q', 'emitters', 4),           # see save_schedule
+    ('emission_times', 'q', 'times', 1),
+    ('receiver_x', 'I', 'receivers', 1),
+    ('receiver_y', 'I', 'receivers', 1),
+    ('receiver_symbols', 'B', 'receivers', 'receiver_symbol_width'),
+    ('mirror_x', 'I', 'mirrors', 1),
+    ('mirror_y', 'I', 'mirrors', 1),
+    ('mirror_codes', 'B', 'mirrors', 1),
+)
+RUN_STATE_SECTIONS = (
+    ('receiver_frequency', 'q', 'receivers', 1),        # frequency sum (THz)
+    ('receiver_photons', 'q', 'receivers', 1),
+    ('receiver_activation', 'q', 'receivers', 1),       # -1 if not activated
+    ('photon_x', 'q', 'photons', 1),
+    ('photon_y', 'q', 'photons', 1),
+    ('photon_frequency', 'q', 'photons', 1),
+    ('photon_direction', 'b', 'photons', 1),            # -1 if not set
+    ('photon_absorbed', 'B', 'photons', 1),
+    ('emission_queue', 'q', 'queue', 3),                # time, emitter, shot
+)
+
+# emission schedule kinds, see save_schedule
+SCHEDULE_RANGE = 0
+SCHEDULE_TIMES = 1
+
+
+def section_length(header: dict, count_field: str, per_item: int | str) -> int:
+    '''Returns the number of values in a section of the snapshot.'''
+    if isinstance(per_item, str):
+        per_item = header[per_item]
+    return header[count_field] * per_item
+
+
+def pad_symbols(symbols: list[str], width: int) -> bytes:
+    '''Returns symbols as ASCII, each padded with NUL bytes to width.'''
+    return b''.join(symbol.encode('ascii').ljust(width, b'\0') for symbol in symbols)
+
+
+def save_schedule(emission_times, times: array) -> tuple[int, int, int, int]:
+    '''
+    Returns the 4 values stored for an emitter's emission times. A range is
+    stored as (SCHEDULE_RANGE, start, stop, step). Explicit times are
+    appended to times and stored as (SCHEDULE_TIMES, offset, count, 0).
+    '''
+    if isinstance(emission_times, range):
+        return SCHEDULE_RANGE, emission_times.start, emission_times.stop, emission_times.step
+    offset = len(times)
+    times.extend(emission_times)
+    return SCHEDULE_TIMES, offset, len(emission_times), 0
+
+
+def save_snapshot(circuit: LaserCircuit, file_name: str, run_state: bool = False) -> bool:
+    '''
+    Saves circuit into a snapshot file.
+
+    Parameters
+    ----------
+    circuit   - the circuit to save
+    file_name - the path of the snapshot file to write
+    run_state - whether to also save the clock, the receivers' energies and
+                activations, the photons and the pending shots, so a run can
+                be resumed from the snapshot
+
+    Returns
+    -------
+    True if the snapshot was written, else False (after printing an error).
+    '''
+    emitters = circuit.get_emitters()
+    receivers = circuit.get_receivers()
+    mirrors = circuit.get_mirrors()
+    photons = circuit.photons if run_state else []
+    queue = circuit.emission_queue if run_state else []
+
+    times = array('q')
+    schedules = array('q')
+    for emitter in emitters:
+        schedules.extend(save_schedule(emitter.get_emission_times(), times))
+    emitter_symbols = [emitter.get_symbol() for emitter in emitters]
+    receiver_symbols = [receiver.symbol for receiver in receivers]
+
+    values = {
+        'emitter_x': [emitter.get_x() for emitter in emitters],
+        'emitter_y': [emitter.get_y() for emitter in emitters],
+        'emitter_frequency': [emitter.get_frequency() for emitter in emitters],
+        'emitter_direction': [DIRECTION_CODES.get(emitter.get_direction(), -1) for emitter in emitters],
+        'emitter_pulse_set': [emitter.is_pulse_sequence_set() for emitter in emitters],
+        'emitter_schedule': schedules,
+        'emission_times': times,
+        'receiver_x': [receiver.get_x() for receiver in receivers],
+        'receiver_y': [receiver.get_y() for receiver in receivers],
+        'mirror_x': [mirror.get_x() for mirror in mirrors],
+        'mirror_y': [mirror.get_y() for mirror in mirrors],
+        'mirror_codes': [mirror.mirror_code for mirror in mirrors],
+        'receiver_frequency': [receiver.frequency_sum for receiver in receivers],
+        'receiver_photons': [receiver.photons_absorbed for receiver in receivers],
+        'receiver_activation': [receiver.get_activation_time() if receiver.is_activated() else -1
+                                for receiver in receivers],
+        'photon_x': [photon.get_x() for photon in photons],
+        'photon_y': [photon.get_y() for photon in photons],
+        'photon_frequency': [photon.get_frequency() for photon in photons],
+        'photon_direction': [-1 if photon.get_direction_code() is None else photon.get_direction_code()
+                             for photon in photons],
+        'photon_absorbed': [photon.is_absorbed() for photon in photons],
+        'emission_queue': [value for shot in queue for value in shot],
+    }
+
+    flags = FLAG_RUN_STATE if run_state else 0
+    if sys.byteorder == 'big':
+        flags |= FLAG_BIG_ENDIAN
+    emitter_symbol_width = max((len(symbol) for symbol in emitter_symbols), default=0)
+    receiver_symbol_width = max((len(symbol) for symbol in receiver_symbols), default=0)
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, circuit.get_width(),
+                         circuit.get_height(), circuit.clock if run_state else 0,
+                         len(emitters), len(receivers), len(mirrors), len(times),
+                         len(photons), len(queue), emitter_symbol_width, receiver_symbol_width)
+
+    sections = SECTIONS + (RUN_STATE_SECTIONS if run_state else ())
+    try:
+        with open(file_name, 'wb') as file:
+            file.write(header)
+            position = len(header)
+            for name, typecode, count_field, per_item in sections:
+                # every array starts on an 8 byte boundary
+                file.write(b'\0' * (-position % 8))
+                position += -position % 8
+                if name == 'emitter_symbols':
+                    data = pad_symbols(emitter_symbols, emitter_symbol_width)
+                elif name == 'receiver_symbols':
+                    data = pad_symbols(receiver_symbols, receiver_symbol_width)
+                else:
+                    data = array(typecode, values[name]).tobytes()
+                file.write(data)
+                position += len(data)
+    except OSError:
+        print(f"Error: snapshot {file_name} could not be written")
+        return False
+    return True
+
+
+def is_snapshot(file_name: str) -> bool:
+    '''Returns whether or not the file at file_name starts like a snapshot.'''
+    try:
+        with open(file_name, 'rb') as file:
+            return file.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def section_views(view: memoryview, header: dict) -> dict[str, memoryview] | None:
+    '''
+    Returns a typed memoryview of every array in the snapshot, over the
+    data of view, or None if the snapshot is too short.
+    '''
+    sections = SECTIONS
+    if header['flags'] & FLAG_RUN_STATE:
+        sections = SECTIONS + RUN_STATE_SECTIONS
+    arrays = {}
+    position = HEADER.size
+    for name, typecode, count_field, per_item in sections:
+        position += -position % 8
+        size = section_length(header, count_field, per_item) * array(typecode).itemsize
+        if position + size > len(view):
+            return None
+        arrays[name] = view[position:position + size].cast(typecode)
+        position += size
+    return arrays
+
+
+def symbol_at(symbols: memoryview, i: int, width: int) -> str:
+    '''Returns the i-th symbol of a NUL padded symbols array.'''
+    return bytes(symbols[i * width:(i + 1) * width]).rstrip(b'\0').decode('ascii')
+
+
+def load_schedule(schedule: memoryview, i: int, times: memoryview) -> range | tuple[int, ...]:
+    '''Returns the emission times of the i-th emitter, see save_schedule.'''
+    kind, a, b, c = schedule[i * 4:(i + 1) * 4]
+    if kind == SCHEDULE_RANGE:
+        return range(a, b, c)
+    return tuple(times[a:a + b])
+
+
+def build_from_sections(header: dict, arrays: dict[str, memoryview],
+                        colour_frequency_ranges: dict, headless: bool) -> LaserCircuit | None:
+    '''
+    Creates a circuit from the arrays of a snapshot. Components are stored
+    directly, skipping the checks of add_*, since they were checked when
+    the snapshot was saved. Only the positions are checked to be on the
+    board, which is done over whole arrays at once.
+    '''
+    width = header['width']
+    height = header['height']
+    for kind in ('emitter', 'receiver', 'mirror'):
+        xs = arrays[f'{kind}_x']
+        ys = arrays[f'{kind}_y']
+        if len(xs) > 0 and (max(xs) >= width or max(ys) >= height):
+            print(f"Error: snapshot has a {kind} out-of-bounds of {width}x{height} circuit board")
+            return None
+    if len(arrays['mirror_codes']) > 0 and max(arrays['mirror_codes']) >= len(MIRROR_SYMBOLS):
+        print("Error: snapshot has an invalid mirror")
+        return None
+
+    circuit = LaserCircuit(width, height, colour_frequency_ranges, headless)
+    grid = circuit.grid
+
+    # mirrors go in first, so emitters and receivers win any shared cell.
+    # Mirrors can't form reference cycles, so the cycle collector is paused
+    # instead of rescanning the new objects over and over
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        symbols = map(MIRROR_SYMBOLS.__getitem__, arrays['mirror_codes'])
+        circuit.mirrors = list(map(Mirror, symbols, arrays['mirror_x'], arrays['mirror_y']))
+        for mirror, x, y in zip(circuit.mirrors, arrays['mirror_x'], arrays['mirror_y']):
+            grid[y * width + x] = mirror
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    symbol_width = header['emitter_symbol_width']
+    for i in range(header['emitters']):
+        emitter = Emitter(symbol_at(arrays['emitter_symbols'], i, symbol_width),
+                          arrays['emitter_x'][i], arrays['emitter_y'][i])
+        direction = arrays['emitter_direction'][i]
+        emitter.frequency = arrays['emitter_frequency'][i]
+        emitter.direction = DIRECTIONS[direction] if direction >= 0 else None
+        emitter.pulse_sequence_set = bool(arrays['emitter_pulse_set'][i])
+        emitter.emission_times = load_schedule(arrays['emitter_schedule'], i, arrays['emission_times'])
+        circuit.emitters.append(emitter)
+        circuit.emitter_symbols[emitter.get_symbol()] = emitter
+        circuit.add_component_to_grid(emitter)
+
+    symbol_width = header['receiver_symbol_width']
+    for i in range(header['receivers']):
+        receiver = Receiver(symbol_at(arrays['receiver_symbols'], i, symbol_width),
+                            arrays['receiver_x'][i], arrays['receiver_y'][i])
+        receiver.observer = circuit
+        circuit.receivers.append(receiver)
+        circuit.receiver_symbols[receiver.get_symbol()] = receiver
+        circuit.add_component_to_grid(receiver)
+
+    if circuit.board_displayer is not None:
+        for component in circuit.mirrors + circuit.emitters + circuit.receivers:
+            circuit.board_displayer.add_component_to_board(component)
+
+    if header['flags'] & FLAG_RUN_STATE:
+        load_run_state(circuit, header, arrays)
+    return circuit
+
+
+def load_run_state(circuit: LaserCircuit, header: dict, arrays: dict[str, memoryview]) -> None:
+    '''
+    Restores the clock, the receivers' energies and activations, the photons
+    and the pending shots of a run into circuit.
+    '''
+    circuit.clock = header['clock']
+    for i, receiver in enumerate(circuit.receivers):
+        receiver.frequency_sum = arrays['receiver_frequency'][i]
+        receiver.photons_absorbed = arrays['receiver_photons'][i]
+        activation_time = arrays['receiver_activation'][i]
+        if activation_time >= 0:
+            receiver.activated = True
+            receiver.activation_time = activation_time
+            circuit.activated_receiver_count += 1
+    activated = [receiver for receiver in circuit.receivers if receiver.is_activated()]
+    circuit.activation_order = sorted(activated, key=sorter.activation_time_key)
+    circuit.energy_changed = set(activated)
+
+    for i in range(header['photons']):
+        photon = Photon(arrays['photon_x'][i], arrays['photon_y'][i],
+                        arrays['photon_frequency'][i], None)
+        direction = arrays['photon_direction'][i]
+        photon.direction_code = direction if direction >= 0 else None
+        photon.absorbed = bool(arrays['photon_absorbed'][i])
+        circuit.photons.append(photon)
+        circuit.track_photon(photon)
+
+    queue = arrays['emission_queue']
+    # the queue was saved in heap order, so it is still a heap
+    circuit.emission_queue = [tuple(queue[i:i + 3]) for i in range(0, len(queue), 3)]
+
+
+def load_snapshot(file_name: str, colour_frequency_ranges: dict = None,
+                  headless: bool = False) -> LaserCircuit | None:
+    '''
+    Loads the circuit saved in a snapshot file. The file is memory-mapped
+    and its arrays are read in place, without copying or parsing them.
+
+    Parameters
+    ----------
+    file_name               - the path of the snapshot file
+    colour_frequency_ranges - passed on to the LaserCircuit
+    headless                - passed on to the LaserCircuit
+
+    Returns
+    -------
+    The circuit, or None (after printing an error) if the file can't be
+    loaded.
+    '''
+    try:
+        file = open(file_name, 'rb')
+    except OSError:
+        print(f"Error: snapshot {file_name} could not be read")
+        return None
+    with file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            print(f"Error: snapshot {file_name} is too short")
+            return None
+        with mapped:
+            view = memoryview(mapped)
+            try:
+                return load_view(file_name, view, colour_frequency_ranges, headless)
+            finally:
+                # the map can only be closed once no view refers to it
+                view.release()
+
+
+def load_view(file_name: str, view: memoryview, colour_frequency_ranges: dict,
+              headless: bool) -> LaserCircuit | None:
+    '''
+    Loads the circuit saved in the snapshot data of view, see load_snapshot.
+    Every section view taken from view is released before returning.
+    '''
+    if len(view) < HEADER.size:
+        print(f"Error: snapshot {file_name} is too short")
+        return None
+    header = dict(zip(HEADER_FIELDS, HEADER.unpack_from(view)))
+    if header['magic'] != SNAPSHOT_MAGIC:
+        print(f"Error: {file_name} is not a circuit snapshot")
+        return None
+    if header['version'] != SNAPSHOT_VERSION:
+        print(f"Error: snapshot version {header['version']} is not supported")
+        return None
+    if bool(header['flags'] & FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+        print("Error: snapshot was saved on a machine with another byte order")
+        return None
+    arrays = section_views(view, header)
+    if arrays is None:
+        print(f"Error: snapshot {file_name} is too short")
+        return None
+    try:
+        return build_from_sections(header, arrays, colour_frequency_ranges, headless)
+    finally:
+        for section in arrays.values():
+            section.release()
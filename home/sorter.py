@@ -1,3 +1,4 @@
+from collections import deque
 from emitter import Emitter
 from receiver import Receiver
 
@@ -13,9 +14,99 @@ functions to handle it in your program when needed.
 
 You are free to add more functions, as long as you aren't modifying the
 existing scaffold.
+
+Every sort is key-based, with the key of each component computed once, so
+sorting n components takes O(n log n). Sorting by symbol is a stable sort
+(Python's sorted). Sorting receivers by activation time or total energy
+leaves tied receivers in the same order as the exchange sort this module used
+to run, see exchange_order, so reports come out exactly as they used to.
 '''
 
 
+def symbol_key(component: Emitter | Receiver) -> tuple[int, str]:
+    '''
+    Returns the key which orders components by symbol: shorter symbols come
+    first, then symbols of the same length are ordered alphabetically. This
+    orders emitters like spreadsheet columns ('A' to 'Z', then 'AA', 'AB',
+    ...) and receivers by the number in their symbol ('R2' before 'R10').
+    For single letter and single digit symbols it is the alphabetical order.
+    '''
+    symbol = component.get_symbol()
+    return len(symbol), symbol
+
+
+def activation_time_key(receiver: Receiver) -> tuple[int, int, str]:
+    '''
+    Returns the key which orders receivers by activation time in ascending
+    order, then by symbol in ascending order. Ties come out in another order
+    than sort_receivers_by_activation_time, see exchange_order.
+    '''
+    return (receiver.get_activation_time(),) + symbol_key(receiver)
+
+
+def total_energy_key(receiver: Receiver) -> tuple[float, int, str]:
+    '''
+    Returns the key which orders receivers by total energy in descending
+    order, then by symbol in ascending order. Ties come out in another order
+    than sort_receivers_by_total_energy, see exchange_order.
+    '''
+    return (-receiver.get_total_energy(),) + symbol_key(receiver)
+
+
+def exchange_order(components: list, keys: list) -> list:
+    '''
+    Returns components sorted by keys in ascending order, with tied
+    components in the order the exchange sort this module used to run leaves
+    them in. That sort swapped components[i] and components[j] whenever j > i
+    and components[j] had a smaller key, which moves tied components around.
+
+    The tied components end up in the order of a queue built by scanning the
+    components in order: each tied component joins the back of the queue,
+    and each component with a smaller key found once the queue has started
+    moves the front of the queue to its back. The components with larger
+    keys, and the order of the smaller ones, make no difference.
+
+    Parameters
+    ----------
+    components - the components to sort
+    keys       - the key of each component, in the same order
+
+    Returns
+    -------
+    A new list containing the same components, sorted by keys.
+    '''
+    positions = {}
+    for position, key in enumerate(keys):
+        positions.setdefault(key, []).append(position)
+
+    # a Fenwick tree counting the components with a smaller key than the
+    # tied components being ordered, by position
+    smaller = [0] * (len(keys) + 1)
+
+    def count_smaller(stop: int) -> int:
+        '''Returns the number of smaller components before position stop.'''
+        count = 0
+        while stop > 0:
+            count += smaller[stop]
+            stop -= stop & -stop
+        return count
+
+    new_list = []
+    for key in sorted(positions):
+        tied = positions[key]
+        queue = deque()
+        for start, stop in zip(tied, tied[1:] + [len(keys)]):
+            queue.append(start)
+            queue.rotate(-((count_smaller(stop) - count_smaller(start + 1)) % len(queue)))
+        new_list.extend(components[position] for position in queue)
+        for position in tied:
+            position += 1
+            while position < len(smaller):
+                smaller[position] += 1
+                position += position & -position
+    return new_list
+
+
 def sort_receivers_by_symbol(receivers: list[Receiver]) -> list[Receiver]:
     # this method has already been implemented for you
     '''
@@ -32,27 +123,7 @@ def sort_receivers_by_symbol(receivers: list[Receiver]) -> list[Receiver]:
     A new list containing the same receivers, sorted by their symbol in
     ascending order.
     '''
-    # copy the receivers objects into a new list so we don't modify the original
-    new_list = receivers.copy()
-
-    # perform a bubble sort
-    i = 0
-    # traverse through all receivers in the list
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the symbols of the two adjacent receivers
-            # swap them if the component at the front has a larger symbol
-            if new_list[i].get_symbol() > new_list[j].get_symbol():
-                # swap the positions of the receivers in the list
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-            # at this point, all elements from 0 to i is sorted
-        i += 1
-
-    return new_list
+    return sorted(receivers, key=symbol_key)
 
 
 def sort_emitters_by_symbol(emitters: list[Emitter]) -> list[Emitter]:
@@ -71,27 +142,7 @@ def sort_emitters_by_symbol(emitters: list[Emitter]) -> list[Emitter]:
     A new list containing the same receivers, sorted by their symbol in
     ascending order.
     '''
-    # copy the receivers objects into a new list so we don't modify the original
-    new_list = emitters.copy()
-
-    # perform a bubble sort
-    i = 0
-    # traverse through all receivers in the list
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the symbols of the two adjacent receivers
-            # swap them if the component at the front has a larger symbol
-            if new_list[i].get_symbol() > new_list[j].get_symbol():
-                # swap the positions of the receivers in the list
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-            # at this point, all elements from 0 to i is sorted
-        i += 1
-
-    return new_list
+    return sorted(emitters, key=symbol_key)
 
 
 def sort_receivers_by_activation_time(receivers: list[Receiver]) -> list[Receiver]:
@@ -110,23 +161,8 @@ def sort_receivers_by_activation_time(receivers: list[Receiver]) -> list[Receive
     A new list containing the same receivers, sorted by their activation times
     in ascending order, followed by a sorting of their symbol in ascending order.
     '''
-    # sort our receivers by symbol to resolve ties
     new_list = sort_receivers_by_symbol(receivers)
-
-    i = 0
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the activation time of the two adjacent receivers
-            # swap them if the receiver at the front has a larger activation time
-            if new_list[i].get_activation_time() > new_list[j].get_activation_time():
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-        i += 1
-
-    return new_list
+    return exchange_order(new_list, [receiver.get_activation_time() for receiver in new_list])
 
 
 def sort_receivers_by_total_energy(receivers: list[Receiver]) -> list[Receiver]:
@@ -145,20 +181,5 @@ def sort_receivers_by_total_energy(receivers: list[Receiver]) -> list[Receiver]:
     A new list containing the same receivers, sorted by their total energy in
     descending order, followed by a sorting of their symbol in ascending order.
     '''
-    # sort our receivers by symbol to resolve ties
     new_list = sort_receivers_by_symbol(receivers)
-
-    i = 0
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the total energy of the two adjacent receivers
-            # swap them if the receiver at the front has a smaller total energy
-            if new_list[i].get_total_energy() < new_list[j].get_total_energy():
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-        i += 1
-
-    return new_list
+    return exchange_order(new_list, [-receiver.get_total_energy() for receiver in new_list])
@@ -0,0 +1,286 @@
+import io
+import os
+import sys
+import csv
+import json
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import circuit_file
+from run import load_pulse_sequence
+from laser_circuit import LaserCircuit
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+sweep - Runs one circuit geometry against many pulse sequence variants,
+spreading the variants over a pool of worker processes. Every worker builds
+the circuit once (headless) and reuses it, together with the outcomes its
+solver has memoised, for every variant it is given, so each variant only
+costs its own run.
+
+The geometry is a circuit definition file (see circuit_file); any PULSE
+entries in it are ignored. Variants come from a variants file where each
+variant starts with a VARIANT line followed by its pulse sequence lines,
+which may use pulse train schedules:
+
+    VARIANT slow
+    A 100 E
+    B 400 N
+    VARIANT fast
+    A 700 E EVERY 5 10
+    B 400 N
+
+The same variants can also be given as JSON:
+
+    {"slow": ["A 100 E", "B 400 N"], "fast": ["A 700 E EVERY 5 10", "B 400 N"]}
+
+Usage:
+    python home/sweep.py <circuit file> <variants file> [-WORKERS <n>] [-CSV <path>]
+'''
+
+# columns of the results table, one row per activated receiver per variant
+SWEEP_COLUMNS = ('variant', 'receiver', 'activation_time', 'total_energy', 'photons_absorbed')
+
+# the circuit built by each worker process from the geometry
+worker_circuit: LaserCircuit = None
+
+
+def read_variants(text: str) -> list[tuple[str, list[str]]] | None:
+    '''
+    Splits the contents of a variants file into variants.
+
+    Parameters
+    ----------
+    text - the contents of the file, in the line or JSON format
+
+    Returns
+    -------
+    A list of (name, pulse sequence lines) tuples in file order. Returns
+    None and prints an error message if the file is malformed.
+    '''
+    if text.lstrip().startswith(('{', '[')):
+        try:
+            document = json.loads(text)
+        except json.JSONDecodeError as error:
+            print(f"Error: invalid JSON variants file ({error})")
+            return None
+        if not isinstance(document, dict):
+            print("Error: JSON variants file must hold an object")
+            return None
+        for name, lines in document.items():
+            if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+                print(f"Error: JSON variants file - variant '{name}' must be a list of strings")
+                return None
+        return [(name, lines) for name, lines in document.items()]
+
+    variants = []
+    names = set()
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        tokens = line.split(maxsplit=1)
+        if tokens[0].upper() == 'VARIANT':
+            if len(tokens) == 1 or tokens[1] in names:
+                print(f"Error: line {number} - every variant needs a unique name")
+                return None
+            names.add(tokens[1])
+            variants.append((tokens[1], []))
+        elif len(variants) == 0:
+            print(f"Error: line {number} - pulse sequence before any VARIANT")
+            return None
+        else:
+            variants[-1][1].append(line)
+    return variants
+
+
+def build_geometry(geometry_text: str) -> LaserCircuit | None:
+    '''
+    Builds a headless circuit from the contents of a circuit definition
+    file, ignoring its PULSE entries.
+
+    Parameters
+    ----------
+    geometry_text - the contents of the circuit definition file
+
+    Returns
+    -------
+    The circuit, or None (after printing an error) if the file is invalid.
+    '''
+    entries = circuit_file.read_entries(geometry_text)
+    if entries is None:
+        return None
+    entries = [entry for entry in entries if entry[1] != 'PULSE']
+    built = circuit_file.build_circuit(entries, None, True)
+    if built is None:
+        return None
+    return built[0]
+
+
+def init_worker(geometry_text: str) -> None:
+    '''
+    Initialises a worker process by building its circuit from the geometry.
+    The geometry was already checked by the parent process, so any messages
+    printed while building it are dropped.
+    '''
+    global worker_circuit
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker_circuit = build_geometry(geometry_text)
+
+
+def run_variant(circuit: LaserCircuit, name: str, lines: list[str]) -> tuple[list[tuple], list[str]]:
+    '''
+    Runs circuit from the start with the pulse sequence of one variant. The
+    circuit is reset first, so the same circuit can run every variant.
+
+    Parameters
+    ----------
+    circuit - the circuit to run, headless
+    name    - the name of the variant
+    lines   - the pulse sequence lines of the variant
+
+    Returns
+    -------
+    A tuple (rows, diagnostics) where rows has one SWEEP_COLUMNS row for
+    every activated receiver, in order of activation time, and diagnostics
+    holds the errors found in the variant's pulse sequence. A variant which
+    leaves an emitter without a pulse sequence is not run.
+    '''
+    circuit.reset_run()
+    for emitter in circuit.get_emitters():
+        emitter.clear_pulse_sequence()
+    diagnostics = [f"{name}: {diagnostic}" for diagnostic in load_pulse_sequence(circuit, lines)]
+    not_set = [emitter.get_symbol() for emitter in circuit.get_emitters()
+               if not emitter.is_pulse_sequence_set()]
+    if len(not_set) > 0:
+        diagnostics.append(f"{name}: Error: no pulse sequence for ({', '.join(not_set)})")
+        return [], diagnostics
+
+    circuit.emit_photons()
+    circuit.run_analytic()
+    rows = [(name, f"R{receiver.get_symbol()}", receiver.get_activation_time(),
+             receiver.get_total_energy(), receiver.photons_absorbed)
+            for receiver in circuit.activation_order]
+    return rows, diagnostics
+
+
+def run_worker_variant(variant: tuple[str, list[str]]) -> tuple[list[tuple], list[str]]:
+    '''Runs one (name, lines) variant on the circuit of this worker process.'''
+    return run_variant(worker_circuit, variant[0], variant[1])
+
+
+def sweep(geometry_text: str, variants: list[tuple[str, list[str]]],
+          max_workers: int = None) -> tuple[list[tuple], list[str]] | None:
+    '''
+    Runs every variant against the geometry and collects the results.
+    Variants are handed to the workers in chunks, so the pool overhead is
+    paid once per chunk instead of once per variant. With a single worker
+    the variants run in this process.
+
+    Parameters
+    ----------
+    geometry_text - the contents of the circuit definition file
+    variants      - the (name, pulse sequence lines) variants to run
+    max_workers   - the number of worker processes, by default one per core
+
+    Returns
+    -------
+    A tuple (rows, diagnostics) with the SWEEP_COLUMNS rows of every variant
+    in variant order and the diagnostics of every variant, or None if the
+    geometry is invalid.
+    '''
+    circuit = build_geometry(geometry_text)
+    if circuit is None:
+        return None
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(variants)))
+
+    if max_workers == 1:
+        results = [run_variant(circuit, name, lines) for name, lines in variants]
+    else:
+        chunksize = max(1, len(variants) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers, initializer=init_worker,
+                                 initargs=(geometry_text,)) as executor:
+            results = list(executor.map(run_worker_variant, variants, chunksize=chunksize))
+
+    rows = []
+    diagnostics = []
+    for variant_rows, variant_diagnostics in results:
+        rows.extend(variant_rows)
+        diagnostics.extend(variant_diagnostics)
+    return rows, diagnostics
+
+
+def format_table(rows: list[tuple]) -> list[str]:
+    '''
+    Formats the results table as aligned lines of text, with a header line
+    naming the columns.
+    '''
+    table = [SWEEP_COLUMNS] + [(variant, receiver, f"{time}ns", f"{energy:.2f}eV", str(count))
+                               for variant, receiver, time, energy, count in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(SWEEP_COLUMNS))]
+    return ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+            for row in table]
+
+
+def main(args: list[str]) -> None:
+    '''
+    Runs a sweep from the command line and prints the results table.
+
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    if len(args) < 3:
+        print("Usage: python home/sweep.py <circuit file> <variants file> "
+              "[-WORKERS <n>] [-CSV <path>]")
+        return
+    max_workers = None
+    csv_path = None
+    i = 3
+    while i < len(args):
+        if args[i] == '-WORKERS' and i + 1 < len(args) and args[i + 1].isdigit() \
+                and int(args[i + 1]) > 0:
+            max_workers = int(args[i + 1])
+        elif args[i] == '-CSV' and i + 1 < len(args):
+            csv_path = args[i + 1]
+        else:
+            print(f"Error: unknown option '{args[i]}'")
+            return
+        i += 2
+
+    try:
+        with open(args[1], 'r') as file:
+            geometry_text = file.read()
+        with open(args[2], 'r') as file:
+            variants = read_variants(file.read())
+    except OSError as error:
+        print(f"Error: {error.filename} could not be read")
+        return
+    if variants is None:
+        return
+
+    result = sweep(geometry_text, variants, max_workers)
+    if result is None:
+        return
+    rows, diagnostics = result
+    for diagnostic in diagnostics:
+        print(diagnostic)
+    print(f"{len(variants)} variant(s) run.\n")
+    for line in format_table(rows):
+        print(line)
+    if csv_path is not None:
+        try:
+            with open(csv_path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(SWEEP_COLUMNS)
+                writer.writerows(rows)
+        except OSError as error:
+            print(f"Error: {error.filename} could not be written")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,168 @@
+import io
+import contextlib
+import run
+from laser_circuit import LaserCircuit
+from emitter import Emitter
+from receiver import Receiver
+from mirror import Mirror
+from board_displayer import BoardDisplayer, CLEAR_SCREEN
+from test_engines import build_random_circuit
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks the views of the board: rendering from cached rows,
+viewports, overviews and terminal mode.
+'''
+
+
+def run_halfway(circuit: LaserCircuit) -> None:
+    '''Emits the photons of circuit and runs a few ticks, leaving trails.'''
+    circuit.emit_photons()
+    for _ in range(6):
+        circuit.tick()
+
+
+def test_cached_rows_match_the_board():
+    '''Every frame rendered from cached rows matches the board joined again.'''
+    for seed in range(20):
+        circuit = build_random_circuit(seed, headless=False)
+        displayer = circuit.board_displayer
+        circuit.emit_photons()
+        for _ in range(10):
+            top = f"+{displayer.width*'-'}+"
+            rows = ['|' + ''.join(row) + '|' for row in displayer.board]
+            assert displayer.render_board() == '\n'.join([top] + rows + [top]), f"seed {seed} differs"
+            circuit.tick()
+
+
+def test_viewport_is_a_window_of_the_board():
+    '''A viewport shows the same cells as the whole board, cut to the board.'''
+    for seed in range(20):
+        circuit = build_random_circuit(seed, headless=False)
+        run_halfway(circuit)
+        displayer = circuit.board_displayer
+        board = displayer.render_board().split('\n')[1:-1]
+        x, y = displayer.width // 3, displayer.height // 3
+        assert displayer.set_viewport(x, y, 8, 100)
+        width = min(8, displayer.width - x)
+        window = displayer.render_view().split('\n')
+        assert window[0] == window[-1] == f"+{width*'-'}+"
+        assert window[1:-1] == ['|' + row[1 + x:1 + x + width] + '|' for row in board[y:]]
+        displayer.clear_view()
+        assert displayer.render_view().split('\n')[1:-1] == board
+
+
+def test_invalid_views():
+    '''Views starting off the board or without any cells are errors.'''
+    displayer = BoardDisplayer(5, 4)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert not displayer.set_viewport(5, 0, 2, 2)
+        assert not displayer.set_viewport(0, 0, 0, 2)
+        assert not displayer.set_overview(0, 3)
+    assert output.getvalue().count("Error: ") == 3
+    assert displayer.viewport is None and displayer.overview is None
+
+
+def test_viewport_and_overview_rejected_together():
+    '''run.py stops with an error when given both -VIEWPORT and -OVERVIEW.'''
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run.main(['run.py', '-VIEWPORT', '0,0,4,4', '-OVERVIEW', '2,2'])
+    assert output.getvalue() == "Error: -VIEWPORT and -OVERVIEW can't be used together\n"
+
+
+def test_overview_glyphs():
+    '''
+    Each block shows the component it holds most of, receivers winning
+    ties, else a trail, else nothing.
+    '''
+    circuit = LaserCircuit(4, 4)
+    circuit.add_receiver(Receiver('R0', 0, 0))
+    circuit.add_mirror(Mirror('/', 1, 1))
+    circuit.add_emitter(Emitter('A', 2, 0))
+    circuit.add_mirror(Mirror('^', 0, 2))
+    circuit.add_mirror(Mirror('v', 1, 3))
+    circuit.add_emitter(Emitter('B', 0, 3))
+    displayer = circuit.board_displayer
+    assert displayer.set_overview(2, 2)
+    assert displayer.render_view() == "+--+\n|RE|\n|M |\n+--+"
+    displayer.set_cell(3, 3, '.')
+    assert displayer.render_view() == "+--+\n|RE|\n|M.|\n+--+"
+
+
+def test_overview_counts_follow_the_run():
+    '''The block counts kept up to date while running match a recount.'''
+    for seed in range(20):
+        circuit = build_random_circuit(seed, headless=False)
+        displayer = circuit.board_displayer
+        displayer.set_overview(3, 2)
+        run_halfway(circuit)
+        while not circuit.is_finished():
+            circuit.tick()
+        counts = [list(kind) for kind in displayer.block_counts]
+        displayer.count_blocks()
+        assert counts == displayer.block_counts, f"seed {seed} counts drifted"
+
+
+def test_terminal_mode():
+    '''
+    In terminal mode the first frame clears the screen, draws the board and
+    makes the lines below it scroll. Later frames only redraw the cells which
+    changed, putting the cursor back where it was, and frames without changes
+    print nothing.
+    '''
+    circuit = LaserCircuit(6, 3, terminal_mode=True)
+    emitter = Emitter('A', 0, 1)
+    emitter.set_pulse_sequence(100, 'E')
+    circuit.add_emitter(emitter)
+    circuit.add_receiver(Receiver('R0', 5, 1))
+    circuit.emit_photons()
+    frames = []
+    for _ in range(3):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            circuit.print_board()
+        frames.append(output.getvalue())
+        circuit.tick()
+    assert frames[0] == CLEAR_SCREEN + "+------+\n|      |\n|A    0|\n|      |\n+------+\n\033[6r\033[6;1H"
+    # cell (1, 1) is on line 3, column 3 of the terminal
+    assert frames[1] == "\0337\033[3;3H.\0338"
+    assert frames[2] == "\0337\033[3;4H.\0338"
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        circuit.print_board()
+        circuit.print_board()
+    assert output.getvalue() == "\0337\033[3;5H.\0338"
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        circuit.board_displayer.set_terminal_mode(False)
+        circuit.print_board()
+    assert output.getvalue() == "\0337\033[r\0338+------+\n|      |\n|A... 0|\n|      |\n+------+\n"
+
+
+def test_terminal_mode_overview():
+    '''An overview is drawn again whole at the top, putting the cursor back.'''
+    circuit = LaserCircuit(4, 4, terminal_mode=True)
+    circuit.add_emitter(Emitter('A', 0, 0))
+    displayer = circuit.board_displayer
+    displayer.set_overview(2, 2)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        circuit.print_board()
+        displayer.set_cell(3, 3, '.')
+        circuit.print_board()
+    assert output.getvalue() == (CLEAR_SCREEN + "+--+\n|E |\n|  |\n+--+\n\033[5r\033[5;1H"
+                                 + "\0337\033[H+--+\n|E |\n| .|\n+--+\0338")
+
+
+if __name__ == '__main__':
+    test_cached_rows_match_the_board()
+    test_viewport_is_a_window_of_the_board()
+    test_invalid_views()
+    test_viewport_and_overview_rejected_together()
+    test_overview_glyphs()
+    test_overview_counts_follow_the_run()
+    test_terminal_mode()
+    test_terminal_mode_overview()
@@ -0,0 +1,180 @@
+import random
+from laser_circuit import LaserCircuit
+from emitter import Emitter
+from receiver import Receiver
+from mirror import Mirror
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks that every engine gives the same results as running
+LaserCircuit.tick until the circuit is finished, on seeded random circuits
+with pulse trains and loops of mirrors.
+
+Trapped photons are compared by count only: tick keeps moving them round
+their loop while the engines leave them where they were found trapped.
+'''
+
+SEEDS = range(200)
+ENGINES = ('run_vectorised', 'run_event_driven', 'run_with_path_cache', 'run_analytic')
+
+
+def build_random_circuit(seed: int, headless: bool = True) -> LaserCircuit:
+    '''
+    Builds a small circuit (headless by default) from seed, with up to 10
+    emitters (some firing pulse trains), up to 10 receivers and up to half
+    of its cells holding mirrors, so many paths reflect and a few end up in
+    loops.
+    '''
+    rng = random.Random(seed)
+    width = rng.randint(3, 30)
+    height = rng.randint(3, 20)
+    circuit = LaserCircuit(width, height, headless=headless)
+    cells = rng.sample([(x, y) for x in range(width) for y in range(height)], width * height)
+
+    for symbol in 'ABCDEFGHIJ'[:rng.randint(1, min(10, width * height // 4))]:
+        x, y = cells.pop()
+        emitter = Emitter(symbol, x, y)
+        kind = rng.randrange(3)
+        if kind == 0:
+            emission_times = None
+        elif kind == 1:
+            emission_times = range(rng.randint(0, 2), 40, rng.randint(1, 7))
+        else:
+            emission_times = tuple(sorted(rng.sample(range(60), rng.randint(1, 5))))
+        emitter.set_pulse_sequence(rng.randint(1, 900), rng.choice('NESW'), emission_times)
+        circuit.add_emitter(emitter)
+    for i in range(rng.randint(1, min(10, width * height // 4))):
+        x, y = cells.pop()
+        circuit.add_receiver(Receiver(f'R{i}', x, y))
+    for _ in range(rng.randint(0, width * height // 2)):
+        x, y = cells.pop()
+        circuit.add_mirror(Mirror(rng.choice('/\\<>^v'), x, y))
+    return circuit
+
+
+def build_loop_circuit() -> LaserCircuit:
+    '''
+    Builds a circuit where emitter A fires into a square of four mirrors it
+    never leaves, while emitter B fires straight into receiver R0.
+    '''
+    circuit = LaserCircuit(6, 6, headless=True)
+    for emitter, frequency in ((Emitter('A', 2, 1), 100), (Emitter('B', 0, 5), 300)):
+        emitter.set_pulse_sequence(frequency, 'E', range(0, 9, 3))
+        circuit.add_emitter(emitter)
+    circuit.add_receiver(Receiver('R0', 5, 5))
+    for symbol, x, y in (('\\', 3, 1), ('/', 3, 3), ('\\', 1, 3), ('/', 1, 1)):
+        circuit.add_mirror(Mirror(symbol, x, y))
+    return circuit
+
+
+def run_ticks(circuit: LaserCircuit) -> None:
+    '''Emits the photons of circuit and ticks until it is finished.'''
+    circuit.emit_photons()
+    limit = 8 * circuit.get_width() * circuit.get_height() + 100
+    while not circuit.is_finished():
+        circuit.tick()
+        assert circuit.clock < limit, "circuit never finished"
+
+
+def results(circuit: LaserCircuit) -> tuple:
+    '''
+    Returns everything an engine has to agree with tick on: the clock, the
+    activated receivers in activation order with their activation times,
+    the frequency sum and photons absorbed of every receiver, the number of
+    trapped photons and the final state of every other photon.
+    '''
+    return (circuit.clock,
+            [(receiver.get_symbol(), receiver.get_activation_time()) for receiver in circuit.activation_order],
+            [(receiver.get_symbol(), receiver.frequency_sum, receiver.photons_absorbed)
+             for receiver in circuit.get_receivers()],
+            len(circuit.trapped_photons),
+            [(photon.get_x(), photon.get_y(), photon.get_direction(), photon.is_absorbed())
+             for photon in circuit.get_photons() if not photon.is_trapped()])
+
+
+def check_engine(engine: str) -> None:
+    '''Checks engine against tick on every seed of SEEDS.'''
+    for seed in SEEDS:
+        expected = build_random_circuit(seed)
+        run_ticks(expected)
+        circuit = build_random_circuit(seed)
+        getattr(circuit, engine)()
+        assert circuit.is_finished(), f"{engine} left seed {seed} unfinished"
+        assert results(circuit) == results(expected), f"{engine} differs from tick on seed {seed}"
+
+
+def test_random_circuits_have_trains_and_loops():
+    '''
+    Makes sure the seeded circuits cover pulse trains and trapped photons,
+    so the engine tests below exercise both.
+    '''
+    trains = 0
+    trapped = 0
+    for seed in SEEDS:
+        circuit = build_random_circuit(seed)
+        trains += sum(len(emitter.get_emission_times()) > 1 for emitter in circuit.get_emitters())
+        run_ticks(circuit)
+        trapped += len(circuit.trapped_photons)
+    assert trains > 0
+    assert trapped > 0
+
+
+def test_headless_matches_board():
+    '''Ticking without a board gives the same results as ticking with one.'''
+    for seed in SEEDS:
+        expected = build_random_circuit(seed, headless=False)
+        run_ticks(expected)
+        circuit = build_random_circuit(seed)
+        run_ticks(circuit)
+        assert results(circuit) == results(expected), f"seed {seed} differs without a board"
+
+
+def test_vectorised_matches_tick():
+    '''run_vectorised gives the same results as tick.'''
+    check_engine('run_vectorised')
+
+
+def test_event_driven_matches_tick():
+    '''run_event_driven gives the same results as tick.'''
+    check_engine('run_event_driven')
+
+
+def test_path_cache_matches_tick():
+    '''run_with_path_cache gives the same results as tick.'''
+    check_engine('run_with_path_cache')
+
+
+def test_analytic_matches_tick():
+    '''run_analytic gives the same results as tick.'''
+    check_engine('run_analytic')
+
+
+def test_loop_is_trapped_by_every_engine():
+    '''
+    Every shot of A is trapped in the square of mirrors while every shot of
+    B reaches R0, and each engine finishes without the trapped photons.
+    '''
+    expected = build_loop_circuit()
+    run_ticks(expected)
+    assert len(expected.trapped_photons) == 3
+    receiver = expected.get_receiver('R0')
+    assert receiver.photons_absorbed == 3
+    assert receiver.get_activation_time() == 5
+    for engine in ENGINES:
+        circuit = build_loop_circuit()
+        getattr(circuit, engine)()
+        assert circuit.is_finished()
+        assert results(circuit) == results(expected), f"{engine} differs from tick"
+
+
+if __name__ == '__main__':
+    test_random_circuits_have_trains_and_loops()
+    test_headless_matches_board()
+    test_vectorised_matches_tick()
+    test_event_driven_matches_tick()
+    test_path_cache_matches_tick()
+    test_analytic_matches_tick()
+    test_loop_is_trapped_by_every_engine()
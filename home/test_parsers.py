@@ -0,0 +1,153 @@
+import io
+import os
+import tempfile
+import contextlib
+import input_parser
+import circuit_file
+import run
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks the parsing of inputs: the prompts of input_parser
+and the line and JSON formats of circuit definition files.
+'''
+
+CIRCUIT_TEXT = '''# demo
+SIZE 10 5
+
+EMITTER A 0 0
+EMITTER A 1 1
+RECEIVER R0 9 0
+MIRROR / 5 0
+PULSE A 100 E EVERY 5 3
+PULSE J 100 E
+'''
+
+
+def printed(function, *args) -> tuple[object, str]:
+    '''Returns what function returns when called with args, and what it printed.'''
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function(*args)
+    return result, output.getvalue()
+
+
+def test_parse_size():
+    '''A size is two positive integers; the first failed check is printed.'''
+    assert printed(input_parser.parse_size, '18 6') == ((18, 6), '')
+    assert printed(input_parser.parse_size, '18') == (None, "Error: <width> <height>\n")
+    assert printed(input_parser.parse_size, 'a 6') == (None, "Error: width is not an integer\n")
+    assert printed(input_parser.parse_size, '18 0') == (None, "Error: height must be greater than zero\n")
+
+
+def test_parse_components():
+    '''
+    Emitter symbols are one or more capital letters, receiver symbols are
+    'R' and a number without leading zeros, and positions can't be negative.
+    '''
+    emitter, output = printed(input_parser.parse_emitter, 'AB 1 2')
+    assert (emitter.get_symbol(), emitter.get_x(), emitter.get_y(), output) == ('AB', 1, 2, '')
+    assert printed(input_parser.parse_emitter, 'a 1 2') == (None, input_parser.EMITTER_SYMBOL_ERROR + '\n')
+    assert printed(input_parser.parse_emitter, 'A 1 -2') == (None, "Error: y cannot be negative\n")
+
+    receiver, output = printed(input_parser.parse_receiver, 'R10 3 4')
+    assert (receiver.get_symbol(), receiver.get_x(), receiver.get_y(), output) == ('10', 3, 4, '')
+    assert printed(input_parser.parse_receiver, 'R01 0 0') == (None, input_parser.RECEIVER_SYMBOL_ERROR + '\n')
+
+    mirror, output = printed(input_parser.parse_mirror, 'v 2 3')
+    assert (mirror.get_symbol(), mirror.get_x(), mirror.get_y(), output) == ('v', 2, 3, '')
+    assert printed(input_parser.parse_mirror, 'x 2 3')[0] is None
+
+
+def test_check_pulse_train():
+    '''A pulse sequence may end with an EVERY or AT schedule.'''
+    assert input_parser.check_pulse_train('A 100 E') == ('A', 100, 'E', range(1))
+    assert input_parser.check_pulse_train('B 400 N EVERY 5 10') == ('B', 400, 'N', range(0, 50, 5))
+    assert input_parser.check_pulse_train('C 7 S AT 0 3 8') == ('C', 7, 'S', (0, 3, 8))
+    assert input_parser.check_pulse_train('C 0 S') == "Error: frequency must be greater than zero"
+    assert input_parser.check_pulse_train('C 7 S AT 3 1') \
+        == "Error: emission times must be in ascending order, from 0ns"
+    assert input_parser.check_pulse_train('C 7 S EVERY 0 2') \
+        == "Error: period and shots must be greater than zero"
+
+
+def test_read_entries_line_format():
+    '''Blank lines and comments are skipped, and unknown entries are errors.'''
+    entries = circuit_file.read_entries(CIRCUIT_TEXT)
+    assert entries[0] == (2, 'SIZE', '10 5')
+    assert entries[-1] == (9, 'PULSE', 'J 100 E')
+    assert len(entries) == 7
+    assert printed(circuit_file.read_entries, 'SIZE 3 3\nLASER A 0 0') \
+        == (None, "Error: line 2 - unknown entry 'LASER'\n")
+
+
+def test_read_entries_json_format():
+    '''JSON files hold the same entries as lists, and bad shapes are errors.'''
+    text = '{"size": [10, 5], "emitters": [["A", 0, 0]], "pulses": [["A", 100, "E"]]}'
+    assert circuit_file.read_entries(text) == [(1, 'SIZE', '10 5'), (2, 'EMITTER', 'A 0 0'),
+                                               (3, 'PULSE', 'A 100 E')]
+    assert printed(circuit_file.read_entries, '{"size": 5}') \
+        == (None, "Error: JSON circuit file - 'size' must be a list\n")
+    assert printed(circuit_file.read_entries, '{"size": [5, 5], "emitters": {}}') \
+        == (None, "Error: JSON circuit file - 'emitters' must be a list\n")
+    result, output = printed(circuit_file.read_entries, '{"size": [5, 5], "emitters": [["A", 1, [2]]]}')
+    assert result is None
+    assert output.startswith("Error: JSON circuit file - entry 2 of 'emitters'")
+    result, output = printed(circuit_file.read_entries, '{"size": [5, 5]')
+    assert result is None
+    assert output.startswith("Error: invalid JSON circuit file")
+
+
+def test_build_circuit():
+    '''
+    Invalid entries are reported and skipped, pulse trains are set, and
+    components can't come before the size.
+    '''
+    (circuit, pulses_set), output = printed(circuit_file.build_circuit,
+                                            circuit_file.read_entries(CIRCUIT_TEXT), None, True)
+    assert (circuit.get_width(), circuit.get_height()) == (10, 5)
+    assert [emitter.get_symbol() for emitter in circuit.get_emitters()] == ['A']
+    assert len(circuit.get_receivers()) == 1 and len(circuit.get_mirrors()) == 1
+    assert pulses_set == 1
+    assert circuit.get_emitter('A').get_emission_times() == range(0, 15, 5)
+    assert "-- line 5 skipped: EMITTER A 1 1" in output
+    assert "Error: emitter 'J' does not exist" in output
+
+    entries = circuit_file.read_entries('EMITTER A 0 0\nSIZE 3 3')
+    assert printed(circuit_file.build_circuit, entries, None, True) \
+        == (None, "Error: line 1 - size must be set before any component\n")
+
+
+def test_run_with_circuit_file():
+    '''
+    A circuit file setting the pulse sequence of every emitter is run, one
+    leaving some emitters without a pulse sequence is reported and not run.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'circuit.txt')
+        args = ['run.py', '-CIRCUIT-FILE', file_name, '-RUN-MY-CIRCUIT', '-HEADLESS',
+                '-OUTPUT-DIR', directory]
+        geometry = 'SIZE 5 3\nEMITTER A 0 0\nEMITTER B 0 2\nRECEIVER R0 4 0\nPULSE A 100 E\n'
+        with open(file_name, 'w') as file:
+            file.write(geometry + 'PULSE B 100 E\n')
+        output = printed(run.main, args)[1]
+        assert "R0: 4ns" in output and "CIRCUIT FINISHED!" in output
+
+        with open(file_name, 'w') as file:
+            file.write(geometry)
+        output = printed(run.main, args)[1]
+        assert output.endswith("<RUN-MY-CIRCUIT FLAG DETECTED!>\n\n"
+                               "Error: circuit file sets no pulse sequence for (B)\n")
+
+
+if __name__ == '__main__':
+    test_parse_size()
+    test_parse_components()
+    test_check_pulse_train()
+    test_read_entries_line_format()
+    test_read_entries_json_format()
+    test_build_circuit()
+    test_run_with_circuit_file()
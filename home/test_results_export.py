@@ -0,0 +1,128 @@
+import io
+import os
+import csv
+import json
+import tempfile
+import contextlib
+import run
+from laser_circuit import LaserCircuit
+from emitter import Emitter
+from receiver import Receiver
+from results_export import ResultsExporter, EMITTER_COLUMNS, RECEIVER_COLUMNS
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the .npy files are only loaded back with it
+    np = None
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks that running a circuit writes its reports and
+results into the exporter's output directory, in every format asked for.
+'''
+
+
+def build_circuit() -> LaserCircuit:
+    '''
+    Builds a circuit where A fires twice into R0, B fires once into R1 and
+    R2 is never reached.
+    '''
+    circuit = LaserCircuit(8, 3, headless=True)
+    first = Emitter('A', 0, 0)
+    first.set_pulse_sequence(100, 'E', range(0, 4, 2))
+    second = Emitter('B', 0, 2)
+    second.set_pulse_sequence(400, 'E')
+    for component in (first, second):
+        circuit.add_emitter(component)
+    for symbol, x, y in (('R0', 7, 0), ('R1', 3, 2), ('R2', 5, 1)):
+        circuit.add_receiver(Receiver(symbol, x, y))
+    return circuit
+
+
+def run_into(directory: str, formats: tuple[str, ...]) -> str:
+    '''Runs the circuit, exporting formats into directory, and returns what it printed.'''
+    circuit = build_circuit()
+    circuit.set_exporter(ResultsExporter(directory, formats))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        circuit.run_circuit()
+    return output.getvalue()
+
+
+def read_file(directory: str, file_name: str) -> str:
+    '''Returns the contents of file_name in directory.'''
+    with open(os.path.join(directory, file_name)) as file:
+        return file.read()
+
+
+def test_reports_are_written():
+    '''The .out reports hold the same lines run_circuit prints.'''
+    with tempfile.TemporaryDirectory() as directory:
+        printed = run_into(os.path.join(directory, 'output'), ('out',))
+        output_dir = os.path.join(directory, 'output')
+        assert sorted(os.listdir(output_dir)) == ['activation_times.out', 'emit_photons.out',
+                                                  'total_energy.out']
+        assert read_file(output_dir, 'emit_photons.out') == "A: 100THz, East\nB: 400THz, East\n"
+        assert read_file(output_dir, 'activation_times.out') == "R1: 3ns\nR0: 7ns\n"
+        assert read_file(output_dir, 'total_energy.out') == "R1: 1.65eV (1)\nR0: 0.83eV (2)\n"
+        for line in ("R1: 3ns", "R0: 0.83eV (2)"):
+            assert line in printed
+
+
+def test_reports_can_be_turned_off():
+    '''Without the 'out' format nothing is written.'''
+    with tempfile.TemporaryDirectory() as directory:
+        run_into(directory, ())
+        assert os.listdir(directory) == []
+
+
+def test_results_are_exported():
+    '''The csv, jsonl and npy files hold one record per emitter and receiver.'''
+    with tempfile.TemporaryDirectory() as directory:
+        run_into(directory, ('csv', 'jsonl', 'npy'))
+        with open(os.path.join(directory, 'receivers.csv'), newline='') as file:
+            rows = list(csv.reader(file))
+        assert rows[0] == list(RECEIVER_COLUMNS)
+        energy = Receiver('R0', 0, 0).convert_frequency_to_energy(200)
+        assert rows[1] == ['R0', '7', '0', 'True', '7', repr(energy), '2']
+        assert rows[3][:4] == ['R2', '5', '1', 'False']
+
+        with open(os.path.join(directory, 'emitters.jsonl')) as file:
+            records = [json.loads(line) for line in file]
+        assert records == [dict(zip(EMITTER_COLUMNS, ('A', 0, 0, 100, 'E', 2))),
+                           dict(zip(EMITTER_COLUMNS, ('B', 0, 2, 400, 'E', 1)))]
+
+        if np is not None:
+            receivers = np.load(os.path.join(directory, 'receivers.npy'))
+            assert list(receivers['symbol']) == [b'R0', b'R1', b'R2']
+            assert list(receivers['photons_absorbed']) == [2, 1, 0]
+            assert list(receivers['activated']) == [True, True, False]
+
+
+def test_input_files_are_found_from_any_directory():
+    '''run.py reads its input files from next to it, whatever the working directory.'''
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'circuit.txt')
+        with open(file_name, 'w') as file:
+            file.write("SIZE 5 3\nEMITTER A 0 0\nRECEIVER R0 4 0\n")
+        working_directory = os.getcwd()
+        output = io.StringIO()
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(output):
+                run.main(['run.py', '-CIRCUIT-FILE', file_name, '-RUN-MY-CIRCUIT', '-RGB-MY-CIRCUIT',
+                          '-HEADLESS', '-OUTPUT-DIR', directory])
+        finally:
+            os.chdir(working_directory)
+    assert "does not exist" not in output.getvalue()
+    assert "A: 100THz, East" in output.getvalue() and "R0: 4ns" in output.getvalue()
+
+
+if __name__ == '__main__':
+    test_reports_are_written()
+    test_reports_can_be_turned_off()
+    test_results_are_exported()
+    test_input_files_are_found_from_any_directory()
@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import contextlib
+import snapshot
+import circuit_file
+from test_engines import build_random_circuit, run_ticks, results
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks that circuits saved into snapshots load back the
+same, with and without the state of a run, and that broken snapshots are
+reported instead of loaded.
+'''
+
+
+def geometry(circuit) -> tuple:
+    '''Returns the size and every component of circuit, with their settings.'''
+    return ((circuit.get_width(), circuit.get_height()),
+            [(emitter.get_symbol(), emitter.get_x(), emitter.get_y(), emitter.get_frequency(),
+              emitter.get_direction(), tuple(emitter.get_emission_times()))
+             for emitter in circuit.get_emitters()],
+            [(receiver.get_symbol(), receiver.get_x(), receiver.get_y()) for receiver in circuit.get_receivers()],
+            [(mirror.get_symbol(), mirror.get_x(), mirror.get_y()) for mirror in circuit.get_mirrors()])
+
+
+def test_geometry_round_trip():
+    '''Every component and pulse sequence loads back as it was saved.'''
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'circuit.snap')
+        for seed in range(20):
+            circuit = build_random_circuit(seed)
+            assert snapshot.save_snapshot(circuit, file_name)
+            assert snapshot.is_snapshot(file_name)
+            loaded = snapshot.load_snapshot(file_name, headless=True)
+            assert geometry(loaded) == geometry(circuit)
+
+
+def test_run_state_round_trip():
+    '''
+    A circuit saved halfway through a run, then loaded and run to the end,
+    finishes exactly like the circuit which was never saved.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'run.snap')
+        for seed in range(20):
+            expected = build_random_circuit(seed)
+            run_ticks(expected)
+
+            circuit = build_random_circuit(seed)
+            circuit.emit_photons()
+            for _ in range(7):
+                circuit.tick()
+            assert snapshot.save_snapshot(circuit, file_name, run_state=True)
+            loaded = snapshot.load_snapshot(file_name, headless=True)
+            assert loaded.clock == circuit.clock
+            while not loaded.is_finished():
+                loaded.tick()
+            assert results(loaded) == results(expected), f"seed {seed} differs after loading"
+
+
+def test_broken_snapshots():
+    '''Files which aren't whole snapshots are reported and not loaded.'''
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, 'circuit.snap')
+        assert snapshot.save_snapshot(build_random_circuit(0), file_name)
+        with open(file_name, 'rb') as file:
+            data = file.read()
+        cases = ((data[:snapshot.HEADER.size + 4], "is too short"),
+                 (b'', "is too short"),
+                 (b'SIZE 3 3\n' + bytes(snapshot.HEADER.size), "is not a circuit snapshot"),
+                 (data[:8] + b'\xff\xff' + data[10:], "version 65535 is not supported"))
+        for contents, error in cases:
+            with open(file_name, 'wb') as file:
+                file.write(contents)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                assert snapshot.load_snapshot(file_name) is None
+            assert error in output.getvalue()
+
+
+def test_convert_circuit_file():
+    '''circuit_file converts a definition file into a snapshot it can load.'''
+    with tempfile.TemporaryDirectory() as directory:
+        text_name = os.path.join(directory, 'circuit.txt')
+        snapshot_name = os.path.join(directory, 'circuit.snap')
+        with open(text_name, 'w') as file:
+            file.write("SIZE 10 5\nEMITTER A 0 0\nRECEIVER R0 9 0\nPULSE A 100 E EVERY 5 3\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            circuit_file.main(['circuit_file.py', text_name, snapshot_name])
+        circuit, pulses_set = circuit_file.load_circuit_file(snapshot_name)
+        assert pulses_set == 1
+        assert geometry(circuit) == ((10, 5), [('A', 0, 0, 100, 'E', (0, 5, 10))],
+                                     [('0', 9, 0)], [])
+
+
+if __name__ == '__main__':
+    test_geometry_round_trip()
+    test_run_state_round_trip()
+    test_broken_snapshots()
+    test_convert_circuit_file()
@@ -0,0 +1,101 @@
+import io
+import random
+import contextlib
+import sorter
+from laser_circuit import LaserCircuit
+from receiver import Receiver
+from results_export import ResultsExporter
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks that the sorter functions, and the reports using
+them, order tied receivers exactly like the exchange sort sorter used to run.
+'''
+
+
+def exchange_sort(receivers: list[Receiver], value) -> list[Receiver]:
+    '''The exchange sort sorter used to run, on receivers already sorted by symbol.'''
+    new_list = receivers.copy()
+    i = 0
+    while i < len(new_list):
+        j = i
+        while j < len(new_list):
+            if value(new_list[i]) > value(new_list[j]):
+                temp = new_list[i]
+                new_list[i] = new_list[j]
+                new_list[j] = temp
+            j += 1
+        i += 1
+    return new_list
+
+
+def build_receivers(frequencies: list[int], times: list[int]) -> list[Receiver]:
+    '''Returns receivers R0, R1, ... which absorbed one photon each, or none if its time is 0.'''
+    receivers = []
+    for i, (frequency, time) in enumerate(zip(frequencies, times)):
+        receiver = Receiver(f'R{i}', i, 0)
+        if time > 0:
+            receiver.absorb_frequencies([frequency], time)
+        receivers.append(receiver)
+    return receivers
+
+
+def symbols(receivers: list[Receiver]) -> list[str]:
+    '''Returns the symbols of receivers, in order.'''
+    return [receiver.get_symbol() for receiver in receivers]
+
+
+def test_tied_activation_times():
+    '''Receivers activated at 5, 3, 5 and 3ns are listed as R1, R3, R2, R0.'''
+    receivers = build_receivers([100] * 4, [5, 3, 5, 3])
+    assert symbols(sorter.sort_receivers_by_activation_time(receivers)) == ['1', '3', '2', '0']
+
+
+def test_tied_total_energies():
+    '''Receivers which absorbed 100, 300, 100 and 300THz are listed as R1, R3, R2, R0.'''
+    receivers = build_receivers([100, 300, 100, 300], [1] * 4)
+    assert symbols(sorter.sort_receivers_by_total_energy(receivers)) == ['1', '3', '2', '0']
+
+
+def test_ties_match_exchange_sort():
+    '''On random receivers with many ties, the sorts match the exchange sort.'''
+    rng = random.Random(0)
+    for _ in range(2000):
+        count = rng.randint(0, 10)
+        receivers = build_receivers([rng.choice((100, 200, 300)) for _ in range(count)],
+                                    [rng.randint(0, 4) for _ in range(count)])
+        rng.shuffle(receivers)
+        by_symbol = sorter.sort_receivers_by_symbol(receivers)
+        assert sorter.sort_receivers_by_activation_time(receivers) \
+            == exchange_sort(by_symbol, Receiver.get_activation_time)
+        assert sorter.sort_receivers_by_total_energy(receivers) \
+            == exchange_sort(by_symbol, lambda receiver: -receiver.get_total_energy())
+
+
+def test_reports_keep_tie_order():
+    '''
+    The reports list tied receivers like the exchange sort did, counting the
+    receivers which were never activated.
+    '''
+    circuit = LaserCircuit(8, 1, headless=True)
+    circuit.set_exporter(ResultsExporter(formats=()))
+    for receiver in build_receivers([100, 300, 100, 300, 100], [5, 3, 5, 0, 3]):
+        circuit.add_receiver(receiver)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        circuit.print_activation_times()
+        circuit.print_total_energy()
+    assert output.getvalue() == ("Activation times:\nR1: 3ns\nR4: 3ns\nR0: 5ns\nR2: 5ns\n"
+                                 "Total energy absorbed:\nR1: 1.24eV (1)\nR0: 0.41eV (1)\n"
+                                 "R2: 0.41eV (1)\nR4: 0.41eV (1)\n")
+    assert symbols(circuit.get_receivers()) == ['0', '1', '2', '3', '4']
+
+
+if __name__ == '__main__':
+    test_tied_activation_times()
+    test_tied_total_energies()
+    test_ties_match_exchange_sort()
+    test_reports_keep_tie_order()
@@ -0,0 +1,100 @@
+import io
+import os
+import csv
+import tempfile
+import contextlib
+import sweep
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+This test program checks the sweep over pulse sequence variants: reading
+variants files and running every variant against one geometry.
+'''
+
+GEOMETRY_TEXT = '''SIZE 8 3
+EMITTER A 0 0
+EMITTER B 0 2
+RECEIVER R0 7 0
+RECEIVER R1 3 2
+PULSE A 900 E
+'''
+
+
+def printed(function, *args) -> tuple[object, str]:
+    '''Returns what function returns when called with args, and what it printed.'''
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function(*args)
+    return result, output.getvalue()
+
+
+def test_read_variants():
+    '''The line and JSON formats give the same variants.'''
+    text = 'VARIANT slow\nA 100 E\n\nB 400 E\nVARIANT fast\nA 700 E EVERY 5 2\nB 400 E\n'
+    expected = [('slow', ['A 100 E', 'B 400 E']), ('fast', ['A 700 E EVERY 5 2', 'B 400 E'])]
+    assert sweep.read_variants(text) == expected
+    assert sweep.read_variants('{"slow": ["A 100 E", "B 400 E"], '
+                               '"fast": ["A 700 E EVERY 5 2", "B 400 E"]}') == expected
+    assert printed(sweep.read_variants, 'A 100 E\nVARIANT slow') \
+        == (None, "Error: line 1 - pulse sequence before any VARIANT\n")
+    assert printed(sweep.read_variants, 'VARIANT a\nVARIANT a') \
+        == (None, "Error: line 2 - every variant needs a unique name\n")
+
+
+def test_read_variants_json_shapes():
+    '''JSON variants must be an object of lists of strings.'''
+    assert printed(sweep.read_variants, '{"a": "A 100 E"}') \
+        == (None, "Error: JSON variants file - variant 'a' must be a list of strings\n")
+    assert printed(sweep.read_variants, '{"a": 5}') \
+        == (None, "Error: JSON variants file - variant 'a' must be a list of strings\n")
+    assert printed(sweep.read_variants, '{"a": ["A 100 E", 5]}') \
+        == (None, "Error: JSON variants file - variant 'a' must be a list of strings\n")
+    assert printed(sweep.read_variants, '[["A 100 E"]]') \
+        == (None, "Error: JSON variants file must hold an object\n")
+    result, output = printed(sweep.read_variants, '{"a": [')
+    assert result is None
+    assert output.startswith("Error: invalid JSON variants file")
+
+
+def test_sweep():
+    '''
+    Every variant runs from the start, the PULSE entries of the geometry
+    are ignored, and variants leaving an emitter unset are not run.
+    '''
+    variants = [('slow', ['A 100 E', 'B 400 E']), ('late', ['A 100 E AT 4', 'B 400 E']),
+                ('missing', ['A 100 E'])]
+    rows, diagnostics = sweep.sweep(GEOMETRY_TEXT, variants, 1)
+    assert [row[:3] + row[4:] for row in rows] == [('slow', 'R1', 3, 1), ('slow', 'R0', 7, 1),
+                                                    ('late', 'R1', 3, 1), ('late', 'R0', 11, 1)]
+    assert diagnostics == ["missing: Error: no pulse sequence for (B)"]
+
+
+def test_main_writes_csv():
+    '''-CSV writes the results table, and a path that can't be written is reported.'''
+    with tempfile.TemporaryDirectory() as directory:
+        geometry = os.path.join(directory, 'geometry.txt')
+        variants = os.path.join(directory, 'variants.txt')
+        with open(geometry, 'w') as file:
+            file.write(GEOMETRY_TEXT)
+        with open(variants, 'w') as file:
+            file.write('VARIANT slow\nA 100 E\nB 400 E\n')
+        table = os.path.join(directory, 'table.csv')
+        printed(sweep.main, ['sweep.py', geometry, variants, '-WORKERS', '1', '-CSV', table])
+        with open(table, newline='') as file:
+            rows = list(csv.reader(file))
+        assert rows[0] == list(sweep.SWEEP_COLUMNS)
+        assert [row[:3] for row in rows[1:]] == [['slow', 'R1', '3'], ['slow', 'R0', '7']]
+
+        missing = os.path.join(directory, 'missing', 'table.csv')
+        output = printed(sweep.main, ['sweep.py', geometry, variants, '-WORKERS', '1', '-CSV', missing])[1]
+        assert output.endswith(f"Error: {missing} could not be written\n")
+
+
+if __name__ == '__main__':
+    test_read_variants()
+    test_read_variants_json_shapes()
+    test_sweep()
+    test_main_writes_csv()
@@ -0,0 +1,37 @@
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+TickRecord - A lightweight record of what happened during one tick of a
+LaserCircuit, as yielded by LaserCircuit.iter_ticks. Consumers can stop the
+stream early, sample it or aggregate it without any output being printed.
+'''
+
+
+class TickRecord:
+
+    __slots__ = ('clock', 'absorbed', 'activated', 'live_photon_count',
+                 'activated_receiver_count', 'board_delta')
+
+    def __init__(self, clock: int, absorbed: list, activated: list,
+                 live_photon_count: int, activated_receiver_count: int,
+                 board_delta: list = None):
+        '''
+        Initialises a TickRecord.
+
+        clock:                    int  - the circuit's clock after the tick
+        absorbed:                 list - photons absorbed during the tick
+        activated:                list - receivers activated during the tick
+        live_photon_count:        int  - photons not absorbed after the tick
+        activated_receiver_count: int  - receivers activated so far
+        board_delta:              list - (x, y, cell) for every board cell
+                                         changed during the tick, or None if
+                                         board deltas were not requested
+        '''
+        self.clock: int = clock
+        self.absorbed: list = absorbed
+        self.activated: list = activated
+        self.live_photon_count: int = live_photon_count
+        self.activated_receiver_count: int = activated_receiver_count
+        self.board_delta: list = board_delta
@@ -0,0 +1,204 @@
+import mmap
+import tempfile
+from array import array
+from photon import DIRECTIONS
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+TrajectoryRecorder - Records every step of every photon as it runs, as
+(photon id, tick, x, y, direction). A photon's id is its position in the
+circuit's list of photons, given by the circuit when the photon is added, so
+photons added before the recorder was attached keep their ids (they just
+have no steps). Its first step is where and when it was added.
+
+Steps are appended to fixed size typed arrays allocated up front, one per
+column, sized to fit the memory budget. When they are full they are written
+as one chunk to a spill file and reused, so recording any number of steps
+keeps the same amount of memory. Paths are read back from the spill file by
+memory-mapping it, scanning only the chunks the photon appears in.
+
+Only tick records steps; the engines (run_vectorised, run_event_driven and
+run_with_path_cache) jump photons over cells and record nothing.
+'''
+
+# (name, array typecode) of each column of a step
+STEP_COLUMNS = (('photon', 'I'), ('tick', 'I'), ('x', 'I'), ('y', 'I'), ('direction', 'b'))
+STEP_SIZE = sum(array(typecode).itemsize for _, typecode in STEP_COLUMNS)
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+
+
+class TrajectoryRecorder:
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, spill_file: str = None):
+        '''
+        Initialises an empty TrajectoryRecorder.
+
+        capacity:    int              - steps held in memory before spilling
+        columns:     list[array]      - one preallocated array per column of
+                                        STEP_COLUMNS
+        length:      int              - steps in the arrays
+        chunks:      int              - full chunks written to the spill file
+        photon_ids:  dict[Photon, int] - the id of each photon recorded
+        photon_chunks: dict[int, list[int]] - the spilled chunks each photon
+                                              id has steps in
+        spill_path:  str              - the spill file, None for a temporary
+                                        file deleted when closed
+        spill:       file             - the open spill file, None until the
+                                        arrays first fill up
+        spill_map:   mmap             - the spill file mapped for reading,
+                                        None until a path is read from it
+
+        Parameters
+        ----------
+        memory_budget - the bytes the arrays may take, at least one step
+        spill_file    - where to spill steps, by default a temporary file
+        '''
+        self.capacity: int = max(1, memory_budget // STEP_SIZE)
+        self.columns: list[array] = [array(typecode, [0]) * self.capacity
+                                     for _, typecode in STEP_COLUMNS]
+        self.length: int = 0
+        self.chunks: int = 0
+        self.photon_ids: dict = {}
+        self.photon_chunks: dict[int, list[int]] = {}
+        self.spill_path: str = spill_file
+        self.spill = None
+        self.spill_map: mmap.mmap = None
+
+    def __len__(self) -> int:
+        '''Returns the number of steps recorded.'''
+        return self.chunks * self.capacity + self.length
+
+    def add_photon(self, photon, photon_id: int, tick: int) -> None:
+        '''
+        Starts recording photon under photon_id and records its first step.
+
+        Parameters
+        ----------
+        photon    - a photon which has just been added to the circuit
+        photon_id - the position of the photon in the circuit's photons
+        tick      - the time it was added at
+        '''
+        self.photon_ids[photon] = photon_id
+        self.photon_chunks[photon_id] = []
+        self.record(photon_id, tick, photon.x, photon.y, photon.direction_code)
+
+    def record(self, photon_id: int, tick: int, x: int, y: int, direction: int | None) -> None:
+        '''Appends one step, spilling the arrays first if they are full.'''
+        if self.length == self.capacity:
+            self.spill_chunk()
+        i = self.length
+        photons, ticks, xs, ys, directions = self.columns
+        photons[i] = photon_id
+        ticks[i] = tick
+        xs[i] = x
+        ys[i] = y
+        directions[i] = -1 if direction is None else direction
+        self.length = i + 1
+
+    def record_tick(self, tick: int, photons: list) -> None:
+        '''
+        Appends a step for each photon at its position after tick. Photons
+        absorbed before the tick are skipped; photons absorbed during it get
+        their last step.
+        '''
+        photon_ids = self.photon_ids
+        capacity = self.capacity
+        # spilling empties the arrays but keeps them, so they can be held here
+        ids, ticks, xs, ys, directions = self.columns
+        i = self.length
+        for photon in photons:
+            photon_id = photon_ids.get(photon)
+            if photon_id is None:
+                continue
+            if i == capacity:
+                self.length = i
+                self.spill_chunk()
+                i = 0
+            ids[i] = photon_id
+            ticks[i] = tick
+            xs[i] = photon.x
+            ys[i] = photon.y
+            direction = photon.direction_code
+            directions[i] = -1 if direction is None else direction
+            i += 1
+        self.length = i
+
+    def spill_chunk(self) -> None:
+        '''
+        Writes the full arrays to the spill file as the next chunk, one
+        column after another, and empties them.
+        '''
+        if self.spill is None:
+            if self.spill_path is None:
+                self.spill = tempfile.TemporaryFile()
+            else:
+                self.spill = open(self.spill_path, 'w+b')
+        for column in self.columns:
+            column.tofile(self.spill)
+        for photon_id in set(self.columns[0]):
+            self.photon_chunks[photon_id].append(self.chunks)
+        self.chunks += 1
+        self.length = 0
+
+    def chunk_columns(self, chunk: int) -> tuple[memoryview, ...]:
+        '''Returns the columns of a spilled chunk, read in place.'''
+        size = self.chunks * self.capacity * STEP_SIZE
+        if self.spill_map is None or len(self.spill_map) < size:
+            self.spill.flush()
+            if self.spill_map is not None:
+                self.spill_map.close()
+            self.spill_map = mmap.mmap(self.spill.fileno(), size, access=mmap.ACCESS_READ)
+        view = memoryview(self.spill_map)
+        offset = chunk * self.capacity * STEP_SIZE
+        columns = []
+        for _, typecode in STEP_COLUMNS:
+            end = offset + self.capacity * array(typecode).itemsize
+            columns.append(view[offset:end].cast(typecode))
+            offset = end
+        return tuple(columns)
+
+    def get_path(self, photon_id: int) -> list[tuple[int, int, int, str]] | None:
+        '''
+        Returns the steps of a photon in order, as (tick, x, y, direction)
+        tuples, or None if no photon with this id is recorded.
+        '''
+        if photon_id not in self.photon_chunks:
+            return None
+        path = []
+        sources = [(self.capacity,) + self.chunk_columns(chunk)
+                   for chunk in self.photon_chunks[photon_id]]
+        sources.append((self.length,) + tuple(self.columns))
+        for length, photons, ticks, xs, ys, directions in sources:
+            # array.index searches in C, much faster than comparing each id,
+            # so the ids of a spilled chunk are copied into an array first
+            if not isinstance(photons, array):
+                photons = array('I', photons)
+            i = -1
+            while True:
+                try:
+                    i = photons.index(photon_id, i + 1, length)
+                except ValueError:
+                    break
+                direction = DIRECTIONS[directions[i]] if directions[i] >= 0 else None
+                path.append((ticks[i], xs[i], ys[i], direction))
+        return path
+
+    def reset(self) -> None:
+        '''Drops every step and photon recorded, keeping the arrays.'''
+        self.close()
+        self.length = 0
+        self.chunks = 0
+        self.photon_ids = {}
+        self.photon_chunks = {}
+
+    def close(self) -> None:
+        '''Closes the spill file (deleting it if it is temporary).'''
+        if self.spill_map is not None:
+            self.spill_map.close()
+            self.spill_map = None
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
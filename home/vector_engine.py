@@ -0,0 +1,189 @@
+from photon import DX, DY
+from mirror import REFLECTION_TABLE, ABSORBED
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only this engine needs it
+    np = None
+
+'''
+Name:   Javier Herrera Saavedra
+SID:    540159552
+Unikey: jher0112
+
+vector_engine - A structure-of-arrays photon engine. Instead of moving each
+Photon object one at a time, the x, y, direction, frequency and absorbed
+state of every photon are stored in NumPy arrays and the whole population is
+advanced in a single vectorised step per nanosecond: movement, out-of-bounds
+absorption, mirror reflection (through a lookup table) and receiver
+absorption (through the circuit's occupancy grid). The engine is run
+through LaserCircuit.run_vectorised.
+'''
+
+class VectorEngine:
+
+    def __init__(self, circuit):
+        '''
+        Initialises a VectorEngine for the given circuit, compiling the
+        circuit's occupancy grid into a receiver grid and a mirror grid.
+
+        circuit:       LaserCircuit - the circuit to simulate
+        receiver_grid: ndarray      - receiver index per cell, -1 if none
+        mirror_grid:   ndarray      - mirror code per cell, -1 if none
+        reflect:       ndarray      - REFLECTION_TABLE as an array
+        dx, dy:        ndarray      - movement per direction code
+
+        Parameters
+        ----------
+        circuit - the LaserCircuit to simulate
+        '''
+        if np is None:
+            raise ImportError("VectorEngine requires numpy to be installed")
+        self.circuit = circuit
+        width = circuit.get_width()
+        size = width * circuit.get_height()
+        self.receiver_grid = np.full(size, -1, dtype=np.int32)
+        self.mirror_grid = np.full(size, -1, dtype=np.int8)
+        receivers = circuit.get_receivers()
+        for i, receiver in enumerate(receivers):
+            if circuit.get_grid_component(receiver.get_x(), receiver.get_y()) is receiver:
+                self.receiver_grid[receiver.get_y() * width + receiver.get_x()] = i
+        for mirror in circuit.get_mirrors():
+            if circuit.get_grid_component(mirror.get_x(), mirror.get_y()) is mirror:
+                self.mirror_grid[mirror.get_y() * width + mirror.get_x()] = mirror.mirror_code
+        self.reflect = np.array(REFLECTION_TABLE, dtype=np.int8)
+        self.dx = np.array(DX, dtype=np.int64)
+        self.dy = np.array(DY, dtype=np.int64)
+
+    def run(self) -> None:
+        '''
+        Advances every photon in the circuit that has not been absorbed until
+        all of them are absorbed or trapped, updating the circuit's clock,
+        its receivers and the Photon objects themselves.
+
+        The photons moving are held in the arrays x, y, d and frequency.
+        Photons which stop are dropped from them, and their final state is
+        kept in the arrays final_x, final_y, final_d and absorbed, which
+        cover every photon run. The Photon objects are only written once,
+        after the run. Every step, the photons hitting each receiver are
+        absorbed by it in one call to Receiver.absorb_frequencies, in the
+        order tick would absorb them, so total energies and arrival logs
+        are identical. Shots of pulse trains are fired from the circuit's
+        emission queue and appended to the arrays when they are due.
+        '''
+        circuit = self.circuit
+        width = circuit.get_width()
+        height = circuit.get_height()
+        receivers = circuit.get_receivers()
+        photons = [photon for photon in circuit.live_photons
+                   if not photon.is_absorbed() and not photon.is_trapped()]
+        emissions = circuit.emission_queue
+        if len(photons) == 0 and len(emissions) == 0:
+            return
+
+        # structure of arrays holding only the moving photons, where ids
+        # are the positions of the photons in photons
+        ids = np.arange(len(photons))
+        x, y, d, frequency = self.photon_arrays(photons)
+        # state of every photon in photons, written back after the run
+        absorbed = np.zeros(len(photons), dtype=bool)
+        final_x = x.copy()
+        final_y = y.copy()
+        final_d = d.copy()
+
+        while len(ids) > 0 or len(emissions) > 0:
+            if len(ids) == 0:
+                # nothing is moving, so skip straight to the next shot
+                circuit.clock = max(circuit.clock, emissions[0][0])
+            else:
+                circuit.clock += 1
+                nx = x + self.dx[d]
+                ny = y + self.dy[d]
+                out = (nx < 0) | (nx >= width) | (ny < 0) | (ny >= height)
+                # out-of-bounds photons are absorbed and stay on the edge
+                x = np.where(out, x, nx)
+                y = np.where(out, y, ny)
+                cell = y * width + x
+
+                receiver_hit = self.receiver_grid[cell]
+                receiver_hit[out] = -1
+                mirror_hit = self.mirror_grid[cell].astype(np.int64)
+                mirror_hit[out | (receiver_hit >= 0)] = -1
+
+                reflected = mirror_hit >= 0
+                new_d = d.copy()
+                new_d[reflected] = self.reflect[mirror_hit[reflected], d[reflected]]
+                lost = reflected & (new_d == ABSORBED)
+                d = np.where(lost, d, new_d)
+
+                hit = np.flatnonzero(receiver_hit >= 0)
+                if len(hit) > 0:
+                    self.absorb_hits(receivers, receiver_hit[hit], frequency[hit], circuit.clock)
+
+                done = out | lost | (receiver_hit >= 0)
+                done_ids = ids[done]
+                absorbed[done_ids] = True
+                final_x[done_ids] = x[done]
+                final_y[done_ids] = y[done]
+                final_d[done_ids] = d[done]
+
+                keep = ~done
+                ids = ids[keep]
+                x = x[keep]
+                y = y[keep]
+                d = d[keep]
+                frequency = frequency[keep]
+
+            # shots of pulse trains due now start moving on the next step
+            if len(emissions) > 0 and emissions[0][0] <= circuit.clock:
+                emitted = [photon for photon in circuit.emit_due_photons() if not photon.is_trapped()]
+                ids = np.concatenate([ids, np.arange(len(photons), len(photons) + len(emitted))])
+                photons.extend(emitted)
+                new_x, new_y, new_d, new_frequency = self.photon_arrays(emitted)
+                x = np.concatenate([x, new_x])
+                y = np.concatenate([y, new_y])
+                d = np.concatenate([d, new_d])
+                frequency = np.concatenate([frequency, new_frequency])
+                absorbed = np.concatenate([absorbed, np.zeros(len(emitted), dtype=bool)])
+                final_x = np.concatenate([final_x, new_x])
+                final_y = np.concatenate([final_y, new_y])
+                final_d = np.concatenate([final_d, new_d])
+
+        for i in np.flatnonzero(absorbed):
+            photon = photons[i]
+            photon.x = int(final_x[i])
+            photon.y = int(final_y[i])
+            photon.set_direction_code(int(final_d[i]))
+            photon.got_absorbed()
+
+    def photon_arrays(self, photons: list) -> tuple:
+        '''
+        Returns the x, y, direction code and frequency of every photon in
+        photons as four int64 arrays.
+        '''
+        x = np.array([photon.get_x() for photon in photons], dtype=np.int64)
+        y = np.array([photon.get_y() for photon in photons], dtype=np.int64)
+        d = np.array([photon.get_direction_code() for photon in photons], dtype=np.int64)
+        frequency = np.array([photon.get_frequency() for photon in photons], dtype=np.int64)
+        return x, y, d, frequency
+
+    def absorb_hits(self, receivers: list, hit_receivers, hit_frequencies, time: int) -> None:
+        '''
+        Makes each receiver absorb the photons which hit it during a step.
+
+        Parameters
+        ----------
+        receivers       - the receivers of the circuit
+        hit_receivers   - the index of the receiver hit by each photon, in
+                          the order of the live photon worklist
+        hit_frequencies - the frequency of each of those photons
+        time            - the time of the step
+        '''
+        # a stable sort groups the photons by receiver, keeping their order
+        order = np.argsort(hit_receivers, kind='stable')
+        hit_receivers = hit_receivers[order]
+        hit_frequencies = hit_frequencies[order].tolist()
+        starts = np.flatnonzero(np.diff(hit_receivers, prepend=-1)).tolist()
+        ends = starts[1:] + [len(hit_frequencies)]
+        for start, end in zip(starts, ends):
+            receivers[hit_receivers[start]].absorb_frequencies(hit_frequencies[start:end], time)